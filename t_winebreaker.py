@@ -0,0 +1,97 @@
+'''
+@author:   Ken Venner
+@contact:  ken@venerllc.com
+@version:  1.01
+
+Unit tests for winebreaker - run with: python -m unittest t_winebreaker
+'''
+
+import unittest
+from unittest import mock
+
+import winebreaker
+
+
+# a clock we move by hand so the cooldown does not take real time
+class FakeClock:
+    def __init__( self ):
+        self.now = 1000.0
+
+    def __call__( self ):
+        return self.now
+
+
+class TestBreaker(unittest.TestCase):
+    def setUp( self ):
+        self.clock = FakeClock()
+        patcher = mock.patch( 'winebreaker.time.monotonic', self.clock )
+        patcher.start()
+        self.addCleanup( patcher.stop )
+        self.breaker = winebreaker.create_breaker( threshold=2, cooldown=300 )
+
+    # trip the breaker on store and let the cooldown run out
+    def trip( self, store ):
+        for _ in range( self.breaker['threshold'] ):
+            self.assertTrue( winebreaker.breaker_allow( self.breaker, store ) )
+            winebreaker.breaker_record( self.breaker, store, False, 10.0 )
+        self.assertEqual( self.breaker['stores'][store]['state'], 'open' )
+
+    def test_trip_and_skip( self ):
+        self.trip( 'bevmo' )
+        self.assertFalse( winebreaker.breaker_allow( self.breaker, 'bevmo' ) )
+        self.assertEqual( self.breaker['stores']['bevmo']['skipped'], 1 )
+
+    def test_probe_works( self ):
+        self.trip( 'bevmo' )
+        self.clock.now += 300
+        self.assertTrue( winebreaker.breaker_allow( self.breaker, 'bevmo' ) )
+        # only one probe at a time
+        self.assertFalse( winebreaker.breaker_allow( self.breaker, 'bevmo' ) )
+        winebreaker.breaker_record( self.breaker, 'bevmo', True, 1.0 )
+        self.assertEqual( self.breaker['stores']['bevmo']['state'], 'closed' )
+
+    def test_probe_fails( self ):
+        self.trip( 'bevmo' )
+        self.clock.now += 300
+        self.assertTrue( winebreaker.breaker_allow( self.breaker, 'bevmo' ) )
+        winebreaker.breaker_record( self.breaker, 'bevmo', False, 10.0 )
+        self.assertEqual( self.breaker['stores']['bevmo']['state'], 'open' )
+        self.assertEqual( self.breaker['stores']['bevmo']['trips'], 2 )
+        self.assertFalse( winebreaker.breaker_allow( self.breaker, 'bevmo' ) )
+
+    # open - half-open probe - parked - unparked - the next search is the probe
+    def test_probe_parked( self ):
+        self.trip( 'totalwine' )
+        self.clock.now += 300
+        self.assertTrue( winebreaker.breaker_allow( self.breaker, 'totalwine' ) )
+
+        # the probe is parked - no answer on the store
+        winebreaker.breaker_release( self.breaker, 'totalwine' )
+        self.assertEqual( self.breaker['stores']['totalwine']['state'], 'open' )
+
+        # unparked a while later (less than a cooldown) - the search goes through as the probe
+        self.clock.now += 180
+        self.assertTrue( winebreaker.breaker_allow( self.breaker, 'totalwine' ) )
+        self.assertFalse( winebreaker.breaker_allow( self.breaker, 'totalwine' ) )
+        winebreaker.breaker_record( self.breaker, 'totalwine', True, 1.0 )
+        self.assertEqual( self.breaker['stores']['totalwine']['state'], 'closed' )
+        self.assertTrue( winebreaker.breaker_allow( self.breaker, 'totalwine' ) )
+
+    def test_release_closed( self ):
+        self.assertTrue( winebreaker.breaker_allow( self.breaker, 'totalwine' ) )
+        winebreaker.breaker_release( self.breaker, 'totalwine' )
+        self.assertEqual( self.breaker['stores']['totalwine']['state'], 'closed' )
+
+    def test_stats( self ):
+        self.trip( 'bevmo' )
+        winebreaker.breaker_allow( self.breaker, 'bevmo' )
+        stats = winebreaker.log_breaker_stats( self.breaker )
+        self.assertEqual( stats['bevmo']['trips'], 1 )
+        self.assertEqual( stats['bevmo']['skipped'], 1 )
+        self.assertAlmostEqual( stats['bevmo']['saved'], 10.0 )
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+# eof
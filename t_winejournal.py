@@ -0,0 +1,97 @@
+'''
+@author:   Ken Venner
+@contact:  ken@venerllc.com
+@version:  1.01
+
+Unit tests for winejournal - run with: python -m unittest t_winejournal
+'''
+
+import csv
+import os
+import shutil
+import tempfile
+import unittest
+
+import winejournal
+
+# the run date the journal is opened for
+glb_rundate = '10/18/2026'
+
+
+class TestJournal(unittest.TestCase):
+    def setUp( self ):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup( shutil.rmtree, self.tmpdir )
+        self.filename = winejournal.journal_file( os.path.join(self.tmpdir, 'wineselenium.csv'), glb_rundate )
+
+    # open the journal - closed at the end of the test
+    def journal( self ):
+        journal = winejournal.open_journal( self.filename, glb_rundate )
+        self.addCleanup( winejournal.close_journal, journal )
+        return journal
+
+    def rows( self ):
+        with open( self.filename, 'r', newline='' ) as fp:
+            return list( csv.reader( fp ) )
+
+    def test_journal_file( self ):
+        self.assertEqual( os.path.basename(self.filename), 'wineselenium_journal_20261018.csv' )
+
+    def test_resume( self ):
+        journal = winejournal.open_journal( self.filename, glb_rundate )
+        winejournal.journal_record( journal, 'groth', 'bevmo', 3 )
+        winejournal.journal_record_wine( journal, 'opus one', { 'bevmo' : [ {}, {} ], 'winex' : [ {} ] } )
+        winejournal.close_journal( journal )
+
+        journal = self.journal()
+        self.assertEqual( journal['loaded'], 3 )
+        self.assertTrue( winejournal.journal_done( journal, 'groth', 'bevmo' ) )
+        self.assertEqual( winejournal.journal_stores_left( journal, 'groth', ['bevmo', 'winex'] ), ['winex'] )
+        self.assertEqual( winejournal.journal_wines_left( journal, ['groth', 'opus one', 'cakebread'], ['bevmo', 'winex'] ), ['groth', 'cakebread'] )
+
+    # a line cut short by a crash is skipped and the next entry starts on a line of its own
+    def test_torn_last_line( self ):
+        with open( self.filename, 'w', newline='' ) as fp:
+            fp.write( glb_rundate + ',groth,bevmo,3,08:00:00\n' )
+            fp.write( glb_rundate + ',opus one,bev' )
+
+        journal = winejournal.open_journal( self.filename, glb_rundate )
+        self.assertEqual( journal['loaded'], 1 )
+        self.assertFalse( winejournal.journal_done( journal, 'opus one', 'bevmo' ) )
+        winejournal.journal_record( journal, 'opus one', 'bevmo', 2 )
+        winejournal.close_journal( journal )
+
+        rows = self.rows()
+        self.assertEqual( rows[1], [ glb_rundate, 'opus one', 'bev' ] )
+        self.assertEqual( rows[2][:4], [ glb_rundate, 'opus one', 'bevmo', '2' ] )
+
+        journal = self.journal()
+        self.assertEqual( journal['loaded'], 2 )
+        self.assertTrue( winejournal.journal_done( journal, 'opus one', 'bevmo' ) )
+
+    # a store that returned no records (the page did not work) is searched again on resume
+    def test_zero_records_searched_again( self ):
+        journal = winejournal.open_journal( self.filename, glb_rundate )
+        winejournal.journal_record( journal, 'groth', 'bevmo', 0 )
+        winejournal.journal_record_wine( journal, 'opus one', { 'bevmo' : [], 'winex' : [ {} ] } )
+        self.assertFalse( winejournal.journal_done( journal, 'groth', 'bevmo' ) )
+        winejournal.close_journal( journal )
+
+        journal = self.journal()
+        self.assertEqual( journal['loaded'], 1 )
+        self.assertEqual( winejournal.journal_stores_left( journal, 'opus one', ['bevmo', 'winex'] ), ['bevmo'] )
+        self.assertEqual( winejournal.journal_wines_left( journal, ['groth', 'opus one'], ['bevmo', 'winex'] ), ['groth', 'opus one'] )
+
+    # entries from another run date are not loaded
+    def test_other_rundate( self ):
+        with open( self.filename, 'w', newline='' ) as fp:
+            fp.write( '10/17/2026,groth,bevmo,3,08:00:00\n' )
+        journal = self.journal()
+        self.assertEqual( journal['loaded'], 0 )
+        self.assertFalse( winejournal.journal_done( journal, 'groth', 'bevmo' ) )
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+# eof
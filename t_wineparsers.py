@@ -0,0 +1,75 @@
+'''
+@author:   Ken Venner
+@contact:  ken@venerllc.com
+@version:  1.01
+
+Offline test of the winerequest parser engines - the store pages recorded in t_fixtures
+(winehttp fixture format - see winebench) are replayed through the compiled parsers and
+the legacy parsers they replaced and the records must be the same (the legacy parsers run
+under the winebench time limit - the legacy nhliquor parser can loop forever) - run with:
+python -m unittest t_wineparsers
+
+To add a store page record it into t_fixtures:
+
+    python winerequest.py test=True srchstring_list=groth storelist=klwine fixture_dir=t_fixtures fixture_mode=record
+'''
+
+import os
+import unittest
+
+import winebench
+import winehttp
+import winerequest
+
+# the recorded store pages
+glb_fixture_dir = os.path.join( os.path.dirname( os.path.abspath(__file__) ), 't_fixtures' )
+
+# seconds the legacy parsers get on a page
+glb_legacy_timeout = 10
+
+
+class TestParserReplay(unittest.TestCase):
+    def setUp( self ):
+        self.store_args = winerequest.store_definitions()
+        self.replay = winehttp.create_fixture_store( glb_fixture_dir, 'replay' )
+        self.fixtures = winehttp.load_fixtures( glb_fixture_dir )
+
+    # the page content the parsers see - None for a page with no results
+    def content( self, fixture ):
+        return winebench.fixture_content( fixture, self.store_args, self.replay )
+
+    def test_engines_agree( self ):
+        pages = 0
+        for fixture in self.fixtures:
+            meta = fixture['meta']
+            with self.subTest( store=meta['store'], srchstring=meta['srchstring'], page=meta['page'] ):
+                content = self.content( fixture )
+                if content is None:
+                    continue
+                parsers = winebench.bench_parsers( meta['store'], self.store_args )
+                compiled = parsers['compiled']( content )
+                (legacy, regex_calls) = winebench.guarded_call( parsers['legacy'], content, timeout=glb_legacy_timeout )
+                self.assertEqual( compiled, legacy )
+                self.assertGreater( winebench.count_records( compiled ), 0 )
+                pages += 1
+        self.assertGreater( pages, 0 )
+
+    # the no results check is applied to the replayed page
+    def test_no_results( self ):
+        fixtures = [fixture for fixture in self.fixtures if fixture['meta']['srchstring'] == 'noresults']
+        self.assertTrue( fixtures )
+        for fixture in fixtures:
+            self.assertIsNone( self.content( fixture ) )
+
+    # a table whose header row has no columns - the legacy nhliquor parser never gets out of it
+    def test_legacy_nhliquor_loop( self ):
+        html = '<table class="x">\n<tr>\n</tr>\n'
+        with self.assertRaises( winebench.ParserTimeout ):
+            winebench.guarded_call( winerequest.nhliquor_main_parser_legacy, html, 'NHLiq', timeout=1 )
+        self.assertEqual( winebench.count_records( winerequest.nhliquor_main_parser( html, 'NHLiq' ) ), 0 )
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+# eof
@@ -0,0 +1,234 @@
+'''
+@author:   Ken Venner
+@contact:  ken@venerllc.com
+@version:  1.01
+
+Offline tests for wineselenium - the stores are fakes put in glb_store_browsers, no browser
+is started - run with: python -m unittest t_wineselenium
+'''
+
+import multiprocessing
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+import wineselenium
+import winebreaker
+import winejournal
+import winepark
+import winesupervisor
+import winethrottle
+
+# no printing from the searches
+wineselenium.pmsg = False
+
+
+# a clock we move by hand so the cooldown and the robot poll do not take real time
+class FakeClock:
+    def __init__( self ):
+        self.now = 1000.0
+
+    def __call__( self ):
+        return self.now
+
+
+# a driver that does nothing
+class FakeDriver:
+    def quit( self ):
+        pass
+
+
+# the record a fake store search returns for a wine
+def fake_record( store, srchstring ):
+    return { 'wine_store' : store, 'wine_name' : srchstring, 'wine_price' : '10.99', 'wine_year' : '' }
+
+
+# a store behind a robot check: open -> half-open probe -> parked -> unparked -> searched
+class TestParkedProbe(unittest.TestCase):
+    def setUp( self ):
+        self.clock = FakeClock()
+        patcher = mock.patch( 'time.monotonic', self.clock )
+        patcher.start()
+        self.addCleanup( patcher.stop )
+
+        # the check is up until robot is set False
+        self.robot = True
+        self.searched = []
+        def search( srchstring, driver, optiondict ):
+            self.searched.append( srchstring )
+            if self.robot:
+                raise winepark.StoreParked( 'fakepark', 'robot check' )
+            return [ fake_record( 'fakepark', srchstring ) ]
+
+        patcher = mock.patch.dict( wineselenium.glb_store_browsers, { 'fakepark' : {
+            'create' : lambda optiondict: FakeDriver(),
+            'search' : search,
+            'robot'  : lambda driver: self.robot,
+        } } )
+        patcher.start()
+        self.addCleanup( patcher.stop )
+
+        throttle = winethrottle.get_throttle()
+        patcher = mock.patch.dict( throttle, { 'enabled' : False } )
+        patcher.start()
+        self.addCleanup( patcher.stop )
+
+        self.breaker = winebreaker.create_breaker( threshold=1, cooldown=300 )
+        self.parking = winepark.create_parking( poll=180 )
+        self.supervisor = winesupervisor.create_supervisor( retries=0 )
+        self.drivers = { 'fakepark' : FakeDriver() }
+
+    def search( self, srchstring ):
+        return wineselenium.parked_store_search( self.parking, self.breaker, self.supervisor, self.drivers, 'fakepark', srchstring, {} )
+
+    def test_probe_parked_then_searched( self ):
+        # trip the breaker and let the cooldown run out
+        winebreaker.breaker_allow( self.breaker, 'fakepark' )
+        winebreaker.breaker_record( self.breaker, 'fakepark', False, 5.0 )
+        self.clock.now += 300
+
+        # the probe hits the robot check - the store is parked and the probe given back
+        self.assertEqual( self.search( 'groth' ), [] )
+        self.assertTrue( winepark.store_parked( self.parking, 'fakepark' ) )
+        self.assertEqual( self.breaker['stores']['fakepark']['state'], 'open' )
+
+        # still parked - the wine is queued, the store is not searched
+        self.assertEqual( self.search( 'opus one' ), [] )
+        self.assertEqual( self.searched, [ 'groth' ] )
+
+        # the check clears - the queued wines are searched, the first one is the probe
+        self.robot = False
+        self.clock.now += 180
+        searched = self.search( 'cakebread' )
+        self.assertEqual( [srchstring for srchstring, winelist in searched], [ 'groth', 'opus one', 'cakebread' ] )
+        self.assertTrue( all( winelist for srchstring, winelist in searched ) )
+        self.assertFalse( winepark.store_parked( self.parking, 'fakepark' ) )
+        self.assertEqual( self.breaker['stores']['fakepark']['state'], 'closed' )
+        self.assertEqual( self.breaker['stores']['fakepark']['skipped'], 0 )
+
+
+# log an event of a fake store - the stores run in worker processes so the events go to a file
+def log_event( eventfile, event ):
+    with open( eventfile, 'a' ) as fp:
+        fp.write( event + '\n' )
+
+
+# the events logged so far
+def read_events( eventfile ):
+    if not os.path.exists( eventfile ):
+        return []
+    with open( eventfile, 'r' ) as fp:
+        return fp.read().splitlines()
+
+
+# a fake glb_store_browsers entry
+#   create_ok - False: the driver is not created
+#   die_at - the wine the worker process dies on (no exception, no message)
+def fake_store( store, eventfile, create_ok=True, die_at=None ):
+    def create( optiondict ):
+        log_event( eventfile, 'create:' + store )
+        return FakeDriver() if create_ok else None
+
+    def search( srchstring, driver, optiondict ):
+        if srchstring == die_at:
+            os._exit( 1 )
+        log_event( eventfile, 'search:%s:%s' % (store, srchstring) )
+        return [ fake_record( store, srchstring ) ]
+
+    return { 'create' : create, 'search' : search }
+
+
+# the store browser pool (get_wines_from_stores_pool) with fake stores - the workers are forked
+# so they see the fake stores
+@unittest.skipUnless( multiprocessing.get_start_method() == 'fork', 'pool tests need fork' )
+class TestStorePool(unittest.TestCase):
+    def setUp( self ):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup( shutil.rmtree, self.tmpdir )
+        self.eventfile = os.path.join( self.tmpdir, 'events.txt' )
+        self.wines = [ 'w%d' % idx for idx in range(6) ]
+        self.saved = []
+
+    # put the fake stores in glb_store_browsers
+    def stores( self, **kwargs ):
+        fakes = { store : fake_store( store, self.eventfile, **kwargs.get(store, {}) ) for store in ('s1', 's2', 's3') }
+        patcher = mock.patch.dict( wineselenium.glb_store_browsers, fakes )
+        patcher.start()
+        self.addCleanup( patcher.stop )
+        return list(fakes)
+
+    # run the pool - the saves are recorded (wine, stores in the records, searches done by then)
+    def run_pool( self, stores, max_browsers, journal=None, ahead=2 ):
+        def save( file, srchstring, winelist, debug=False, writer=None, done=None ):
+            searches = len([event for event in read_events( self.eventfile ) if event.startswith('search:')])
+            self.saved.append( (srchstring, [rec['wine_store'] for rec in winelist], searches) )
+            if done:
+                done()
+
+        with mock.patch.object( wineselenium, 'save_wines_to_file', save ):
+            return wineselenium.get_wines_from_stores_pool( self.wines, stores, { 'throttle' : False, 'pool_ahead' : ahead }, os.path.join(self.tmpdir, 'pool.csv'), max_browsers, journal=journal )
+
+    # the stores that searched a wine
+    def searched( self, srchstring ):
+        return sorted( event.split(':')[1] for event in read_events( self.eventfile ) if event.startswith('search:') and event.endswith(':' + srchstring) )
+
+    def test_one_slot_stores_take_turns( self ):
+        stores = self.stores()
+        found = self.run_pool( stores, 1 )
+
+        self.assertEqual( len(found), len(self.wines) * len(stores) )
+        self.assertEqual( [srchstring for srchstring, found_stores, searches in self.saved], self.wines )
+        for srchstring, found_stores, searches in self.saved:
+            self.assertEqual( found_stores, stores )
+            self.assertEqual( self.searched( srchstring ), stores )
+
+        # the slot moved between the stores more than once - and wines were saved before the last search
+        creates = [event for event in read_events( self.eventfile ) if event.startswith('create:')]
+        self.assertGreater( len(creates), len(stores) )
+        self.assertLess( self.saved[0][2], len(self.wines) * len(stores) )
+
+    def test_driver_not_created( self ):
+        stores = self.stores( s2={ 'create_ok' : False } )
+        self.run_pool( stores, 2 )
+
+        self.assertEqual( [srchstring for srchstring, found_stores, searches in self.saved], self.wines )
+        for srchstring, found_stores, searches in self.saved:
+            self.assertEqual( found_stores, [ 's1', 's3' ] )
+            self.assertEqual( self.searched( srchstring ), [ 's1', 's3' ] )
+
+    def test_worker_dies( self ):
+        stores = self.stores( s2={ 'die_at' : 'w2' } )
+        self.run_pool( stores, 2 )
+
+        # the store is dropped at the wine it died on - the other stores finish the run
+        self.assertEqual( [srchstring for srchstring, found_stores, searches in self.saved], self.wines )
+        for srchstring, found_stores, searches in self.saved:
+            if srchstring in ( 'w0', 'w1' ):
+                self.assertEqual( found_stores, stores )
+            else:
+                self.assertEqual( found_stores, [ 's1', 's3' ] )
+
+    def test_journal_done( self ):
+        stores = self.stores()
+        journal = winejournal.open_journal( os.path.join(self.tmpdir, 'pool_journal.csv'), '10/18/2026' )
+        self.addCleanup( winejournal.close_journal, journal )
+        for srchstring in self.wines:
+            winejournal.journal_record( journal, srchstring, 's3', 1 )
+        winejournal.journal_record( journal, 'w0', 's1', 1 )
+
+        self.run_pool( stores, 2, journal=journal )
+
+        # s3 was never started, s1 did not search w0 again
+        self.assertNotIn( 'create:s3', read_events( self.eventfile ) )
+        self.assertEqual( self.searched( 'w0' ), [ 's2' ] )
+        self.assertEqual( [srchstring for srchstring, found_stores, searches in self.saved], self.wines )
+        for srchstring in self.wines:
+            self.assertEqual( winejournal.journal_stores_left( journal, srchstring, stores ), [] )
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+# eof
@@ -0,0 +1,67 @@
+'''
+@author:   Ken Venner
+@contact:  ken@venerllc.com
+@version:  1.01
+
+Table test of the vintage rules through both callers - winevintage.find_vintage (the
+wine_year winerequest puts on a record) and wineset.findVintage (2 digit) - run with:
+python -m unittest t_winevintage
+'''
+
+import unittest
+
+import winevintage
+import wineset
+
+
+# wine name, find_vintage, wineset.findVintage
+glb_vintage_table = (
+    ('Groth Cabernet Sauvignon 2016',               '2016', '16'),
+    ('2014 Caymus Cabernet Sauvignon',              '2014', '14'),
+    ('Silver Oak Cabernet 2012 2013',               '2013', '13'),
+    ('Silver Oak 2012 2013 Cabernet',               '2013', '13'),
+    ('Jordan Cabernet Sauvignon 2015 750ml',        '2015', '15'),
+    ('Foley Pinot Noir 2016/750ml',                 '2016', '16'),
+    ('Hewitt Cabernet XX2015 750ml',                '2015', '15'),
+    ('Dom Perignon Brut 1999',                      '1999', '99'),
+    ("Cakebread Chardonnay '15",                    '15',   '15'),
+    ("Cakebread Chardonnay '15 750ml",              '15',   '15'),
+    ('Attune Cabernet 16 750ml',                    '16',   '16'),
+    ('Stags Leap Cabernet Sauvignon 16',            '16',   '16'),
+    # a bottle size is not a vintage
+    ('Opus One 2015 1500ml',                        '2015', '15'),
+    ('Opus One 2015 1500 ML',                       '2015', '15'),
+    ('Caymus Special Selection 2014 3000ml',        '2014', '14'),
+    ('Groth Reserve 1500ml 2016',                   '2016', '16'),
+    ('Opus One 1500 ml',                            None,   None),
+    ('Silver Oak Alexander Valley 1500ml',          None,   None),
+    # no vintage
+    ('Veuve Clicquot Brut NV',                      None,   None),
+    ('Cakebread Chardonnay 12X750ML',               None,   None),
+    ('Caymus Cabernet Sauvignon 1.5L',              None,   None),
+)
+
+
+class TestVintage(unittest.TestCase):
+    def test_find_vintage( self ):
+        for winename, vintage, vintage_yy in glb_vintage_table:
+            with self.subTest( winename=winename ):
+                self.assertEqual( winevintage.find_vintage( winename ), vintage )
+
+    def test_wineset_find_vintage( self ):
+        for winename, vintage, vintage_yy in glb_vintage_table:
+            with self.subTest( winename=winename ):
+                self.assertEqual( wineset.findVintage( { 'wine' : winename }, 'wine' ), vintage_yy )
+
+    # the memo gives back what the rules give
+    def test_memo( self ):
+        winevintage.find_vintage.cache_clear()
+        for winename, vintage, vintage_yy in glb_vintage_table * 2:
+            self.assertEqual( winevintage.find_vintage( winename ), winevintage.find_vintage.__wrapped__( winename ) )
+        self.assertEqual( winevintage.find_vintage.cache_info().hits, len(glb_vintage_table) )
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+# eof
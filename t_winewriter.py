@@ -0,0 +1,133 @@
+'''
+@author:   Ken Venner
+@contact:  ken@venerllc.com
+@version:  1.01
+
+Unit tests for winewriter - run with: python -m unittest t_winewriter
+'''
+
+import functools
+import os
+import shutil
+import tempfile
+import threading
+import time
+import unittest
+
+import winejournal
+import winewriter
+
+
+class TestWriter(unittest.TestCase):
+    def setUp( self ):
+        self.tmpdir = tempfile.mkdtemp()
+        self.addCleanup( shutil.rmtree, self.tmpdir )
+        self.filename = os.path.join( self.tmpdir, 'wines.csv' )
+
+    # create a writer that is closed at the end of the test
+    def writer( self, **kwargs ):
+        writer = winewriter.create_writer( self.filename, **kwargs )
+        self.addCleanup( winewriter.close_writer, writer )
+        return writer
+
+    # the lines on disk - read through a file of our own so only flushed rows are seen
+    def lines( self ):
+        with open( self.filename, 'r', newline='' ) as fp:
+            return fp.read().splitlines()
+
+    # a done function that sets an event and keeps the lines on disk when it was called
+    def done( self ):
+        event = threading.Event()
+        def done():
+            event.lines = self.lines()
+            event.set()
+        return ( event, done )
+
+    def test_flush_on_rows( self ):
+        writer = self.writer( flush_rows=3, flush_seconds=60 )
+        (event, done) = self.done()
+        winewriter.writer_put( writer, [ ['groth', 'bevmo', '54.99'], ['groth', 'winex', '52.99'] ], done )
+        time.sleep( 0.2 )
+        self.assertFalse( event.is_set() )
+        self.assertEqual( self.lines(), [] )
+
+        winewriter.writer_put( writer, [ ['groth', 'klwine', '49.99'] ] )
+        self.assertTrue( event.wait( 5 ) )
+        self.assertEqual( len(event.lines), 3 )
+        self.assertEqual( writer['flushes'], 1 )
+
+    def test_flush_on_time( self ):
+        writer = self.writer( flush_rows=100, flush_seconds=0.2 )
+        (event, done) = self.done()
+        start = time.monotonic()
+        winewriter.writer_put( writer, [ ['groth', 'bevmo', '54.99'] ], done )
+        self.assertTrue( event.wait( 5 ) )
+        self.assertGreaterEqual( time.monotonic() - start, 0.15 )
+        self.assertEqual( event.lines, [ 'groth,bevmo,54.99' ] )
+
+    def test_flush_on_checkpoint( self ):
+        writer = self.writer( flush_rows=100, flush_seconds=60 )
+        (event, done) = self.done()
+        winewriter.writer_put( writer, [ ['groth', 'bevmo', '54.99'] ], done )
+        winewriter.writer_checkpoint( writer )
+        self.assertTrue( event.is_set() )
+        self.assertEqual( self.lines(), [ 'groth,bevmo,54.99' ] )
+
+    def test_flush_on_close( self ):
+        writer = winewriter.create_writer( self.filename, flush_rows=100, flush_seconds=60 )
+        winewriter.writer_put( writer, [ ['groth', 'bevmo', '54.99'], ['opus one', 'bevmo', '399.99'] ] )
+        winewriter.close_writer( writer )
+        self.assertEqual( self.lines(), [ 'groth,bevmo,54.99', 'opus one,bevmo,399.99' ] )
+        with self.assertRaises( ValueError ):
+            winewriter.writer_put( writer, [ ['groth', 'winex', '52.99'] ] )
+
+    # the done functions only run once their rows are flushed to the file
+    def test_done_after_flush( self ):
+        writer = self.writer( flush_rows=2, flush_seconds=60 )
+        events = []
+        for idx in range(4):
+            (event, done) = self.done()
+            events.append( event )
+            winewriter.writer_put( writer, [ ['wine%d' % idx, 'bevmo', '10.99'] ], done )
+        winewriter.writer_checkpoint( writer )
+        for idx, event in enumerate(events):
+            self.assertTrue( event.is_set() )
+            self.assertIn( 'wine%d,bevmo,10.99' % idx, event.lines )
+
+    # rows that can not be written drop their done function - the rows after them are written
+    def test_write_error_drops_done( self ):
+        writer = self.writer( flush_rows=100, flush_seconds=60 )
+        (bad_event, bad_done) = self.done()
+        (event, done) = self.done()
+        winewriter.writer_put( writer, [ 5 ], bad_done )
+        winewriter.writer_put( writer, [ ['groth', 'bevmo', '54.99'] ], done )
+        winewriter.writer_checkpoint( writer )
+        self.assertFalse( bad_event.is_set() )
+        self.assertTrue( event.is_set() )
+        self.assertEqual( writer['rows'], 1 )
+
+    # the journal only has a search once its wines are in the output file
+    def test_journal_after_flush( self ):
+        journal = winejournal.open_journal( os.path.join(self.tmpdir, 'wines_journal.csv'), '10/18/2026' )
+        self.addCleanup( winejournal.close_journal, journal )
+        writer = self.writer( flush_rows=100, flush_seconds=60 )
+
+        lines = []
+        def record( wine, store_wines ):
+            lines.extend( self.lines() )
+            winejournal.journal_record_wine( journal, wine, store_wines )
+
+        store_wines = { 'bevmo' : [ {'wine_name' : 'Groth Cabernet'} ], 'winex' : [ {'wine_name' : 'Groth Cabernet'} ] }
+        winewriter.writer_put( writer, [ ['groth', 'bevmo', '54.99'], ['groth', 'winex', '52.99'] ], functools.partial( record, 'groth', store_wines ) )
+        time.sleep( 0.2 )
+        self.assertEqual( winejournal.journal_stores_left( journal, 'groth', ['bevmo', 'winex'] ), ['bevmo', 'winex'] )
+
+        winewriter.writer_checkpoint( writer )
+        self.assertEqual( lines, [ 'groth,bevmo,54.99', 'groth,winex,52.99' ] )
+        self.assertEqual( winejournal.journal_stores_left( journal, 'groth', ['bevmo', 'winex'] ), [] )
+
+
+if __name__ == '__main__':
+    unittest.main()
+
+# eof
@@ -1,7 +1,7 @@
 '''
 @author:   Ken Venner
 @contact:  ken@venerllc.com
-@version:  1.30
+@version:  1.32
 
 Tool used to create an email watcher and process inbound emails
 and return back a list of wines that match the subject
@@ -17,7 +17,10 @@ import sys
 import re
 
 import wineutil
+import wineselenium
+import winestores
 
+import atexit
 import time
 
 # Logging Setup
@@ -42,7 +45,7 @@ sys.excepthook = handle_exception
 # application variables
 optiondictconfig = {
     'AppVersion' : {
-        'value' : '1.30',
+        'value' : '1.32',
         'description' : 'defines the version number for the app',
     },
     'debug' : {
@@ -88,6 +91,11 @@ optiondictconfig = {
         'required' : True,
         'description' : 'defines the gmail password for username that we are sending emails from',
     },
+    'pool_max_searches' : {
+        'value' : 25,
+        'type'  : 'int',
+        'description' : 'defines the number of searches a store browser does before it is replaced with a new one',
+    },
     'conf_json' : {
         'value' : 'gmail-wines.json',
         'description' : 'defines the configuraton file that houses email_user and email_password values',
@@ -125,6 +133,8 @@ mailerrors = [
 #    i) send out email that was created
 #    j) if all above worked - move processed file to 'Processed'
 #
+# the store browsers are started once and kept warm across the emails (wineselenium driver pool)
+#
 def gmail_poll_by_function(base_email_settings, winesel_storelist, wine2_storelist, sleepseconds, debug=False):
     # debug
     if debug: print('init-gmailrcv')
@@ -132,6 +142,10 @@ def gmail_poll_by_function(base_email_settings, winesel_storelist, wine2_storeli
     # create the IMAP object
     mail = kvgmailrcv.init( base_email_settings )
 
+    # start the store browsers now - reused for each email - closed when we exit
+    driver_pool = wineselenium.create_driver_pool( winesel_storelist, optiondict, optiondict['pool_max_searches'] )
+    atexit.register( wineselenium.close_driver_pool, driver_pool )
+
     # this should be a do while True statement but we are testing
     #for i in range(30):
     while True:
@@ -217,7 +231,7 @@ def gmail_poll_by_function(base_email_settings, winesel_storelist, wine2_storeli
                         m.addRecipients(mparse.cc_email, 'cc')
                     m.setSubject('WineLookup:' + mparse.subject)
                     # get the message body by doing the message lookup
-                    m.setHtmlBody(wineutil.html_body_from_email_subject(mparse.subject, winesel_storelist, winereq_storelist, debug=debug))
+                    m.setHtmlBody(wineutil.html_body_from_email_subject(mparse.subject, winesel_storelist, winereq_storelist, debug=debug, driver_pool=driver_pool))
                     m.send()
                     logger.info('response emailed')
             except Exception as e:
@@ -250,29 +264,9 @@ if __name__ == '__main__':
         'imap_debug'  : optiondict['imap_debug'],
     }
 
-    # (wineselenium) selenium stores
-    winesel_storelist = [
-        'bevmo',
-        'hitime',
-        'pavillions',
-#        'totalwine',
-        'wineclub',
-        'wally',
-        'winex',
-        'ralphs',
-    ]
-
-    # (winerequest) request stores
-    winereq_storelist = [
-        'hiddenvine',
-        'napacab',
-        'lawineco',
-        'wineconn',
-        'johnpete',
-        'klwine',
-        'nhliquor',
-        'rolf',
-    ]
+    # (wineselenium) selenium stores and (winerequest) request stores (see winestores)
+    winesel_storelist = winestores.store_list( 'wine_email', 'selenium' )
+    winereq_storelist = winestores.store_list( 'wine_email', 'request' )
 
     # debugging
     if optiondict['debug']:  print('base_email_settings:', base_email_settings)
@@ -0,0 +1,210 @@
+'''
+@author:   Ken Venner
+@contact:  ken@venerllc.com
+@version:  1.01
+
+Library used by wineselenium to save the page (html and screen shot) a store search
+failed on without holding up the search
+
+The search thread only grabs the page source and the screen shot from the browser and
+hands them to the artifact writer - a background thread that:
+
+    - skips a page it already saved (same html by sha1) this run
+    - gzips the html (failSTORE-YYYYMMDD-HHMMSS-NNN.html.gz)
+    - stops saving once the fail* files in the directory reach max_bytes (the directory is
+      measured again before each page so the worker processes share the cap)
+
+and each store gets at most per_store artifacts every window seconds (artifact_allowed is
+checked before we ask the browser for anything) so a store that keeps failing does not
+fill the disk.
+
+The writer is flushed at exit - a worker process (which does not run atexit) closes it
+with close_artifact_writer when it is done.
+'''
+
+import atexit
+import datetime
+import glob
+import gzip
+import hashlib
+import os
+import queue
+import threading
+import time
+
+# logging
+import logging
+
+logger = logging.getLogger(__name__)
+
+# version number
+AppVersion = '1.01'
+
+# defaults for the writer shared by the process
+glb_artifact_defaults = {
+    'directory' : '.',
+    'max_bytes' : 200 * 1024 * 1024,
+    'per_store' : 3,
+    'window'    : 600,
+}
+
+# artifact writer shared by the process - see get_artifact_writer
+glb_artifact_writer = None
+glb_artifact_lock = threading.Lock()
+
+
+# create an artifact writer and start its thread
+#   directory - where the fail* files go
+#   max_bytes - max bytes of fail* files in directory (the ones there when we start count and
+#               the ones other processes write)
+#   per_store - artifacts a store can save every window seconds
+#
+# returns the dict passed to artifact_allowed/save_artifact/close_artifact_writer
+def create_artifact_writer( directory='.', max_bytes=200*1024*1024, per_store=3, window=600 ):
+    writer = {
+        'directory' : directory,
+        'max_bytes' : max_bytes,
+        'per_store' : per_store,
+        'window'    : window,
+        'used'      : _artifact_bytes( directory ),
+        'saved'     : {},
+        'hashes'    : set(),
+        'counts'    : {'saved' : 0, 'rate_limited' : 0, 'duplicate' : 0, 'over_cap' : 0, 'bytes' : 0},
+        'seq'       : 0,
+        'queue'     : queue.Queue(),
+        'closed'    : False,
+        'lock'      : threading.Lock(),
+        'pid'       : os.getpid(),
+    }
+    writer['thread'] = threading.Thread( target=_artifact_thread, args=(writer,), name='wineartifact', daemon=True )
+    writer['thread'].start()
+    logger.info('artifacts:%s:bytes used:%d:max_bytes:%d:per_store:%d:window:%d', directory, writer['used'], max_bytes, per_store, window)
+    return writer
+
+
+# the artifact writer shared by the process - created on first use (and closed at exit) - a forked
+# process gets its own (the thread of the parent's writer does not run in the child)
+def get_artifact_writer():
+    global glb_artifact_writer
+    with glb_artifact_lock:
+        if glb_artifact_writer is None or glb_artifact_writer['pid'] != os.getpid():
+            glb_artifact_writer = create_artifact_writer( **glb_artifact_defaults )
+            atexit.register( close_artifact_writer, glb_artifact_writer )
+        return glb_artifact_writer
+
+
+# can this store save an artifact now - counts it against the store when it can
+def artifact_allowed( writer, store ):
+    now = time.monotonic()
+    with writer['lock']:
+        saved = [when for when in writer['saved'].get( store, [] ) if now - when < writer['window']]
+        if len(saved) >= writer['per_store']:
+            writer['saved'][store] = saved
+            writer['counts']['rate_limited'] += 1
+            return False
+        saved.append( now )
+        writer['saved'][store] = saved
+        return True
+
+
+# hand the page to the writer thread - returns right away
+#   html - page source (str)
+#   png - screen shot (bytes) or None
+def save_artifact( writer, store, function, html, png=None ):
+    if writer['closed']:
+        logger.warning('%s:artifact writer closed - page not saved:%s', function, store)
+        return
+    writer['queue'].put( (store, function, html, png) )
+
+
+# write what is queued and stop the writer thread
+def close_artifact_writer( writer ):
+    if writer['closed']:
+        return
+    writer['closed'] = True
+    writer['queue'].put( None )
+    writer['thread'].join()
+    log_artifact_stats( writer )
+
+
+# log (and return) the artifact counts
+def log_artifact_stats( writer ):
+    with writer['lock']:
+        stats = dict( writer['counts'], used=writer['used'] )
+    logger.info('artifacts:saved:%d:bytes:%d:duplicate:%d:rate limited:%d:over cap:%d:bytes used:%d',
+                stats['saved'], stats['bytes'], stats['duplicate'], stats['rate_limited'], stats['over_cap'], stats['used'])
+    return stats
+
+
+# writer thread
+def _artifact_thread( writer ):
+    while True:
+        item = writer['queue'].get()
+        if item is None:
+            return
+        try:
+            _write_artifact( writer, *item )
+        except Exception as e:
+            logger.error('%s:%s:artifact not saved:%s', item[1], item[0], str(e))
+
+
+# dedup, compress, check the cap and write the files of one page
+def _write_artifact( writer, store, function, html, png ):
+    content = html.encode('utf-8')
+    digest = hashlib.sha1( content ).hexdigest()
+    if digest in writer['hashes']:
+        with writer['lock']:
+            writer['counts']['duplicate'] += 1
+        logger.info('%s:page already saved - not saved again:%s', function, store)
+        return
+
+    htmlgz = gzip.compress( content )
+    size = len(htmlgz) + (len(png) if png else 0)
+    used = _artifact_bytes( writer['directory'] )
+    with writer['lock']:
+        writer['used'] = used
+    if used + size > writer['max_bytes']:
+        with writer['lock']:
+            writer['counts']['over_cap'] += 1
+        logger.warning('%s:artifact disk cap reached - page not saved:%s:bytes used:%d', function, store, used)
+        return
+
+    basename = _artifact_basename( writer, store )
+    _write_file( basename + '.html.gz', htmlgz )
+    logger.info('%s:saved html page content to:%s', function, basename + '.html.gz')
+    if png:
+        _write_file( basename + '.png', png )
+        logger.info('%s:saved page screen shot to:%s', function, basename + '.png')
+
+    writer['hashes'].add( digest )
+    with writer['lock']:
+        writer['used'] += size
+        writer['counts']['saved'] += 1
+        writer['counts']['bytes'] += size
+
+
+# bytes of the fail* files in the directory
+def _artifact_bytes( directory ):
+    used = 0
+    for filename in glob.glob( os.path.join( directory, 'fail*' ) ):
+        try:
+            if os.path.isfile( filename ):
+                used += os.path.getsize( filename )
+        except OSError:
+            # removed while we looked
+            pass
+    return used
+
+
+# the file name (no extension) of the next artifact of this store - unique within the process
+def _artifact_basename( writer, store ):
+    writer['seq'] += 1
+    return os.path.join( writer['directory'], 'fail%s-%s-%03d' % (store, datetime.datetime.now().strftime('%Y%m%d-%H%M%S'), writer['seq']) )
+
+
+# write a file that must not exist yet
+def _write_file( filename, data ):
+    with open( filename, 'xb' ) as fp:
+        fp.write( data )
+
+# eof
@@ -0,0 +1,446 @@
+'''
+@author:   Ken Venner
+@contact:  ken@venerllc.com
+@version:  1.04
+
+Benchmark the winerequest parsers against recorded store pages
+
+Record the fixtures by running winerequest in record mode, e.g.:
+
+    python winerequest.py test=True srchstring_list=groth,cakebread fixture_dir=fixtures fixture_mode=record
+
+then time the splitter and parser for each store over those pages (no network is used):
+
+    python winebench.py fixture_dir=fixtures benchfile=winebench.json
+
+the JSON written to benchfile can be passed back in as compare= on a later run to see
+the change between commits
+
+bench=vintage times the vintage extraction (winevintage) against the rules it replaced
+over a corpus of wine names (vintage_names - a file of names or a wine csv, otherwise a
+generated corpus of vintage_count names) - and checks the results: the memo must give
+what the rules give, and the names where the shared rules differ from the old rules are listed:
+
+    python winebench.py bench=vintage vintage_names=wineselenium.csv
+
+'''
+
+import kvutil
+
+import winerequest
+import winehttp
+import winevintage
+
+import csv
+import datetime
+import json
+import random
+import re
+import sys
+import time
+
+# logging -
+import kvlogger
+config=kvlogger.get_config(kvutil.filename_log_day_of_month(__file__, ext_override='log'), 'logging.FileHandler')
+kvlogger.dictConfig(config)
+logger=kvlogger.getLogger(__name__)
+
+# added logging feature to capture and log unhandled exceptions
+def handle_exception(exc_type, exc_value, exc_traceback):
+    if issubclass(exc_type, KeyboardInterrupt):
+        sys.__excepthook__(exc_type, exc_value, exc_traceback)
+        return
+
+    logger.error("Uncaught exception", exc_info=(exc_type, exc_value, exc_traceback))
+
+sys.excepthook = handle_exception
+
+
+# application variables
+optiondictconfig = {
+    'AppVersion' : {
+        'value' : '1.04',
+        'description' : 'defines the version number for the app',
+    },
+    'debug' : {
+        'value' : False,
+        'type'  : 'bool',
+        'description' : 'defines if we are running in debug mode',
+    },
+    'bench' : {
+        'value' : 'parser',
+        'type'  : 'inlist',
+        'valid' : ['parser', 'vintage'],
+        'description' : 'defines what we benchmark - the store parsers or the vintage extraction',
+    },
+    'fixture_dir' : {
+        'value' : 'fixtures',
+        'description' : 'defines the directory the store pages were recorded into',
+    },
+    'storelist' : {
+        'value' : None,
+        'type'  : 'liststr',
+        'description' : 'defines the list of stores to benchmark (default all stores recorded)',
+    },
+    'engine' : {
+        'value' : 'both',
+        'type'  : 'inlist',
+        'valid' : ['compiled', 'legacy', 'both'],
+        'description' : 'defines the parser engine(s) we time',
+    },
+    'loops' : {
+        'value' : 5,
+        'type'  : 'int',
+        'description' : 'defines the number of times each page is parsed when timing',
+    },
+    'parser_timeout' : {
+        'value' : 10,
+        'type'  : 'int',
+        'description' : 'defines the seconds a parser can take on a page before the page is counted as an error and not timed (0 - no limit)',
+    },
+    'benchfile' : {
+        'value' : 'winebench.json',
+        'description' : 'defines the name of the JSON results file created',
+    },
+    'compare' : {
+        'value' : None,
+        'description' : 'defines the name of an earlier benchfile to compare these results to',
+    },
+    'vintage_names' : {
+        'value' : None,
+        'description' : 'defines the file of wine names (one per line or a wine csv) used for bench=vintage',
+    },
+    'vintage_count' : {
+        'value' : 100000,
+        'type'  : 'int',
+        'description' : 'defines the number of wine names in the bench=vintage corpus',
+    },
+    'log_level' : {
+        'value' : 'INFO',
+        'type'  : 'inlist',
+        'valid' : ['DEBUG', 'INFO', 'WARNING', 'ERROR', 'CRITICAL'],
+        'description' : 'defines the logging level while we time the parsers',
+    },
+}
+
+
+# the parsers we can time for a store - dict of engine to function(content) that returns the records
+def bench_parsers( store, store_args ):
+    if store == 'nhliquor':
+        return {
+            'compiled' : lambda content: winerequest.nhliquor_main_parser( content, 'NHLiq' ),
+            'legacy'   : lambda content: winerequest.nhliquor_main_parser_legacy( content, 'NHLiq' ),
+        }
+
+    splitter_args = store_args[store]['splitter_args']
+    parser_args   = store_args[store]['parser_args']
+    return {
+        'compiled' : lambda content: winerequest.generic_wine_parser( winerequest.generic_wine_splitter( content, **splitter_args ), **parser_args ),
+        'legacy'   : lambda content: winerequest.generic_wine_parser_legacy( winerequest.generic_wine_splitter( content, **splitter_args ), **parser_args ),
+    }
+
+
+# get the page content the parser would see for a fixture - None when the page had no results
+def fixture_content( fixture, store_args, replay ):
+    meta = fixture['meta']
+
+    # nhliquor - decoded straight from the page
+    if meta['store'] == 'nhliquor':
+        return fixture['content'].decode('ascii', 'ignore')
+
+    # generic stores - run it through the content searcher so we apply re_noresults the same way
+    return winerequest.generic_wine_content_searcher( meta['srchstring'], **store_args[meta['store']]['search_args'], store=meta['store'], cache=replay )
+
+
+# count the records - the no wine found record does not count
+def count_records( records ):
+    if len(records)==1 and records[0]['wine_name'] == 'Sorry no matches were found':
+        return 0
+    return len(records)
+
+
+# raised when a parser runs past its time limit - the legacy nhliquor parser can loop forever
+class ParserTimeout(Exception):
+    pass
+
+
+# run a parser counting the number of regex calls (compiled pattern method calls) it makes
+#   timeout - seconds the parser can run before ParserTimeout is raised (0 - no limit)
+#
+# returns (what the parser returned, regex calls)
+def guarded_call( func, *args, timeout=0 ):
+    calls = [0]
+    deadline = time.perf_counter() + timeout
+
+    def profiler( frame, event, arg ):
+        if event == 'c_call' and isinstance( getattr(arg, '__self__', None), re.Pattern ):
+            calls[0] += 1
+        if timeout and event in ('call', 'c_call') and time.perf_counter() > deadline:
+            raise ParserTimeout('parser ran past %d seconds' % timeout)
+
+    sys.setprofile( profiler )
+    try:
+        result = func( *args )
+    finally:
+        sys.setprofile( None )
+
+    return ( result, calls[0] )
+
+
+# time the parsers against the fixtures
+#   engines - list of engines to time ('compiled', 'legacy')
+#   timeout - seconds a parser can take on a page - a page it does not finish is an error and is not timed
+#
+# returns the results dict that is written to the benchfile
+def bench_fixtures( fixture_dir, storelist=None, engines=('compiled', 'legacy'), loops=5, timeout=10, debug=False ):
+    store_args = winerequest.store_definitions()
+    replay = winehttp.create_fixture_store( fixture_dir, 'replay' )
+
+    # group the page content by store
+    pages = {}
+    for fixture in winehttp.load_fixtures( fixture_dir, storelist ):
+        store = fixture['meta']['store']
+        if store not in store_args:
+            logger.warning('fixture for unknown store skipped:%s', store)
+            continue
+        content = fixture_content( fixture, store_args, replay )
+        pages.setdefault( store, [] )
+        if content:
+            pages[store].append( content )
+
+    results = {}
+    for store in sorted(pages):
+        parsers = bench_parsers( store, store_args )
+        results[store] = {}
+        found = {}
+        for engine in engines:
+            if engine not in parsers:
+                continue
+
+            # parse once to get the records (and see if it fails or does not finish)
+            records = 0
+            errors  = 0
+            regex_calls = 0
+            timed = []
+            found[engine] = []
+            for content in pages[store]:
+                try:
+                    (page_records, page_calls) = guarded_call( parsers[engine], content, timeout=timeout )
+                    regex_calls += page_calls
+                    timed.append( content )
+                except ParserTimeout as e:
+                    logger.warning('%s:%s:parser did not finish - page not timed:%s', store, engine, str(e))
+                    page_records = []
+                    errors += 1
+                except Exception as e:
+                    logger.warning('%s:%s:parser failed:%s', store, engine, str(e))
+                    page_records = []
+                    errors += 1
+                    timed.append( content )
+                found[engine].append( page_records )
+                records += count_records( page_records )
+
+            # now time it - on the pages the parser finished
+            start = time.perf_counter()
+            for loop in range(loops):
+                for content in timed:
+                    try:
+                        parsers[engine]( content )
+                    except Exception:
+                        pass
+            seconds = (time.perf_counter() - start) / loops
+
+            results[store][engine] = {
+                'pages'           : len(pages[store]),
+                'pages_timed'     : len(timed),
+                'records'         : records,
+                'errors'          : errors,
+                'seconds'         : seconds,
+                'pages_per_sec'   : len(timed) / seconds if seconds else 0,
+                'records_per_sec' : records / seconds if seconds else 0,
+                'regex_calls'     : regex_calls,
+            }
+            logger.info('%s:%s:%s', store, engine, results[store][engine])
+
+        # do the engines agree
+        if 'compiled' in found and 'legacy' in found:
+            same = [a == b for (a, b) in zip(found['compiled'], found['legacy'])]
+            results[store]['records_match'] = all(same)
+            if not all(same):
+                logger.warning('%s:compiled and legacy parsers disagree on pages:%s', store, [idx for idx, ok in enumerate(same) if not ok])
+
+    return results
+
+
+# the vintage rules used by winerequest before winevintage - compiled on every call
+def legacy_extract_year_from_name( winename ):
+    re_dates = [
+        re.compile('\s(\d\d\d\d)\s'),
+        re.compile('(\d\d\d\d)\s'),
+        re.compile('\s(\d\d\d\d)'),
+        re.compile('\s\'(\d\d)\s'),
+        re.compile('\s(\d\d)\s')
+    ]
+    for date_match in re_dates:
+        found = date_match.search( winename )
+        if found:
+            return found.group(1)
+    return None
+
+
+# the vintage rules used by wineset.findVintage before winevintage - seven searches
+legacy_vintage_lookup = (
+    re.compile('\d\d\d\d\s+\d\d(\d\d)'),
+    re.compile('^\d\d(\d\d)'),
+    re.compile('\s\d\d(\d\d)$'),
+    re.compile('\s\d\d(\d\d)\s'),
+    re.compile('XX\d\d(\d\d)\s'),
+    re.compile('\s\d\d(\d\d)\/'),
+    re.compile('\s\'?(\d\d)\'?$|\s\'?(\d\d)\'?\s'),
+)
+def legacy_find_vintage( winename ):
+    for reVintage in legacy_vintage_lookup:
+        m = reVintage.search( winename )
+        if m:
+            return m.group(1) if m.group(1) else m.group(2)
+    return None
+
+
+# build the corpus of wine names for bench=vintage
+#   namefile - (opt) file of names - a csv with more than 3 columns is taken to be a wine
+#              output file (name in the 4th column), otherwise the first column is the name
+#   count - number of names in the corpus - names are drawn (with repeats) from the file or generated
+def vintage_corpus( namefile=None, count=100000, seed=1 ):
+    rnd = random.Random( seed )
+
+    names = []
+    if namefile:
+        with open( namefile, 'r', newline='', errors='ignore' ) as fp:
+            for row in csv.reader( fp ):
+                if row:
+                    names.append( row[3] if len(row) > 3 else row[0] )
+    else:
+        wineries = ['Groth', 'Cakebread', 'Caymus', 'Silver Oak', 'Foley', 'Hewitt', 'Attune', 'Opus One', 'Jordan', 'Stags Leap']
+        wines    = ['Cabernet Sauvignon', 'Chardonnay', 'Reserve Cabernet', 'Pinot Noir', 'Sauvignon Blanc', 'Merlot']
+        vintages = ['2012', '2013', '2014', '2015', '2016', '2017', "'15", '16', 'NV', '']
+        sizes    = ['750ml', '1.5L', '375ml', '1500ml', '12X750ML', '']
+        for winery in wineries:
+            for wine in wines:
+                for vintage in vintages:
+                    for size in sizes:
+                        names.append( ' '.join( [part for part in (winery, vintage, wine, size) if part] ) )
+                        # the vintage next to the size ("Opus One Cabernet 2015 1500ml")
+                        names.append( ' '.join( [part for part in (winery, wine, vintage, size) if part] ) )
+
+    # names recur - draw the corpus with repeats, most popular names first
+    weights = [1.0 / (idx+1) for idx in range(len(names))]
+    return rnd.choices( names, weights=weights, k=count )
+
+
+# time the vintage extraction - per record cost of the old rules and of winevintage (with and without the memo)
+def bench_vintage( names ):
+    engines = {
+        'winerequest_legacy' : legacy_extract_year_from_name,
+        'wineset_legacy'     : legacy_find_vintage,
+        'winevintage_nomemo' : winevintage.find_vintage.__wrapped__,
+        'winevintage'        : winevintage.find_vintage,
+    }
+
+    results = {}
+    for engine, func in engines.items():
+        winevintage.find_vintage.cache_clear()
+        start = time.perf_counter()
+        for name in names:
+            func( name )
+        seconds = time.perf_counter() - start
+        results[engine] = {
+            'names'           : len(names),
+            'unique'          : len(set(names)),
+            'seconds'         : seconds,
+            'usec_per_record' : seconds / len(names) * 1000000 if names else 0,
+        }
+        logger.info('vintage:%s:%s', engine, results[engine])
+        print('%-20s %8.3f usec/record' % (engine, results[engine]['usec_per_record']))
+
+    # the memo must not change a result - and how often the shared rules agree with the rules
+    # they replaced (the names that differ are listed so each difference can be checked)
+    unique = sorted(set(names))
+    winevintage.find_vintage.cache_clear()
+    results['memo_match'] = all( winevintage.find_vintage.__wrapped__(name) == winevintage.find_vintage(name) for name in unique )
+    print('winevintage memo results match: %s' % results['memo_match'])
+    for caller, legacy, shared in (('wineset', legacy_find_vintage, winevintage.find_vintage_yy), ('winerequest', legacy_extract_year_from_name, winevintage.find_vintage)):
+        differ = [ [name, legacy(name), shared(name)] for name in unique if legacy(name) != shared(name) ]
+        results[caller + '_agree']  = len(unique) - len(differ)
+        results[caller + '_differ'] = differ
+        print('%-12s agree with the old rules: %d of %d unique names' % (caller, results[caller + '_agree'], len(unique)))
+        for name, was, now in differ[:10]:
+            print('    %-50s %-6s -> %s' % (name, was, now))
+    logger.info('vintage:unique names:%d:memo match:%s:wineset agree:%d:winerequest agree:%d', len(unique), results['memo_match'], results['wineset_agree'], results['winerequest_agree'])
+
+    return results
+
+
+# show how these results compare to an earlier run
+def compare_results( results, earlier ):
+    for store in sorted(results):
+        for engine in sorted(results[store]):
+            if engine == 'records_match' or store not in earlier['stores'] or engine not in earlier['stores'][store]:
+                continue
+            now    = results[store][engine]
+            before = earlier['stores'][store][engine]
+            ratio  = before['seconds'] / now['seconds'] if now['seconds'] else 0
+            print('%-12s %-9s pages/sec %10.1f -> %10.1f (x%.2f)  regex calls %8d -> %8d' % (store, engine, before['pages_per_sec'], now['pages_per_sec'], ratio, before['regex_calls'], now['regex_calls']))
+            logger.info('compare:%s:%s:speedup:%.2f:regex_calls:%d:%d', store, engine, ratio, before['regex_calls'], now['regex_calls'])
+
+
+#####################################################################################
+
+if __name__ == '__main__':
+
+    # capture the command line
+    optiondict = kvutil.kv_parse_command_line( optiondictconfig, debug=False )
+
+    # extract the values and put into variables
+    debug    = optiondict['debug']
+
+    # logging at debug level would time the log file - not the parser
+    kvlogger.getLogger('').setLevel( optiondict['log_level'] )
+
+    logger.info('STARTUP(v%s)%s', optiondictconfig['AppVersion']['value'], '-'*40)
+
+    # vintage extraction benchmark
+    if optiondict['bench'] == 'vintage':
+        results = bench_vintage( vintage_corpus( optiondict['vintage_names'], optiondict['vintage_count'] ) )
+        with open( optiondict['benchfile'], 'w' ) as fp:
+            json.dump( { 'AppVersion' : optiondictconfig['AppVersion']['value'], 'vintage' : results }, fp, indent=2 )
+        print('benchmark saved to:', optiondict['benchfile'])
+        logger.info('benchmark saved to:%s', optiondict['benchfile'])
+        sys.exit()
+
+    if optiondict['engine'] == 'both':
+        engines = ('compiled', 'legacy')
+    else:
+        engines = (optiondict['engine'],)
+
+    # run the benchmark
+    results = bench_fixtures( optiondict['fixture_dir'], optiondict['storelist'], engines, optiondict['loops'], optiondict['parser_timeout'], debug=debug )
+
+    # save it
+    benchout = {
+        'AppVersion'  : optiondictconfig['AppVersion']['value'],
+        'rundate'     : datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        'fixture_dir' : optiondict['fixture_dir'],
+        'loops'       : optiondict['loops'],
+        'stores'      : results,
+    }
+    with open( optiondict['benchfile'], 'w' ) as fp:
+        json.dump( benchout, fp, indent=2 )
+    print('benchmark saved to:', optiondict['benchfile'])
+    logger.info('benchmark saved to:%s', optiondict['benchfile'])
+
+    # and compare it to the earlier run
+    if optiondict['compare']:
+        with open( optiondict['compare'], 'r' ) as fp:
+            compare_results( results, json.load(fp) )
+
+#eof
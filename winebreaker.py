@@ -0,0 +1,142 @@
+'''
+@author:   Ken Venner
+@contact:  ken@venerllc.com
+@version:  1.02
+
+Library used by winerequest and wineselenium to stop searching a store that is failing
+
+Each store has a circuit breaker.  After threshold searches in a row fail the breaker
+trips (opens) and the store is skipped - without waiting on its timeouts - for cooldown
+seconds.  Once the cooldown is over a single search is let through as a probe
+(half-open): if it works the store is back in the run, if it fails the store is
+skipped for another cooldown.  A search that ends without an answer (the store was
+parked waiting on a person) releases the probe so the next search probes the store.
+
+The run level stats show the stores tripped, the searches skipped, and the time saved
+(searches skipped times the average time a failed search took on that store).
+'''
+
+import threading
+import time
+
+# logging
+import logging
+
+logger = logging.getLogger(__name__)
+
+# version number
+AppVersion = '1.02'
+
+
+# create the breaker for a run
+#   threshold - failures in a row that trip the breaker for a store (0 - never trip)
+#   cooldown - seconds a tripped store is skipped before we probe it again
+#
+# returns the dict passed to breaker_allow/breaker_record
+def create_breaker( threshold=3, cooldown=300 ):
+    return {
+        'threshold' : threshold,
+        'cooldown'  : cooldown,
+        'stores'    : {},
+        'lock'      : threading.Lock(),
+    }
+
+
+# check if we can search this store now - returns False when the breaker is open
+# (the caller skips the store), True when closed or when this call is the half-open probe
+def breaker_allow( breaker, store ):
+    with breaker['lock']:
+        state = _breaker_store( breaker, store )
+
+        if state['state'] == 'closed':
+            return True
+
+        # cooldown over - let one search through to probe the store
+        if state['state'] == 'open' and time.monotonic() - state['opened'] >= breaker['cooldown']:
+            state['state'] = 'half_open'
+            logger.info('breaker:%s:half open - probing store', store)
+            return True
+
+        # open or a probe is already running
+        state['skipped'] += 1
+        logger.debug('breaker:%s:%s:skipped', store, state['state'])
+        return False
+
+
+# record how the search of a store went
+#   ok - True if the search worked
+#   seconds - how long the search took
+def breaker_record( breaker, store, ok, seconds=0.0 ):
+    with breaker['lock']:
+        state = _breaker_store( breaker, store )
+
+        if ok:
+            if state['state'] != 'closed':
+                logger.info('breaker:%s:closed - store is working again', store)
+            state['state'] = 'closed'
+            state['failures'] = 0
+            return
+
+        state['failures'] += 1
+        state['failed'] += 1
+        state['fail_seconds'] += seconds
+
+        # trip on the threshold - or when the half-open probe failed
+        if state['state'] == 'half_open' or (breaker['threshold'] > 0 and state['state'] == 'closed' and state['failures'] >= breaker['threshold']):
+            state['state'] = 'open'
+            state['opened'] = time.monotonic()
+            state['trips'] += 1
+            logger.warning('breaker:%s:open - store skipped for %d seconds after %d failures in a row', store, breaker['cooldown'], state['failures'])
+
+
+# the search let through ended without telling us if the store works (it was parked) - when it
+# was the half-open probe the store goes back to open with its cooldown over, so the next
+# search is the probe (a store that was closed stays closed)
+def breaker_release( breaker, store ):
+    with breaker['lock']:
+        state = _breaker_store( breaker, store )
+
+        if state['state'] == 'half_open':
+            state['state'] = 'open'
+            state['opened'] = time.monotonic() - breaker['cooldown']
+            logger.info('breaker:%s:probe released - store probed on its next search', store)
+
+
+# the run level stats - dict of store to counts (only stores that failed) - and logged
+def log_breaker_stats( breaker ):
+    stats = {}
+    with breaker['lock']:
+        for store, state in sorted(breaker['stores'].items()):
+            if not state['failed']:
+                continue
+            saved = state['skipped'] * state['fail_seconds'] / state['failed']
+            stats[store] = {
+                'state'   : state['state'],
+                'failed'  : state['failed'],
+                'trips'   : state['trips'],
+                'skipped' : state['skipped'],
+                'saved'   : saved,
+            }
+            logger.info('breaker:%s:state:%s:failed:%d:trips:%d:skipped:%d:seconds saved:%.1f', store, state['state'], state['failed'], state['trips'], state['skipped'], saved)
+
+    tripped = [store for store in stats if stats[store]['trips']]
+    if tripped:
+        logger.info('breaker:stores tripped:%s:seconds saved:%.1f', tripped, sum(stats[store]['saved'] for store in stats))
+    return stats
+
+
+# the breaker state of a store - created on first use - called holding the lock
+def _breaker_store( breaker, store ):
+    if store not in breaker['stores']:
+        breaker['stores'][store] = {
+            'state'        : 'closed',
+            'failures'     : 0,
+            'opened'       : 0.0,
+            'failed'       : 0,
+            'fail_seconds' : 0.0,
+            'trips'        : 0,
+            'skipped'      : 0,
+        }
+    return breaker['stores'][store]
+
+# eof
@@ -0,0 +1,124 @@
+'''
+@author:   Ken Venner
+@contact:  ken@venerllc.com
+@version:  1.01
+
+Library used by wineselenium to pull the wines off a store search page
+
+Reading the .text of a WebElement is one round trip to the browser, so pulling the
+title/price/size of each wine costs one round trip per field per wine.  Here a store
+declares its fields once as css selectors and one execute_script call returns the text of
+every field of every wine on the page (as JSON).
+
+    extract_rows  - one row (dict of field to list of texts) per container element
+    extract_lists - dict of field to list of texts for the whole page
+
+glb_script set to False reads the elements one at a time (the old way) so the round trips
+per search can be compared - count_round_trips counts the commands sent to the browser and
+log_round_trip_stats reports them by store.
+'''
+
+import json
+import threading
+
+# logging
+import logging
+
+logger = logging.getLogger(__name__)
+
+# version number
+AppVersion = '1.01'
+
+# pull the fields with one execute_script (False - read the text of each element)
+glb_script = True
+
+# the script - arguments: container css selector (null - the page), dict of field to css selector, max rows (-1 - all)
+glb_extract_js = '''
+var containers = arguments[0] ? document.querySelectorAll(arguments[0]) : [document];
+var fields = arguments[1];
+var limit = arguments[2];
+var rows = [];
+for (var i = 0; i < containers.length && (limit < 0 || i < limit); i++) {
+    var row = {};
+    for (var name in fields) {
+        var found = containers[i].querySelectorAll(fields[name]);
+        row[name] = [];
+        for (var j = 0; j < found.length; j++) {
+            row[name].push((found[j].innerText || '').replace(/\\u00a0/g, ' ').trim());
+        }
+    }
+    rows.push(row);
+}
+return JSON.stringify(rows);
+'''
+
+# commands sent to the browser by store - see count_round_trips
+glb_round_trips = {}
+glb_round_trips_lock = threading.Lock()
+
+
+# the text of the fields in each container on the page
+#   container - css selector of the element that holds one wine (None - the whole page is one row)
+#   fields - dict of field name to css selector (within the container)
+#   limit - (opt) max number of containers
+#
+# returns list of dict of field name to list of texts
+def extract_rows( driver, container, fields, limit=None ):
+    if glb_script:
+        return json.loads( driver.execute_script( glb_extract_js, container, fields, -1 if limit is None else limit ) )
+
+    # the old way - one round trip per element
+    elements = driver.find_elements_by_css_selector( container ) if container else [driver]
+    if limit is not None:
+        elements = elements[:limit]
+
+    rows = []
+    for elem in elements:
+        rows.append( { name : [found.text for found in elem.find_elements_by_css_selector( selector )] for name, selector in fields.items() } )
+    return rows
+
+
+# the text of the fields on the page - dict of field name to list of texts
+def extract_lists( driver, fields ):
+    return extract_rows( driver, None, fields )[0]
+
+
+# count the commands this driver sends to the browser (every WebDriver/WebElement call goes through driver.execute)
+def count_round_trips( driver, store ):
+    execute = driver.execute
+
+    def counted_execute( *args, **kwargs ):
+        with glb_round_trips_lock:
+            glb_round_trips.setdefault( store, {'commands' : 0, 'searches' : 0, 'search_commands' : 0} )['commands'] += 1
+        return execute( *args, **kwargs )
+
+    driver.execute = counted_execute
+
+
+# the commands sent to the browser for this store so far
+def round_trips( store ):
+    with glb_round_trips_lock:
+        return glb_round_trips.get( store, {} ).get( 'commands', 0 )
+
+
+# a search of this store is done - commands is the round trips it took
+def record_search( store, commands ):
+    with glb_round_trips_lock:
+        counts = glb_round_trips.setdefault( store, {'commands' : 0, 'searches' : 0, 'search_commands' : 0} )
+        counts['searches'] += 1
+        counts['search_commands'] += commands
+
+
+# log (and return) the round trips per search by store
+def log_round_trip_stats():
+    stats = {}
+    with glb_round_trips_lock:
+        for store, counts in sorted(glb_round_trips.items()):
+            stats[store] = dict(counts, per_search=counts['search_commands'] / counts['searches'] if counts['searches'] else 0.0)
+
+    for store, counts in stats.items():
+        logger.info('round trips:%s:%s:searches:%d:search round trips:%d:per search:%.1f:total round trips:%d', store,
+                    'script' if glb_script else 'element', counts['searches'], counts['search_commands'], counts['per_search'], counts['commands'])
+    return stats
+
+# eof
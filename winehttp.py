@@ -0,0 +1,437 @@
+'''
+@author:   Ken Venner
+@contact:  ken@venerllc.com
+@version:  1.04
+
+Library of tools used by winerequest to manage the HTTP traffic to the wine stores
+
+A session pool holds one keep-alive requests.Session per store for the life of a run
+so that every search against a store reuses the open connection instead of paying
+for a new TCP/TLS handshake on each page
+
+An http cache keeps the pages we downloaded on disk (compressed) for ttl seconds so that
+a restarted run, or a second request for the same wine, parses from disk - stale pages
+are revalidated with the server (ETag/Last-Modified) before they are downloaded again
+
+A fixture store is a cache used for testing - in record mode every page we download is
+saved (by store and search string) into a fixture directory, in replay mode the pages are
+served back from that directory and the network is never used (see winebench)
+
+Requests that go out to the network are paced by a winethrottle throttle when one is
+passed - pages served from the cache or a fixture replay do not wait
+'''
+
+import collections
+import gzip
+import hashlib
+import json
+import os
+import re
+import requests
+import threading
+import time
+
+import winethrottle
+
+# logging
+import logging
+
+logger = logging.getLogger(__name__)
+
+# version number
+AppVersion = '1.04'
+
+
+# create the pool of store sessions owned by a run
+#   pool_size - max number of connections kept open to a store (match this to store_workers)
+#   headers - dict of headers sent on every request from every store session
+#
+# returns the dict that is passed to get_store_session
+def create_session_pool( pool_size=4, headers=None ):
+    return {
+        'pool_size' : max(1, pool_size),
+        'headers'   : headers if headers else {},
+        'sessions'  : {},
+        'lock'      : threading.Lock(),
+    }
+
+
+# get the session for a store - create it on first use
+#   UserAgent - (opt) the UserAgent defined in the store definition, sent on every request for this store
+def get_store_session( session_pool, store, UserAgent=None ):
+    with session_pool['lock']:
+        if store not in session_pool['sessions']:
+            session = requests.Session()
+
+            # one adapter for http and https - pool_connections is the number of hosts
+            # kept (a store can redirect to a second host), pool_maxsize the connections per host
+            adapter = requests.adapters.HTTPAdapter( pool_connections=4, pool_maxsize=session_pool['pool_size'] )
+            session.mount( 'http://', adapter )
+            session.mount( 'https://', adapter )
+
+            # default headers for the run and then the store
+            session.headers.update( session_pool['headers'] )
+            if UserAgent:
+                session.headers['User-agent'] = UserAgent
+
+            # debugging
+            logger.debug('created session for store:%s:pool_size:%d', store, session_pool['pool_size'])
+
+            session_pool['sessions'][store] = session
+
+        return session_pool['sessions'][store]
+
+
+# calculate the connections opened and reused by each store session
+#
+# returns dict - key is store - value is dict of opened, reused and requests counts
+def session_pool_stats( session_pool ):
+    stats = {}
+    with session_pool['lock']:
+        for store, session in session_pool['sessions'].items():
+            stats[store] = { 'opened' : 0, 'reused' : 0, 'requests' : 0 }
+            # the same adapter is mounted for http and https - count it once
+            for adapter in set(session.adapters.values()):
+                pools = adapter.poolmanager.pools
+                for key in pools.keys():
+                    connpool = pools[key]
+                    stats[store]['opened']   += connpool.num_connections
+                    stats[store]['requests'] += connpool.num_requests
+            stats[store]['reused'] = stats[store]['requests'] - stats[store]['opened']
+    return stats
+
+
+# log the session stats and close all the store sessions
+def close_session_pool( session_pool ):
+    stats = session_pool_stats( session_pool )
+    for store in sorted(stats):
+        logger.info('store:%s:requests:%d:connections opened:%d:reused:%d', store, stats[store]['requests'], stats[store]['opened'], stats[store]['reused'])
+
+    with session_pool['lock']:
+        for session in session_pool['sessions'].values():
+            session.close()
+        session_pool['sessions'] = {}
+
+    return stats
+
+
+# create the on-disk http cache
+#   cache_dir - directory the cached pages are saved in (created if it does not exist)
+#   ttl - seconds a cached page is used without checking back with the server
+#   max_bytes - size the cache directory is held to - least recently used pages are removed first
+#
+# returns the dict that is passed to cached_request
+def create_http_cache( cache_dir, ttl=43200, max_bytes=100*1024*1024 ):
+    if not os.path.isdir(cache_dir):
+        os.makedirs(cache_dir)
+
+    cache = {
+        'dir'       : cache_dir,
+        'ttl'       : ttl,
+        'max_bytes' : max_bytes,
+        'lock'      : threading.Lock(),
+        'lru'       : collections.OrderedDict(),   # key - bytes on disk - oldest used first
+        'bytes'     : 0,
+        'stats'     : { 'hits' : 0, 'revalidated' : 0, 'misses' : 0, 'stored' : 0, 'evicted' : 0 },
+    }
+
+    # load what is already on disk - ordered by when it was last used
+    entries = []
+    for filename in os.listdir(cache_dir):
+        if filename.endswith('.json'):
+            key = filename[:-5]
+            try:
+                size = os.path.getsize( _http_cache_filename(cache, key, '.json') ) + os.path.getsize( _http_cache_filename(cache, key, '.gz') )
+                entries.append( (os.path.getmtime( _http_cache_filename(cache, key, '.json') ), key, size) )
+            except OSError:
+                # half written entry - ignore it
+                continue
+    for (mtime, key, size) in sorted(entries):
+        cache['lru'][key] = size
+        cache['bytes'] += size
+
+    # debugging
+    logger.info('http cache:%s:pages:%d:bytes:%d', cache_dir, len(cache['lru']), cache['bytes'])
+
+    # bring it down to size if the limit changed
+    with cache['lock']:
+        _http_cache_evict( cache )
+
+    return cache
+
+
+# send a request through the http cache
+#   http - the requests module or a session (see get_store_session)
+#   store - the store this request is for - part of the cache key
+#   payload - (opt) the form data for a POST
+#   cache - (opt) the http cache or a fixture store - when None the request is just sent
+#   srchstring - (opt) the wine searched for - names the fixture file
+#   page - (opt) the page number of the search results - names the fixture file
+#   throttle - (opt) winethrottle throttle that paces the requests sent to the store
+#
+# returns a requests.Response - built from the cached page when we did not go to the server
+def cached_request( http, method, url, store, payload=None, headers=None, cache=None, srchstring=None, page=None, throttle=None ):
+    # no cache - just send the request
+    if cache is None:
+        return _send_request( http, method, url, store, payload, headers, throttle )
+
+    # record/replay fixtures
+    if 'fixture_mode' in cache:
+        return _fixture_request( http, method, url, store, payload, headers, cache, srchstring, page, throttle )
+
+    key = http_cache_key( store, method, url, payload )
+    entry = _http_cache_get( cache, key )
+
+    # fresh page - no need to go to the server
+    if entry and time.time() - entry['meta']['fetched'] < cache['ttl']:
+        _http_cache_count( cache, 'hits' )
+        logger.debug('http cache hit:%s:%s', store, url)
+        return _http_cache_response( entry )
+
+    # stale page - ask the server if it changed
+    req_headers = dict(headers) if headers else {}
+    if entry:
+        if entry['meta'].get('etag'):
+            req_headers['If-None-Match'] = entry['meta']['etag']
+        if entry['meta'].get('last_modified'):
+            req_headers['If-Modified-Since'] = entry['meta']['last_modified']
+
+    r = _send_request( http, method, url, store, payload, req_headers, throttle )
+
+    # not changed - start the clock on the page we have again
+    if entry and r.status_code == 304:
+        entry['meta']['fetched'] = time.time()
+        _http_cache_put( cache, key, entry['meta'], entry['content'] )
+        _http_cache_count( cache, 'revalidated' )
+        logger.debug('http cache revalidated:%s:%s', store, url)
+        return _http_cache_response( entry )
+
+    _http_cache_count( cache, 'misses' )
+
+    # only keep good pages
+    if r.status_code == 200:
+        meta = {
+            'store'         : store,
+            'method'        : method,
+            'url'           : url,
+            'fetched'       : time.time(),
+            'status_code'   : r.status_code,
+            'encoding'      : r.encoding,
+            'etag'          : r.headers.get('ETag'),
+            'last_modified' : r.headers.get('Last-Modified'),
+        }
+        _http_cache_put( cache, key, meta, r.content )
+
+    return r
+
+
+# send the request to the store - once the throttle gives us a slot
+def _send_request( http, method, url, store, payload, headers, throttle=None ):
+    with winethrottle.throttled( throttle, store, url ):
+        return http.request( method, url, data=payload, headers=headers )
+
+
+# create the cache key for a request
+def http_cache_key( store, method, url, payload=None ):
+    keystr = json.dumps( [store, method.upper(), url, sorted(payload.items()) if payload else None] )
+    return hashlib.sha1( keystr.encode('utf-8') ).hexdigest()
+
+
+# log the cache counts for the run
+def log_http_cache_stats( cache ):
+    with cache['lock']:
+        stats = dict(cache['stats'])
+        if 'fixture_mode' in cache:
+            logger.info('fixture store:%s:recorded:%d:replayed:%d', cache['fixture_mode'], stats['recorded'], stats['replayed'])
+            return stats
+        logger.info('http cache:hits:%d:revalidated:%d:misses:%d:stored:%d:evicted:%d:pages:%d:bytes:%d',
+                    stats['hits'], stats['revalidated'], stats['misses'], stats['stored'], stats['evicted'],
+                    len(cache['lru']), cache['bytes'])
+    return stats
+
+
+# filename for a part of a cache entry (.json - meta data, .gz - page content)
+def _http_cache_filename( cache, key, ext ):
+    return os.path.join( cache['dir'], key + ext )
+
+
+# increment a cache counter
+def _http_cache_count( cache, counter ):
+    with cache['lock']:
+        cache['stats'][counter] += 1
+
+
+# read an entry from the cache - returns None when we do not have it
+def _http_cache_get( cache, key ):
+    with cache['lock']:
+        if key not in cache['lru']:
+            return None
+        cache['lru'].move_to_end( key )
+
+    try:
+        with open( _http_cache_filename(cache, key, '.json'), 'r' ) as fp:
+            meta = json.load( fp )
+        with gzip.open( _http_cache_filename(cache, key, '.gz'), 'rb' ) as fp:
+            content = fp.read()
+    except (OSError, ValueError) as e:
+        logger.warning('http cache:unable to read:%s:%s', key, str(e))
+        return None
+
+    # touch the entry so the next run knows it was used recently
+    try:
+        os.utime( _http_cache_filename(cache, key, '.json') )
+    except OSError:
+        pass
+
+    return { 'meta' : meta, 'content' : content }
+
+
+# write an entry to the cache and then make sure we are within the size limit
+def _http_cache_put( cache, key, meta, content ):
+    size = 0
+    for (ext, data) in (('.gz', gzip.compress(content)), ('.json', json.dumps(meta).encode('utf-8'))):
+        filename = _http_cache_filename( cache, key, ext )
+        # write to the side and move into place - readers never see half a file
+        tmpfilename = '%s.%d.tmp' % (filename, threading.get_ident())
+        with open( tmpfilename, 'wb' ) as fp:
+            fp.write( data )
+        os.replace( tmpfilename, filename )
+        size += len(data)
+
+    with cache['lock']:
+        cache['bytes'] += size - cache['lru'].pop( key, 0 )
+        cache['lru'][key] = size
+        cache['stats']['stored'] += 1
+        _http_cache_evict( cache )
+
+
+# remove the least recently used entries until we are within max_bytes - called holding the lock
+def _http_cache_evict( cache ):
+    while cache['bytes'] > cache['max_bytes'] and len(cache['lru']) > 1:
+        (key, size) = cache['lru'].popitem( last=False )
+        cache['bytes'] -= size
+        cache['stats']['evicted'] += 1
+        for ext in ('.json', '.gz'):
+            try:
+                os.remove( _http_cache_filename(cache, key, ext) )
+            except OSError:
+                pass
+
+
+# build a response from a cached page
+def _http_cache_response( entry ):
+    r = requests.models.Response()
+    r.status_code = entry['meta']['status_code']
+    r.url = entry['meta']['url']
+    r.encoding = entry['meta']['encoding']
+    r._content = entry['content']
+    return r
+
+
+# create the fixture store used to record pages from the stores or to replay them
+#   fixture_dir - directory the fixtures are saved in - one sub directory per store
+#   mode - 'record' - download every page and save it
+#          'replay' - serve every page from the fixture directory (no network)
+#
+# returns the dict that is passed to cached_request as the cache
+def create_fixture_store( fixture_dir, mode='replay' ):
+    if mode not in ('record', 'replay'):
+        logger.error('invalid fixture mode:%s', mode)
+        raise Exception('invalid fixture mode:%s' % mode)
+
+    if mode == 'record' and not os.path.isdir(fixture_dir):
+        os.makedirs(fixture_dir)
+
+    logger.info('fixture store:%s:mode:%s', fixture_dir, mode)
+
+    return {
+        'dir'          : fixture_dir,
+        'fixture_mode' : mode,
+        'lock'         : threading.Lock(),
+        'stats'        : { 'recorded' : 0, 'replayed' : 0 },
+    }
+
+
+# the base filename (no extension) of the fixture for a store/search (and page)
+#
+# the search string only makes the name readable - "Opus One", "opus-one" and "OPUS ONE!"
+# all clean to opus_one - so a short hash of the request (method, url, payload) keeps them apart
+def fixture_filename( fixture_store, store, srchstring, url, page=None, method='GET', payload=None ):
+    if srchstring:
+        name = re.sub( '[^a-z0-9]+', '_', srchstring.lower() ).strip('_')
+        name += '_' + http_cache_key( store, method, url, payload )[:8]
+    else:
+        # no search string - name it from the url
+        name = hashlib.sha1( url.encode('utf-8') ).hexdigest()[:12]
+    if page:
+        name += '_p%d' % page
+    return os.path.join( fixture_store['dir'], store, name )
+
+
+# read in all the fixtures in a fixture directory
+#   storelist - (opt) only read the fixtures for these stores
+#
+# returns list of dicts - meta (what we saved about the request) and content (the raw page bytes)
+def load_fixtures( fixture_dir, storelist=None ):
+    fixtures = []
+    for store in sorted(os.listdir(fixture_dir)):
+        if storelist and store not in storelist:
+            continue
+        storedir = os.path.join( fixture_dir, store )
+        if not os.path.isdir(storedir):
+            continue
+        for filename in sorted(os.listdir(storedir)):
+            if not filename.endswith('.json'):
+                continue
+            with open( os.path.join(storedir, filename), 'r' ) as fp:
+                meta = json.load( fp )
+            with open( os.path.join(storedir, filename[:-5] + '.html'), 'rb' ) as fp:
+                content = fp.read()
+            fixtures.append( { 'meta' : meta, 'content' : content } )
+    return fixtures
+
+
+# record or replay one request
+def _fixture_request( http, method, url, store, payload, headers, fixture_store, srchstring, page, throttle=None ):
+    filename = fixture_filename( fixture_store, store, srchstring, url, page, method, payload )
+
+    # replay - never goes to the network
+    if fixture_store['fixture_mode'] == 'replay':
+        if not os.path.exists( filename + '.json' ):
+            logger.warning('no fixture recorded:%s:%s:%s', store, srchstring, url)
+            raise Exception('no fixture recorded for store:%s:search:%s:url:%s' % (store, srchstring, url))
+        with open( filename + '.json', 'r' ) as fp:
+            meta = json.load( fp )
+        with open( filename + '.html', 'rb' ) as fp:
+            content = fp.read()
+        with fixture_store['lock']:
+            fixture_store['stats']['replayed'] += 1
+        logger.debug('fixture replayed:%s', filename)
+        return _http_cache_response( { 'meta' : meta, 'content' : content } )
+
+    # record - go get the page and save what came back (good or bad)
+    r = _send_request( http, method, url, store, payload, headers, throttle )
+    meta = {
+        'store'       : store,
+        'srchstring'  : srchstring,
+        'page'        : page,
+        'method'      : method,
+        'url'         : url,
+        'payload'     : payload,
+        'fetched'     : time.time(),
+        'status_code' : r.status_code,
+        'encoding'    : r.encoding,
+    }
+    if not os.path.isdir( os.path.dirname(filename) ):
+        os.makedirs( os.path.dirname(filename), exist_ok=True )
+    with open( filename + '.html', 'wb' ) as fp:
+        fp.write( r.content )
+    with open( filename + '.json', 'w' ) as fp:
+        json.dump( meta, fp, indent=2 )
+    with fixture_store['lock']:
+        fixture_store['stats']['recorded'] += 1
+    logger.debug('fixture recorded:%s', filename)
+
+    return r
+
+# eof
@@ -0,0 +1,125 @@
+'''
+@author:   Ken Venner
+@contact:  ken@venerllc.com
+@version:  1.01
+
+Library used by wineselenium and winerequest to pick up a run where it left off
+
+Each run date has its own journal file next to the output file (wineselenium.csv ->
+wineselenium_journal_20240131.csv).  After the wines a store found for a search string are
+saved to the output file one line (rundate, wine, store, records, time) is appended to the
+journal - so opening the journal reads only today's entries, no matter how big the output
+file has grown.
+
+The entries are indexed by wine and store, so a restarted run skips the wines every store
+has finished (journal_wines_left) and, for a wine that was part way done, the stores that
+already finished it (journal_done).
+
+A store is only recorded when its search returned records - the searches return no
+records when the page did not work (no wine found is a record) - so a failed store is
+searched again on restart.
+'''
+
+import csv
+import datetime
+import os
+import threading
+
+# logging
+import logging
+
+logger = logging.getLogger(__name__)
+
+# version number
+AppVersion = '1.01'
+
+# journal file name - output file name (no extension), run date as YYYYMMDD
+glb_journal_fmt = '%s_journal_%s.csv'
+
+
+# the journal file for this output file and run date
+#   rundate - run date in datefmt (the format wineselenium writes to the output file)
+def journal_file( wineoutfile, rundate, datefmt='%m/%d/%Y' ):
+    return glb_journal_fmt % ( os.path.splitext( wineoutfile )[0], datetime.datetime.strptime( rundate, datefmt ).strftime('%Y%m%d') )
+
+
+# open (create) the journal of this run and load its index
+#
+# returns the journal dict used by the other calls
+def open_journal( filename, rundate ):
+    journal = {
+        'file'     : filename,
+        'rundate'  : rundate,
+        'index'    : {},
+        'loaded'   : 0,
+        'recorded' : 0,
+        'lock'     : threading.Lock(),
+    }
+
+    # load what this run already finished - a line cut short by a crash is ignored
+    ends_clean = True
+    if os.path.exists( filename ):
+        with open( filename, 'r', newline='' ) as fp:
+            for row in csv.reader( fp ):
+                if len(row) >= 5 and row[0] == rundate:
+                    journal['index'].setdefault( row[1], set() ).add( row[2] )
+                    journal['loaded'] += 1
+        with open( filename, 'rb' ) as fp:
+            if fp.seek( 0, os.SEEK_END ):
+                fp.seek( -1, os.SEEK_END )
+                ends_clean = fp.read() == b'\n'
+
+    journal['fp'] = open( filename, 'a', newline='' )
+    if not ends_clean:
+        journal['fp'].write('\n')
+    journal['writer'] = csv.writer( journal['fp'], lineterminator='\n' )
+
+    logger.info('journal:%s:rundate:%s:entries loaded:%d:wines:%d', filename, rundate, journal['loaded'], len(journal['index']))
+    return journal
+
+
+# has this store finished this wine in this run
+def journal_done( journal, wine, store ):
+    with journal['lock']:
+        return store in journal['index'].get( wine, () )
+
+
+# the stores in storelist that have not finished this wine
+def journal_stores_left( journal, wine, storelist ):
+    with journal['lock']:
+        done = journal['index'].get( wine, () )
+        return [store for store in storelist if store not in done]
+
+
+# the wines in searchlist some store in storelist has not finished (in searchlist order)
+def journal_wines_left( journal, searchlist, storelist ):
+    remaining = [wine for wine in searchlist if journal_stores_left( journal, wine, storelist )]
+    logger.info('journal:wines already processed:%d:remaining wines to search:%d', len(searchlist) - len(remaining), len(remaining))
+    return remaining
+
+
+# the wines this store found for this wine are saved - append it to the journal
+def journal_record( journal, wine, store, records ):
+    if not records:
+        return
+
+    with journal['lock']:
+        journal['writer'].writerow( [journal['rundate'], wine, store, records, datetime.datetime.now().strftime('%H:%M:%S')] )
+        journal['fp'].flush()
+        journal['index'].setdefault( wine, set() ).add( store )
+        journal['recorded'] += 1
+
+
+# the wines found for this wine are saved - store_wines is dict of store to list of wines found
+def journal_record_wine( journal, wine, store_wines ):
+    for store, winelist in store_wines.items():
+        journal_record( journal, wine, store, len(winelist) if winelist else 0 )
+
+
+# close the journal
+def close_journal( journal ):
+    with journal['lock']:
+        journal['fp'].close()
+    logger.info('journal:%s:entries loaded:%d:entries recorded:%d', journal['file'], journal['loaded'], journal['recorded'])
+
+# eof
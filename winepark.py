@@ -0,0 +1,149 @@
+'''
+@author:   Ken Venner
+@contact:  ken@venerllc.com
+@version:  1.01
+
+Library used by wineselenium to park a store that is waiting on a person (the totalwine
+robot check) without holding up the run
+
+A store search raises StoreParked when the store can not go on until someone interacts with
+its browser.  The store is parked: the wine it was on and the wines that come up for it after
+that are queued, the other stores keep searching, and the store is checked again on a timer
+(poll seconds).  Once the check clears the store is unparked and searches its queued wines.
+
+    poll     - seconds between checks of a parked store
+    max_wait - seconds a store can stay parked at the end of the run before its queued
+               wines are given up (0 - no limit)
+
+log_parking_report shows by store the times it was parked, the seconds it was parked, the
+wines it picked up after it was cleared, and the wines given up.
+'''
+
+import threading
+import time
+
+# logging
+import logging
+
+logger = logging.getLogger(__name__)
+
+# version number
+AppVersion = '1.01'
+
+
+# raised by a store search when the store has to wait on a person
+class StoreParked(Exception):
+    def __init__( self, store, reason ):
+        Exception.__init__( self, '%s:parked:%s' % (store, reason) )
+        self.store = store
+        self.reason = reason
+
+
+# create the parking for a run
+#
+# returns the dict passed to the other routines
+def create_parking( poll=180, max_wait=0 ):
+    return {
+        'poll'     : poll,
+        'max_wait' : max_wait,
+        'parked'   : {},
+        'stats'    : {},
+        'lock'     : threading.Lock(),
+    }
+
+
+# park a store - labels are the wines it still has to search (the one it was on first)
+def park_store( parking, store, labels, reason ):
+    now = time.monotonic()
+    with parking['lock']:
+        stats = _stats( parking, store )
+        stats['parked'] += 1
+        parking['parked'][store] = { 'start' : now, 'polled' : now, 'queue' : list(labels) }
+    logger.warning('parking:%s:parked:%s:wines queued:%d', store, reason, len(labels))
+
+
+# is this store parked
+def store_parked( parking, store ):
+    with parking['lock']:
+        return store in parking['parked']
+
+
+# queue a wine for a parked store
+def queue_label( parking, store, label ):
+    with parking['lock']:
+        parking['parked'][store]['queue'].append( label )
+
+
+# the stores that are parked
+def parked_stores( parking ):
+    with parking['lock']:
+        return list( parking['parked'] )
+
+
+# is the parked store due to be checked again - counts the check when it is
+def poll_due( parking, store ):
+    now = time.monotonic()
+    with parking['lock']:
+        parked = parking['parked'][store]
+        if now - parked['polled'] < parking['poll']:
+            return False
+        parked['polled'] = now
+        return True
+
+
+# seconds until the next check of the parked store (0 - due now)
+def poll_seconds( parking, store ):
+    with parking['lock']:
+        return max( 0, parking['poll'] - (time.monotonic() - parking['parked'][store]['polled']) )
+
+
+# has this store been parked longer than max_wait
+def wait_expired( parking, store ):
+    with parking['lock']:
+        return bool(parking['max_wait']) and time.monotonic() - parking['parked'][store]['start'] >= parking['max_wait']
+
+
+# the check cleared - unpark the store
+#
+# returns the wines queued while it was parked (in the order they came up)
+def unpark_store( parking, store ):
+    with parking['lock']:
+        parked = parking['parked'].pop( store )
+        stats = _stats( parking, store )
+        seconds = time.monotonic() - parked['start']
+        stats['seconds'] += seconds
+        stats['resumed'] += len(parked['queue'])
+    logger.info('parking:%s:cleared after seconds:%.0f:wines queued:%d', store, seconds, len(parked['queue']))
+    return parked['queue']
+
+
+# give up on a parked store - its queued wines are not searched
+#
+# returns the wines given up
+def give_up_store( parking, store ):
+    with parking['lock']:
+        parked = parking['parked'].pop( store )
+        stats = _stats( parking, store )
+        stats['seconds'] += time.monotonic() - parked['start']
+        stats['given_up'].extend( parked['queue'] )
+    logger.error('parking:%s:not cleared after seconds:%d:wines given up:%s', store, parking['max_wait'], parked['queue'])
+    return parked['queue']
+
+
+# log (and return) the parking report by store
+def log_parking_report( parking ):
+    with parking['lock']:
+        report = { store : dict(stats, given_up=list(stats['given_up'])) for store, stats in sorted(parking['stats'].items()) }
+
+    for store, stats in report.items():
+        logger.info('parking:%s:parked:%d:seconds parked:%.0f:wines resumed:%d:wines given up:%d', store, stats['parked'], stats['seconds'], stats['resumed'], len(stats['given_up']))
+        if stats['given_up']:
+            logger.warning('parking:%s:wines given up:%s', store, stats['given_up'])
+    return report
+
+
+# the stats of a store - caller holds the lock
+def _stats( parking, store ):
+    return parking['stats'].setdefault( store, {'parked' : 0, 'seconds' : 0.0, 'resumed' : 0, 'given_up' : []} )
+
+# eof
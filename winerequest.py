@@ -1,7 +1,7 @@
 '''
 @author:   Ken Venner
 @contact:  ken@venerllc.com
-@version:  1.19
+@version:  1.34
 
 Using python requests - screen scrape wine websites to draw
 down wine pricing and availiability information
@@ -13,11 +13,33 @@ import kvlogger
 
 
 import wineselenium
-
+import winehttp
+import winethrottle
+import winebreaker
+import winevintage
+import winetrace
+import winejournal
+import winewriter
+import winexlat
+import winestores
+
+import bisect
+import concurrent.futures
 import datetime
+import functools
+import itertools
+import queue
 import re
 import requests
 import sys
+import threading
+import time
+
+# regex parser - used to find the literal text a regex requires
+try:
+    import re._parser as sre_parse
+except ImportError:
+    import sre_parse
 
 # logging - 
 import kvlogger
@@ -36,9 +58,20 @@ def handle_exception(exc_type, exc_value, exc_traceback):
 sys.excepthook = handle_exception
 
 # module global variables
-glb_last_line_check=-1       # global variable to store the line number we just called
-glb_last_line_count=0        # global variable to count number of times we called this line
+glb_line_check=threading.local()  # per thread - last line checked (last_line_check) and times we checked it (last_line_count)
 glb_last_line_max  =3
+glb_compiled_parsers={}           # compiled store parsers (see compile_wine_parser) keyed by the parser args
+glb_re_html_tag=re.compile('<[^>]*>')
+
+# the tags the html table engine (see html_table_extract) looks for on each line - tag to bit flag
+glb_table_tags = {
+    '<table'  : 1,
+    '/table>' : 2,
+    '<tr'     : 4,
+    '/tr>'    : 8,
+    '<th'     : 16,
+    '<td'     : 32,
+}
 
 # cause print statements that are not debugging statements to print out
 pmsg          = False
@@ -46,7 +79,7 @@ pmsg          = False
 # application variables
 optiondictconfig = {
     'AppVersion' : {
-        'value' : '1.19',
+        'value' : '1.34',
         'description' : 'defines the version number for the app',
     },
     'debug' : {
@@ -97,6 +130,98 @@ optiondictconfig = {
         'value' : 'wine_xlat.csv',
         'description' : 'defines the name of the input file for translating wine names',
     },
+    'workers' : {
+        'value' : 1,
+        'type'  : 'int',
+        'description' : 'defines the number of store searches run concurrently (1 = serial)',
+    },
+    'store_workers' : {
+        'value' : 1,
+        'type'  : 'int',
+        'description' : 'defines the max number of concurrent searches against any one store',
+    },
+    'pool_size' : {
+        'value' : None,
+        'type'  : 'int',
+        'description' : 'defines the max number of keep-alive connections held per store (defaults to store_workers)',
+    },
+    'cache_dir' : {
+        'value' : None,
+        'description' : 'defines the directory store pages are cached in (no caching when not set)',
+    },
+    'cache_ttl' : {
+        'value' : 43200,
+        'type'  : 'int',
+        'description' : 'defines the number of seconds a cached store page is used before checking with the store',
+    },
+    'cache_maxmb' : {
+        'value' : 100,
+        'type'  : 'int',
+        'description' : 'defines the max size (MB) of the store page cache',
+    },
+    'fixture_dir' : {
+        'value' : None,
+        'description' : 'defines the directory store pages are recorded to/replayed from (replaces cache_dir)',
+    },
+    'fixture_mode' : {
+        'value' : 'replay',
+        'description' : 'defines if we record store pages into fixture_dir or replay them from it (record/replay)',
+    },
+    'dedup_run' : {
+        'value' : False,
+        'type'  : 'bool',
+        'description' : 'defines if duplicate wine records are removed across pages and search strings for the whole run',
+    },
+    'page_workers' : {
+        'value' : 1,
+        'type'  : 'int',
+        'description' : 'defines the number of result pages of a multi-page store (nhliquor) fetched at the same time',
+    },
+    'max_pages' : {
+        'value' : 4,
+        'type'  : 'int',
+        'description' : 'defines the max number of result pages read from a multi-page store (nhliquor)',
+    },
+    'throttle' : {
+        'value' : True,
+        'type'  : 'bool',
+        'description' : 'defines if the requests to each store are paced (see winethrottle)',
+    },
+    'breaker_threshold' : {
+        'value' : 3,
+        'type'  : 'int',
+        'description' : 'defines the failures in a row that cause a store to be skipped (0 - never skip)',
+    },
+    'breaker_cooldown' : {
+        'value' : 300,
+        'type'  : 'int',
+        'description' : 'defines the seconds a failing store is skipped before we try it again',
+    },
+    'trace_stores' : {
+        'value' : None,
+        'type'  : 'liststr',
+        'description' : 'defines the stores (or parser labels) whose pages get a per line parser trace in the log',
+    },
+    'trace_sample' : {
+        'value' : 0,
+        'type'  : 'int',
+        'description' : 'defines the 1 in N pages of the other stores that get a per line parser trace (0 - none)',
+    },
+    'journal' : {
+        'value' : True,
+        'type'  : 'bool',
+        'description' : 'defines if the run journal (see winejournal) is used to skip the wine/stores already done today (False - rescan wineoutfile)',
+    },
+    'flush_rows' : {
+        'value' : 200,
+        'type'  : 'int',
+        'description' : 'defines the rows buffered before wineoutfile is flushed (see winewriter)',
+    },
+    'flush_seconds' : {
+        'value' : 5,
+        'type'  : 'int',
+        'description' : 'defines the max seconds a row is buffered before wineoutfile is flushed',
+    },
 }
 
 # capture the store definitions
@@ -323,6 +448,10 @@ def store_definitions():
                 #                                 re.compile('', re.IGNORECASE)],
                 'label'          : 'NHLiq',
             },
+            'paging_args' : {
+                'page_workers' : 1,
+                'max_pages'    : 4,
+            },
         },
         'rolf' : {
             'search_args' : {
@@ -384,10 +513,53 @@ def store_definitions():
 
 
 # routine takes the list of wines to search for and list of stores to search and builds up the array of wines
-def get_wines_from_stores( srchstring_list, storelist, wineoutfile=None, debug=False ):
+#
+#   workers - number of store searches run at the same time - 1 runs the searches serially
+#   store_workers - max number of searches running against any one store at the same time
+#   session_pool - (opt) winehttp session pool to use - when not passed one is created (and closed) for this call
+#   pool_size - (opt) keep-alive connections per store for the session pool we create (defaults to store_workers)
+#   cache - (opt) winehttp http cache that store pages are read from/saved to
+#   dedup_run - when set, records already returned for an earlier page/search string are dropped
+#               (with workers > 1 which search string keeps a record depends on which finished first)
+#   page_workers - (opt) result pages of a multi-page store fetched at the same time
+#   max_pages - (opt) max result pages read from a multi-page store
+#   throttle - (opt) winethrottle throttle that paces the requests to each store - defaults to
+#              the throttle shared by the process (pass create_throttle(enabled=False) to not pace)
+#   breaker - (opt) winebreaker breaker that skips failing stores - one is created for this call when not passed
+#   journal - (opt) winejournal run journal - the wine/stores it has are not searched, the ones saved to wineoutfile are added
+#   writer - (opt) winewriter run writer the wines are saved to wineoutfile through
+#
+# results are grouped by wine (in srchstring_list order) and within a wine by store (in storelist order)
+# regardless of the order in which the concurrent searches complete
+def get_wines_from_stores( srchstring_list, storelist, wineoutfile=None, workers=1, store_workers=1, session_pool=None, pool_size=None, cache=None, dedup_run=False, page_workers=None, max_pages=None, throttle=None, breaker=None, journal=None, writer=None, debug=False ):
     # grab the store defintions
     store_args = store_definitions()
 
+    # the requests to each store are paced
+    if throttle is None:
+        throttle = winethrottle.get_throttle()
+
+    # failing stores are skipped
+    if breaker is None:
+        breaker = winebreaker.create_breaker()
+
+    # paging overrides for the multi-page stores
+    for store in store_args:
+        if 'paging_args' in store_args[store]:
+            if page_workers is not None:
+                store_args[store]['paging_args']['page_workers'] = page_workers
+            if max_pages is not None:
+                store_args[store]['paging_args']['max_pages'] = max_pages
+
+    # the run level duplicate filter
+    dedup = create_dedup() if dedup_run else None
+
+    # the keep-alive sessions shared by all the searches in this run
+    close_pool = False
+    if session_pool is None:
+        session_pool = winehttp.create_session_pool( pool_size if pool_size else store_workers )
+        close_pool = True
+
     # create the list of records for each search string
     found_wines = []
 
@@ -395,52 +567,181 @@ def get_wines_from_stores( srchstring_list, storelist, wineoutfile=None, debug=F
     if debug: print('winerequest:get_wines_from_stores')
     logger.debug('srchstring_list:%s', srchstring_list)
     logger.debug('storelist:%s',storelist)
+    logger.debug('workers:%d:store_workers:%d', workers, store_workers)
+
+    # determine the stores we will actually search
+    search_stores = stores_to_search( storelist, store_args, debug=debug )
+
+    # serial processing - step through the search strings
+    if workers <= 1:
+        for srchstring in srchstring_list:
+            # step through the store list
+            winelist=[]
+            store_wines = {}
+            for store in search_stores:
+                store_wines[store] = get_wines_from_store( srchstring, store, store_args, session_pool, cache, dedup, throttle=throttle, breaker=breaker, journal=journal, debug=debug )
+                winelist.extend(store_wines[store])
+
+            # save this wine specific list into the overall list and file
+            done = functools.partial( winejournal.journal_record_wine, journal, srchstring, store_wines ) if journal else None
+            save_wines_found( srchstring, winelist, found_wines, wineoutfile, writer, done )
+
+        # report on and release the sessions we created
+        if close_pool:
+            winehttp.close_session_pool( session_pool )
+        if cache is not None:
+            winehttp.log_http_cache_stats( cache )
+        if dedup is not None:
+            logger.info('duplicate records suppressed for run:%d', dedup['suppressed'])
+        winethrottle.log_throttle_stats( throttle )
+        winebreaker.log_breaker_stats( breaker )
+
+        # when done with all store/wine lookups return the results
+        return found_wines
+
+    # concurrent processing
+    #
+    # each store gets store_workers lanes, each lane works through its share of the wines in order,
+    # so a store never sees more than store_workers searches at one time
+    store_workers = max(1, min(store_workers, len(srchstring_list)))
+    results = queue.Queue()
+    with concurrent.futures.ThreadPoolExecutor(max_workers=workers) as executor:
+        # interleave the lanes across stores so the first workers started hit different stores
+        for lane in range(store_workers):
+            for storeidx, store in enumerate(search_stores):
+                executor.submit( get_wines_from_store_lane, srchstring_list, lane, store_workers, storeidx, store, store_args, results, session_pool, cache, dedup, throttle, breaker, journal, debug )
+
+        # collect results as they arrive - but save them in the original wine/store order
+        found_grid = [[None]*len(search_stores) for srchstring in srchstring_list]
+        missing = [len(search_stores)]*len(srchstring_list)
+        next_wine = 0
+        for count in range(len(srchstring_list)*len(search_stores)):
+            (wineidx, storeidx, winelist) = results.get()
+            found_grid[wineidx][storeidx] = winelist
+            missing[wineidx] -= 1
+
+            # save each wine, in order, once all stores have reported for it
+            while next_wine < len(srchstring_list) and not missing[next_wine]:
+                winelist = []
+                for storelist_found in found_grid[next_wine]:
+                    winelist.extend(storelist_found)
+                done = functools.partial( winejournal.journal_record_wine, journal, srchstring_list[next_wine], dict( zip( search_stores, found_grid[next_wine] ) ) ) if journal else None
+                save_wines_found( srchstring_list[next_wine], winelist, found_wines, wineoutfile, writer, done )
+                found_grid[next_wine] = None
+                next_wine += 1
+
+    # report on and release the sessions we created
+    if close_pool:
+        winehttp.close_session_pool( session_pool )
+    if cache is not None:
+        winehttp.log_http_cache_stats( cache )
+    if dedup is not None:
+        logger.info('duplicate records suppressed for run:%d', dedup['suppressed'])
+    winethrottle.log_throttle_stats( throttle )
+    winebreaker.log_breaker_stats( breaker )
 
-    # step through the search strings
-    for srchstring in srchstring_list:
-        # step through the store list
-        winelist=[]
-        for store in storelist:
-            # debugging
-            if debug: print('winerequest.py:get_wines_from_stores:store:',store)
-            logger.debug('store:%s', store)
-            try:
-                # processing logic
-                if store == 'nhliquor':
-                    winelist.extend(nhliquor_wine_searcher( srchstring, debug=debug ))
-                elif store == 'ken': # 'johnpete':
-                    # this is not working right now
-                    if pmsg: print('winerequest:get_wines_from_stores:', store, ':SKIPPING store - not working')
-                    logger.info('SKIPPING store - not working:%s', store)
-                elif store in store_args:
-                    winelist.extend(generic_wine_searcher( srchstring, store, store_args, debug=debug ))
-                else:
-                    if pmsg: print('winerequest.py:get_wines_from_stores:store not in store_definition:SKIPPING')
-                    logger.info('SKIPPING:store not in store_definition:%s', store)
-                    break
-            except Exception as e:
-                if pmsg: print('winerequest:get_wines_from_stores:exception:', str(e))
-                logger.error('store:%s:error:%s', store, str(e))
-            
-            # messaging on wines found
-            if len(winelist)==1 and winelist[0] == wineselenium.returnNoWineFound( store ):
-                if debug: print('winerequest.py:', store, ':', srchstring, ':returned records:', 0)
-                logger.info('store:%s:returned records:%d', store, 0)
-            else:
-                if debug: print('winerequest.py:', store, ':', srchstring, ':returned records:', len(winelist))
-                logger.info('store:%s:returned records:%d', store, len(winelist))
+    # when done with all store/wine lookups return the results
+    return found_wines
 
-        # save this wine specific list into the overall list
-        found_wines.extend(winelist)
-        
-        # for each wine - all stores - save to file
-        if wineoutfile and winelist:
-            logger.debug('saving list of wines to file:%s',wineoutfile)
-            wineselenium.save_wines_to_file(wineoutfile, srchstring, winelist)
 
+# build the list of stores that get_wines_from_stores will search - we stop at the first
+# store we have no definition for (as we always have) and skip stores flagged as not working
+def stores_to_search( storelist, store_args, debug=False ):
+    search_stores = []
+    for store in storelist:
+        if store == 'ken': # 'johnpete':
+            # this is not working right now
+            if pmsg: print('winerequest:get_wines_from_stores:', store, ':SKIPPING store - not working')
+            logger.info('SKIPPING store - not working:%s', store)
+        elif store == 'nhliquor' or store in store_args:
+            search_stores.append(store)
+        else:
+            if pmsg: print('winerequest.py:get_wines_from_stores:store not in store_definition:SKIPPING')
+            logger.info('SKIPPING:store not in store_definition:%s', store)
+            break
+    return search_stores
+
+
+# search one store for one wine - an exception in a store is logged and the store returns no records
+# so that a failing store does not stop the search of other stores
+#
+# when a breaker is passed the result is recorded against the store, and a store whose breaker
+# is open is not searched (returns no records)
+#
+# when a journal is passed a store that already finished this wine today is not searched (returns no records)
+def get_wines_from_store( srchstring, store, store_args, session_pool=None, cache=None, dedup=None, throttle=None, breaker=None, journal=None, debug=False ):
+    winelist = []
+
+    # this store finished this wine before the restart
+    if journal is not None and winejournal.journal_done( journal, srchstring, store ):
+        logger.info('store:%s:%s:skipped - already in journal', store, srchstring)
+        return winelist
+
+    # skip a store that keeps failing
+    if breaker is not None and not winebreaker.breaker_allow( breaker, store ):
+        if debug: print('winerequest.py:get_wines_from_stores:store:', store, ':SKIPPING - breaker open')
+        logger.info('store:%s:%s:skipped - breaker open', store, srchstring)
+        return winelist
+
+    # debugging
+    if debug: print('winerequest.py:get_wines_from_stores:store:',store)
+    logger.debug('store:%s', store)
+    start = time.monotonic()
+    ok = True
+    try:
+        # the keep-alive session for this store
+        session = None
+        if session_pool is not None:
+            session = winehttp.get_store_session( session_pool, store, store_args[store]['search_args'].get('UserAgent') )
+
+        # processing logic
+        if store == 'nhliquor':
+            winelist = nhliquor_wine_searcher( srchstring, session=session, cache=cache, dedup=dedup, throttle=throttle, **store_args[store]['paging_args'], debug=debug )
+        else:
+            winelist = generic_wine_searcher( srchstring, store, store_args, session=session, cache=cache, dedup=dedup, throttle=throttle, debug=debug )
+    except Exception as e:
+        if pmsg: print('winerequest:get_wines_from_stores:exception:', str(e))
+        logger.error('store:%s:error:%s', store, str(e))
+        winelist = []
+        ok = False
+
+    # how did the store do
+    if breaker is not None:
+        winebreaker.breaker_record( breaker, store, ok, time.monotonic() - start )
+
+    # messaging on wines found
+    if len(winelist)==1 and winelist[0] == wineselenium.returnNoWineFound( store ):
+        if debug: print('winerequest.py:', store, ':', srchstring, ':returned records:', 0)
+        logger.info('store:%s:returned records:%d', store, 0)
+    else:
+        if debug: print('winerequest.py:', store, ':', srchstring, ':returned records:', len(winelist))
+        logger.info('store:%s:returned records:%d', store, len(winelist))
+
+    return winelist
+
+
+# concurrent worker - search one store for every store_workers'th wine starting at lane
+# and put (wineidx, storeidx, winelist) on the results queue for each wine
+def get_wines_from_store_lane( srchstring_list, lane, store_workers, storeidx, store, store_args, results, session_pool=None, cache=None, dedup=None, throttle=None, breaker=None, journal=None, debug=False ):
+    for wineidx in range(lane, len(srchstring_list), store_workers):
+        winelist = []
+        try:
+            winelist = get_wines_from_store( srchstring_list[wineidx], store, store_args, session_pool, cache, dedup, throttle, breaker, journal, debug=debug )
+        finally:
+            # always report back - the collector is counting on one result per wine/store
+            results.put( (wineidx, storeidx, winelist) )
 
-    # when done with all store/wine lookups return the results
-    return found_wines
+
+# add the wines found for a search string to the overall list and save them to file
+#   writer - (opt) run writer (see winewriter) - done is called once the wines are flushed to the file
+def save_wines_found( srchstring, winelist, found_wines, wineoutfile=None, writer=None, done=None ):
+    # save this wine specific list into the overall list
+    found_wines.extend(winelist)
+
+    # for each wine - all stores - save to file
+    if wineoutfile and winelist:
+        logger.debug('saving list of wines to file:%s',wineoutfile)
+        wineselenium.save_wines_to_file(wineoutfile, srchstring, winelist, writer=writer, done=done)
 
 
 
@@ -456,10 +757,15 @@ def get_wines_from_stores( srchstring_list, storelist, wineoutfile=None, debug=F
 def search_list_for(search_re, file_aref, ptr, not_find_1st_re=None, no_bottom=False, debug=False):
 
     # globals need to defined?
-    global glb_last_line_check
-    global glb_last_line_count
     global glb_last_line_max
 
+    # per line trace only for the pages we trace (see winetrace)
+    trace = winetrace.tracing()
+
+    # loop detection state is kept per thread - stores may be searched concurrently
+    glb_last_line_check = getattr(glb_line_check, 'last_line_check', -1)
+    glb_last_line_count = getattr(glb_line_check, 'last_line_count', 0)
+
     # Assume we will match, and reset if we don't
     match = 1;
 
@@ -481,24 +787,26 @@ def search_list_for(search_re, file_aref, ptr, not_find_1st_re=None, no_bottom=F
             if debug: print( "winerequest:search_list_for:Reprocessed the line [%s] more than [%s] times" % (ptr, glb_last_line_max) )
             if debug: print( "winerequest:search_list_for:Searching for [%s]" % search_re)
             if debug: print( 'winerequest:search_list_for:file_aref:', file_aref )
-            logger.debug('Searching for:%s', search_re)
-            logger.debug('Reprocessed the line:%d:more than:%d:times:return None', ptr, glb_last_line_max)
+            if trace: logger.debug('Searching for:%s', search_re)
+            if trace: logger.debug('Reprocessed the line:%d:more than:%d:times:return None', ptr, glb_last_line_max)
+            glb_line_check.last_line_count = glb_last_line_count
             return (0,0, None)
 
     else:
         # first time we see this lie
         glb_last_line_check = ptr
         glb_last_line_count = 0
+        glb_line_check.last_line_check = glb_last_line_check
 
     # define a displayable line number
     iptr = "%04d" % ptr
 
     # debugging
     if debug: print( "s%s:search for:%s" % (iptr,search_re) )
-    logger.debug( 's%s:search for:%s',iptr,search_re )
+    if trace: logger.debug( 's%s:search for:%s',iptr,search_re )
     if not_find_1st_re:
         if debug: print( "n%s:not_first:%s" % (iptr,not_find_1st_re) )
-        logger.debug( "n%s:not_first:%s", iptr,not_find_1st_re )
+        if trace: logger.debug( "n%s:not_first:%s", iptr,not_find_1st_re )
 
     
     # step through records until we find the string or end of file (make this an re.search or re.search)
@@ -506,13 +814,13 @@ def search_list_for(search_re, file_aref, ptr, not_find_1st_re=None, no_bottom=F
 
 	# debugging
         if debug: print( "s%s:%s" % (iptr, file_aref[ptr]) )
-        logger.debug( "s%s:%s", iptr, file_aref[ptr] )
+        if trace: logger.debug( "s%s:%s", iptr, file_aref[ptr] )
             
 	# failed to find it if we have out run the array
         if ptr >= list_len:
             # debugging
             if debug: print( "f%s:FAILED-HIT-BOTTOM" % iptr )
-            logger.debug( "f%s:FAILED-HIT-BOTTOM", iptr )
+            if trace: logger.debug( "f%s:FAILED-HIT-BOTTOM", iptr )
             
             # reset flags and pointers
             match = 0
@@ -526,7 +834,7 @@ def search_list_for(search_re, file_aref, ptr, not_find_1st_re=None, no_bottom=F
 
             # debugging
             if debug: print( "r%s:%s" % (iptr, file_aref[ptr])  )
-            logger.debug( "r%s:%s", iptr, file_aref[ptr]  )
+            if trace: logger.debug( "r%s:%s", iptr, file_aref[ptr]  )
 
             # we are done processing for now - send results back up
             break
@@ -538,8 +846,8 @@ def search_list_for(search_re, file_aref, ptr, not_find_1st_re=None, no_bottom=F
                 # debugging
                 if debug: print( "s%s:%s" % (iptr, file_aref[ptr]) )
                 if debug: print( "f%s:FAILED-NOT-FIND-1ST" % (iptr) )
-                logger.debug( "s%s:%s", iptr, file_aref[ptr]  )
-                logger.debug( "f%s:FAILED-NOT-FIND-1ST", (iptr) )
+                if trace: logger.debug( "s%s:%s", iptr, file_aref[ptr]  )
+                if trace: logger.debug( "f%s:FAILED-NOT-FIND-1ST", (iptr) )
                 
                 # set the pointers as we did not find the desire string
                 match = 0;
@@ -550,7 +858,7 @@ def search_list_for(search_re, file_aref, ptr, not_find_1st_re=None, no_bottom=F
 
                 # debugging
                 if debug: print( "r%s:%s" % (iptr, file_aref[ptr])  )
-                logger.debug( "r%s:%s", iptr, file_aref[ptr]  )
+                if trace: logger.debug( "r%s:%s", iptr, file_aref[ptr]  )
 
                 # reset glb_last_line_count
                 glb_last_line_count = 0;
@@ -568,20 +876,23 @@ def search_list_for(search_re, file_aref, ptr, not_find_1st_re=None, no_bottom=F
     
     # debugging
     if debug: print( 'search_list_for:end of wend loop:match:', match  )
-    logger.debug( 'end of wend loop:match:%s', match  )
+    if trace: logger.debug( 'end of wend loop:match:%s', match  )
 
     # check to see if we found what we were looking for
     if match:
         if debug: print( "m%s:%s" % (iptr, file_aref[ptr]) )
-        logger.debug( "m%s:%s", iptr, file_aref[ptr] )
+        if trace: logger.debug( "m%s:%s", iptr, file_aref[ptr] )
     else:
         if debug: print( "l%s:%s" % (iptr, file_aref[ptr]) )
-        logger.debug( "l%s:%s", iptr, file_aref[ptr] )
+        if trace: logger.debug( "l%s:%s", iptr, file_aref[ptr] )
 
 
     # reset glb_last_line_count, we found what we want
     glb_last_line_count = 0;
 
+    # save the loop detection state for this thread
+    glb_line_check.last_line_count = glb_last_line_count
+
     # we must have found it, return the line number
     return (ptr, match, search_re.search( file_aref[ptr]))
 
@@ -625,10 +936,407 @@ def price_cleanup(price):
 #    re_prices - (opt) - list of re.compile statements - used to extract the price from the file line containing the name
 #                if not populated we use re_price_start to extract out the price as group(1)
 #
+#
+# the parser args are compiled once per store definition (see compile_wine_parser) and the page is
+# walked forward with no module global state, so stores can be parsed concurrently
+#
 def generic_wine_parser( file_list, label, re_name_start, re_name_end=None, re_name_skip=None, re_name_multi=None, re_name_groups=None, re_names=None, re_size_start=None, re_size_skip=None, re_sizes=None, re_size_end=None, re_price_start=None, re_price_end=None, re_price_skip=None, re_start=None, re_prices=None, debug=False):
+    # get the compiled version of this parser definition
+    parser = compile_wine_parser( label, re_name_start, re_name_end=re_name_end, re_name_skip=re_name_skip, re_name_multi=re_name_multi,
+                                  re_name_groups=re_name_groups, re_names=re_names, re_size_start=re_size_start, re_size_skip=re_size_skip,
+                                  re_sizes=re_sizes, re_size_end=re_size_end, re_price_start=re_price_start, re_price_end=re_price_end,
+                                  re_price_skip=re_price_skip, re_start=re_start, re_prices=re_prices )
+
+    # and run it against this page
+    return run_wine_parser( parser, file_list, debug=debug )
+
+
+# compile a store parser definition (the parser_args from store_definitions) into the structure
+# used by run_wine_parser - compiled parsers are cached so each store definition is compiled once
+#
+# each regex used to find a line (re_*_start, re_*_end, re_start) is paired with the literal text
+# that every match must contain - so a page is only regex searched on the lines that hold that text
+def compile_wine_parser( label, re_name_start, re_name_end=None, re_name_skip=None, re_name_multi=None, re_name_groups=None, re_names=None, re_size_start=None, re_size_skip=None, re_sizes=None, re_size_end=None, re_price_start=None, re_price_end=None, re_price_skip=None, re_start=None, re_prices=None ):
+    # the key to the compiled parser cache - lists become tuples so they can be hashed
+    cachekey = tuple( (key, tuple(value) if isinstance(value, list) else value) for (key, value) in sorted(locals().items()) )
+    if cachekey in glb_compiled_parsers:
+        return glb_compiled_parsers[cachekey]
+
+    parser = {
+        'label'          : label,
+        'start'          : compile_line_locator( re_start ),
+        'name_start'     : compile_line_locator( re_name_start ),
+        'name_end'       : compile_line_locator( re_name_end ),
+        'name_skip'      : re_name_skip,
+        'name_multi'     : re_name_multi,
+        'name_groups'    : re_name_groups,
+        'names'          : re_names,
+        'size_start'     : compile_line_locator( re_size_start ),
+        'size_end'       : compile_line_locator( re_size_end ),
+        'size_skip'      : re_size_skip,
+        'sizes'          : re_sizes,
+        'price_start'    : compile_line_locator( re_price_start ),
+        'price_end'      : compile_line_locator( re_price_end ),
+        'price_skip'     : re_price_skip,
+        'prices'         : re_prices,
+    }
+
+    # debugging
+    logger.debug('compiled parser:%s:literals:%s', label, [(key, parser[key]['literal']) for key in parser if isinstance(parser[key], dict)])
+
+    # save it for the next page
+    glb_compiled_parsers[cachekey] = parser
+    return parser
+
+
+# convert a regex used to find a line into a locator - the regex and its required literal
+def compile_line_locator( regex ):
+    if regex is None:
+        return None
+
+    literal = regex_required_literal( regex )
+    ignorecase = bool(regex.flags & re.IGNORECASE)
+    if ignorecase:
+        literal = literal.lower()
+
+    return { 'regex' : regex, 'literal' : literal, 'ignorecase' : ignorecase }
+
+
+# find the longest run of literal characters that every match of a compiled regex must contain
+# returns '' when there is no such run (e.g. the regex is an alternation)
+def regex_required_literal( regex ):
+    # locale dependent matching - we can not reason about case
+    if regex.flags & re.LOCALE:
+        return ''
+
+    try:
+        parsed = sre_parse.parse( regex.pattern, regex.flags )
+    except Exception:
+        return ''
+
+    runs = []
+    _regex_literal_runs( list(parsed), runs )
+    return max( runs, key=len ) if runs else ''
+
+
+# walk the top level of a parsed regex (and its plain groups) collecting runs of literal characters
+def _regex_literal_runs( items, runs ):
+    run = ''
+    for (op, av) in items:
+        if op is sre_parse.LITERAL:
+            run += chr(av)
+            continue
+        runs.append(run)
+        run = ''
+        # groups are always matched - look inside unless they change the flags
+        if op is sre_parse.SUBPATTERN and not av[1] and not av[2]:
+            _regex_literal_runs( list(av[3]), runs )
+    runs.append(run)
+
+
+# run a compiled parser (see compile_wine_parser) against a page that was split into lines
+# returns the list of wine records found, or the no wine found record
+def run_wine_parser( parser, file_list, debug=False ):
+    label    = parser['label']
+    list_len = len(file_list)
+    page     = { 'lines' : file_list, 'hits' : {}, 'text' : None, 'regex_calls' : 0 }
+    trace    = winetrace.start_page( label )
+
+    i=0
+    last_i = 0
+    results = []
+    seen = set()        # wine_record_key of each record in results
+    suppressed = 0
+
+    #if we were given a start, then move through the file until we find that record
+    if parser['start']:
+        (i,found) = _page_scan( page, parser['start'], None, i )
+        if found:
+            last_i = i
+        else:
+            if pmsg: print('winerequest:run_wine_parser:did not find requested starting area - terminating:', parser['start']['regex'])
+            logger.warning('did not find requested starting area - terminating:%s', parser['start']['regex'])
+            return []
+
+    # debugging
+    if debug: print('winerequest:run_wine_parser:searching store:', label)
+    logger.debug('searching store:%s', label)
+
+    # loop through the lines in this file
+    while i < list_len:
+        # create the starting dict
+        record = {
+            'label' : label,
+            'wine_store' : label,
+            'wine_year'  : '',
+        }
+
+        ####  WINE NAME #####
+        (i,found) = _page_scan( page, parser['name_start'], parser['name_end'], i )
+        if not found:
+            # debugging
+            if not results:
+                if debug:  print('winerequest:run_wine_parser:did not find wine name')
+                if trace: logger.debug('did not find wine name')
+            break
+
+        # capture the name line we just saw
+        last_i = i
+
+        # if set to skip lines then skip lines
+        if parser['name_skip']:
+            i += parser['name_skip']
+            if i >= list_len: continue
+
+        # save this in the record
+        if not parser['names']:
+            record['wine_name'] = _wine_name_from_match( found, parser['name_groups'] )
+        else:
+            # search through the list of comparisons to find a match
+            for re_name in parser['names']:
+                page['regex_calls'] += 1
+                found = re_name.search( file_list[i] )
+                if found:
+                    record['wine_name'] = _wine_name_from_match( found, parser['name_groups'] )
+                    break
+            # check to see we found a name, and if not skip this section
+            if 'wine_name' not in record:
+                i += 1
+                if trace: logger.debug('did not find a wine name - skipping and looking again at line:%d', i)
+                continue
+
+            # WINECONN # - name runs across lines until we find the <
+            if parser['name_multi']:
+                record['wine_name'] = record['wine_name'].replace('<br>', ' ')
+                while record['wine_name'].find('<') == -1 and i+1 < list_len:
+                    i += 1
+                    record['wine_name'] = record['wine_name'] + ' ' + file_list[i].replace('<br>', ' ')
+                record['wine_name'] = record['wine_name'].replace('<', '')
+
+        # make sure the name is trimmed
+        record['wine_name'] = record['wine_name'].strip()
+
+        # extract the wine year from the name if it exists
+        record['wine_year'] = _extract_year_from_name( record['wine_name'] )
+
+        # move one line to then look for sign
+        i += 1
+
+        ### WINE SIZE ###
+        if parser['size_start']:
+            (i,found) = _page_scan( page, parser['size_start'], parser['size_end'], i )
+            if not found:
+                # debugging
+                if not results:
+                    if debug: print('winerequest:run_wine_parser:did not find wine size')
+                    if trace: logger.debug('did not find wine size')
+                break
+
+            # capture the size line we just saw
+            last_i = i
+
+            # if set to skip lines then skip lines
+            if parser['size_skip']:
+                i += parser['size_skip']
+                if i >= list_len: continue
+
+            # add the size to the name
+            if parser['sizes']:
+                for re_size in parser['sizes']:
+                    page['regex_calls'] += 1
+                    found = re_size.search( file_list[i] )
+                    if found:
+                        record['wine_name'] += ' ' + found.group(1)
+                        break
+
+        ### WINE PRICE ####
+        (i,found) = _page_scan( page, parser['price_start'], parser['price_end'], i )
+
+        # did not find a match - so skip this record
+        if not found:
+            i += 1
+            if trace: logger.debug('did not find wine price - skipping this record and continued search at line:%d', i)
+            continue
+
+        # if set to skip lines then skip lines
+        if parser['price_skip']:
+            i += parser['price_skip']
+            if i >= list_len: continue
+
+        # capture the found price
+        if not parser['prices']:
+            record['wine_price'] = price_cleanup( found.group(1) )
+        else:
+            # search through the list of comparisons to find a match
+            for re_price in parser['prices']:
+                page['regex_calls'] += 1
+                found = re_price.search( file_list[i] )
+                if found:
+                    record['wine_price'] = price_cleanup( found.group(1) )
+                    break
+            # check to see we found a price, and if not skip this section
+            if 'wine_price' not in record:
+                i += 1
+                if trace: logger.debug('did not match any wine price regex - skipping and looking again at line:%d', i)
+                continue
+
+        # debugging
+        if debug: print('winerequest:run_wine_parser:record:', record)
+        if trace: logger.debug('record:%s', record)
+
+        # save this record to results - if it is not already in there
+        record_key = wine_record_key( record )
+        if record_key not in seen:
+            seen.add( record_key )
+            results.append(record)
+        else:
+            suppressed += 1
+            if trace: logger.debug('duplicate record not saved:%s', record)
+
+        # all information was on one line, and we don't want to find this line again so increment
+        if i == last_i:
+            i += 1
+
+    # debugging
+    logger.debug('%s:lines:%d:regex calls:%d:records:%d', label, list_len, page['regex_calls'], len(results))
+    if suppressed:
+        logger.info('%s:duplicate records suppressed:%d', label, suppressed)
+
+    # check to see if we got any results
+    if not results:
+        return wineselenium.returnNoWineFound( label )
+
+    # looped through the file return the results
+    return results
+
+
+# the key that identifies a wine record - records with the same key are duplicates
+def wine_record_key( record ):
+    return ( record['wine_store'], record['wine_name'], record['wine_price'], record['wine_year'] )
+
+
+# create the run level duplicate record filter - pass it to get_wines_from_stores as dedup
+# to drop records already returned earlier in the run (across pages and across search strings)
+def create_dedup():
+    return { 'seen' : set(), 'suppressed' : 0, 'lock' : threading.Lock() }
+
+
+# remove the records we already returned in this run
+#
+# returns the records not seen before - when every record was seen before we return an empty
+# list (not the no wine found record - we did find wines, they were just reported already)
+def dedup_wine_records( records, dedup, label ):
+    if dedup is None or not records or records == wineselenium.returnNoWineFound( label ):
+        return records
+
+    newrecords = []
+    with dedup['lock']:
+        for record in records:
+            record_key = wine_record_key( record )
+            if record_key in dedup['seen']:
+                dedup['suppressed'] += 1
+                continue
+            dedup['seen'].add( record_key )
+            newrecords.append( record )
+
+    # debugging
+    if len(newrecords) != len(records):
+        logger.info('%s:duplicate records suppressed for run:%d', label, len(records) - len(newrecords))
+
+    return newrecords
+
+
+# build the wine name from the match - either group(1) or the groups listed in name_groups
+def _wine_name_from_match( found, name_groups ):
+    if name_groups:
+        wine_name = ''
+        for grpnum in name_groups:
+            wine_name = wine_name + ' ' + found.group(grpnum)
+        return wine_name
+    return found.group(1)
+
+
+# find the first line at or after ptr that matches the locator start - unless a line matching
+# locator stop comes first (start wins when both are on the same line)
+#
+# returns (line, match) when found - or (ptr, None) when not found
+def _page_scan( page, start, stop, ptr ):
+    (start_lines, start_matches) = _page_locator_hits( page, start )
+    idx = bisect.bisect_left( start_lines, ptr )
+    found_line = start_lines[idx] if idx < len(start_lines) else None
+
+    if stop:
+        stop_lines = _page_locator_hits( page, stop )[0]
+        idx = bisect.bisect_left( stop_lines, ptr )
+        if idx < len(stop_lines) and (found_line is None or stop_lines[idx] < found_line):
+            return (ptr, None)
+
+    if found_line is None:
+        return (ptr, None)
+
+    return (found_line, start_matches[found_line])
+
+
+# determine (once per page) every line a locator regex matches
+#
+# returns (sorted list of line numbers, dict of line number to match)
+def _page_locator_hits( page, locator ):
+    hits = page['hits'].get( locator['regex'] )
+    if hits is not None:
+        return hits
+
+    lines = page['lines']
+    candidates = range(len(lines))
+
+    # only lines holding the required literal can match
+    if locator['literal']:
+        if page['text'] is None:
+            page['text'] = '\n'.join(lines)
+            page['starts'] = list(itertools.accumulate( [0] + [len(line)+1 for line in lines[:-1]] ))
+        text = page['text']
+        if locator['ignorecase']:
+            # case folding can change the length of non ascii text - only fold ascii pages
+            if text.isascii():
+                if 'lower' not in page:
+                    page['lower'] = text.lower()
+                text = page['lower']
+            else:
+                text = None
+        if text is not None:
+            candidates = []
+            starts = page['starts']
+            pos = text.find( locator['literal'] )
+            while pos != -1:
+                line = bisect.bisect_right( starts, pos ) - 1
+                candidates.append( line )
+                if line+1 >= len(starts):
+                    break
+                pos = text.find( locator['literal'], starts[line+1] )
+
+    # now regex the candidate lines
+    regex = locator['regex']
+    hit_lines = []
+    hit_matches = {}
+    for line in candidates:
+        page['regex_calls'] += 1
+        found = regex.search( lines[line] )
+        if found:
+            hit_lines.append( line )
+            hit_matches[line] = found
+
+    page['hits'][regex] = (hit_lines, hit_matches)
+    return page['hits'][regex]
+
+
+# original line scanning parser (built on search_list_for) - kept so the results of
+# generic_wine_parser can be compared back to it
+def generic_wine_parser_legacy( file_list, label, re_name_start, re_name_end=None, re_name_skip=None, re_name_multi=None, re_name_groups=None, re_names=None, re_size_start=None, re_size_skip=None, re_sizes=None, re_size_end=None, re_price_start=None, re_price_end=None, re_price_skip=None, re_start=None, re_prices=None, debug=False):
 
     # might need to add in logic to extract out the wine bottle size into this parser (2018-09-26) - done 2020-05-13
-    
+
+    # per line trace only for the pages we trace (see winetrace)
+    trace = winetrace.start_page( label )
+
     i=0
     list_len = len(file_list)
     last_i = 0
@@ -669,7 +1377,7 @@ def generic_wine_parser( file_list, label, re_name_start, re_name_end=None, re_n
             # debugging
             if not results:
                 if debug:  print('winerequest:generic_wine_parser:did not find wine name')
-                logger.debug('did not find wine name')
+                if trace: logger.debug('did not find wine name')
             break
 
         # capture the name line we just saw
@@ -680,8 +1388,8 @@ def generic_wine_parser( file_list, label, re_name_start, re_name_end=None, re_n
             i += re_name_skip
             # debugging
             if debug: print('re_name_skip:', re_name_skip, ':moved line counter to:', i)
-            logger.debug('re_name_skip:%d:moved line counter to:%d', re_name_skip, i)
-            logger.debug('%d:%s', i, file_list[i])
+            if trace: logger.debug('re_name_skip:%d:moved line counter to:%d', re_name_skip, i)
+            if trace: logger.debug('%d:%s', i, file_list[i])
             
             # check the counter
             if i >= list_len: continue
@@ -699,7 +1407,7 @@ def generic_wine_parser( file_list, label, re_name_start, re_name_end=None, re_n
                 record['wine_name'] = found.group(1)
             # debugging
             if debug: print('i:', i, ':name:', record['wine_name'])
-            logger.debug('i:%d:name:%s', i, record['wine_name'])
+            if trace: logger.debug('i:%d:name:%s', i, record['wine_name'])
         else:
             # search through the list of comparisons to find a match
             for re_name in re_names:
@@ -716,9 +1424,9 @@ def generic_wine_parser( file_list, label, re_name_start, re_name_end=None, re_n
                         record['wine_name'] = found.group(1)
                     # debugging
                     if debug: print('i:', i, ':name:', record['wine_name'], ':re_name:', re_name)
-                    logger.debug('i:%d:name:%s:re_name:%s', i, record['wine_name'], re_name)
+                    if trace: logger.debug('i:%d:name:%s:re_name:%s', i, record['wine_name'], re_name)
                     if debug: print('wine_name:', record['wine_name'])
-                    logger.debug('wine_name:%s', record['wine_name'])
+                    if trace: logger.debug('wine_name:%s', record['wine_name'])
                     break
             # check to see we found a name, and if not skip this section
             if 'wine_name' not in record:
@@ -726,7 +1434,7 @@ def generic_wine_parser( file_list, label, re_name_start, re_name_end=None, re_n
                 i += 1
                 # debugging
                 if debug: print('winerequest:generic_wine_parser:did not find a wine name - skipping and looking again at line:', i)
-                logger.debug('did not find a wine name - skipping and looking again at line:%d', i)
+                if trace: logger.debug('did not find a wine name - skipping and looking again at line:%d', i)
                 # continue the search
                 continue
 
@@ -742,7 +1450,7 @@ def generic_wine_parser( file_list, label, re_name_start, re_name_end=None, re_n
                     i += 1
                     # debugging
                     if debug: print('i:', i, ':loading next line into name:', file_list[i])
-                    logger.debug('i:%d:loading next line into name:', i, file_list[i])
+                    if trace: logger.debug('i:%d:loading next line into name:', i, file_list[i])
                     # add this line (might want to trim the new line content)
                     record['wine_name'] = record['wine_name'] + ' ' + file_prt[i].replace('<br>', ' ')
 
@@ -770,7 +1478,7 @@ def generic_wine_parser( file_list, label, re_name_start, re_name_end=None, re_n
                 # debugging
                 if not results:
                     if debug: print('winerequest:generic_wine_parser:did not find wine size')
-                    logger.debug('did not find wine size')
+                    if trace: logger.debug('did not find wine size')
                 break
 
             # capture the name line we just saw
@@ -781,8 +1489,8 @@ def generic_wine_parser( file_list, label, re_name_start, re_name_end=None, re_n
                 i += re_size_skip
                 # debugging
                 if debug: print('re_size_skip:', re_size_skip, ':moved line counter to:', i)
-                logger.debug('re_size_skip:%d:moved line counter to:%d', re_size_skip, i)
-                logger.debug('%d:%s', i, file_list[i])
+                if trace: logger.debug('re_size_skip:%d:moved line counter to:%d', re_size_skip, i)
+                if trace: logger.debug('%d:%s', i, file_list[i])
                 
                 # check the counter
                 if i >= list_len: continue
@@ -797,7 +1505,7 @@ def generic_wine_parser( file_list, label, re_name_start, re_name_end=None, re_n
 
                         # debugging
                         if debug: print('i:', i, ':name:', record['wine_name'], ':re_size:', re_size)
-                        logger.debug('i:%d:name:%s:re_size:%s', i, record['wine_name'], re_size)
+                        if trace: logger.debug('i:%d:name:%s:re_size:%s', i, record['wine_name'], re_size)
                         break
                 
         ### WINE PRICE ####
@@ -811,7 +1519,7 @@ def generic_wine_parser( file_list, label, re_name_start, re_name_end=None, re_n
             i += 1
             # debugging
             if debug: print('winerequest:generic_wine_parser:did not find wine price - skipping this record and continued search at line:', i)
-            logger.debug('did not find wine price - skipping this record and continued search at line:%d', i)
+            if trace: logger.debug('did not find wine price - skipping this record and continued search at line:%d', i)
             continue
 
         # if set to skip lines then skip lines
@@ -821,8 +1529,8 @@ def generic_wine_parser( file_list, label, re_name_start, re_name_end=None, re_n
             if debug:
                 print('re_price_skip:%d', re_price_skip, ':moved line counter to:', i)
                 print(i, ':', file_list[i])
-            logger.debug('re_price_skip:%d:moved line counter to:%d', re_price_skip, i)
-            logger.debug('%d:%s', i, file_list[i])
+            if trace: logger.debug('re_price_skip:%d:moved line counter to:%d', re_price_skip, i)
+            if trace: logger.debug('%d:%s', i, file_list[i])
             # check the counter
             if i >= list_len: continue
 
@@ -831,7 +1539,7 @@ def generic_wine_parser( file_list, label, re_name_start, re_name_end=None, re_n
             record['wine_price'] = price_cleanup( found.group(1) )
             # debugging
             if debug: print('i:', i, ':price:', record['wine_price'])
-            logger.debug('i:%d:price:%s', i, record['wine_price'])
+            if trace: logger.debug('i:%d:price:%s', i, record['wine_price'])
         else:
             # search through the list of comparisons to find a match
             for re_price in re_prices:
@@ -840,16 +1548,16 @@ def generic_wine_parser( file_list, label, re_name_start, re_name_end=None, re_n
                     record['wine_price'] = price_cleanup( found.group(1) )
                     # debugging
                     if debug: print('i:', i, ':price:', record['wine_price'], ':re_price:', re_price)
-                    logger.debug('i:%d:price:%s:re_price:%s', i, record['wine_price'], re_price)
+                    if trace: logger.debug('i:%d:price:%s:re_price:%s', i, record['wine_price'], re_price)
                     break
                 else:
                     if debug: print('winerequest:generic_wine_parser:wine_price-not-match:', re_price)
-                    logger.debug('wine_price-not-match:%s', re_price)
+                    if trace: logger.debug('wine_price-not-match:%s', re_price)
             # check to see we found a name, and if not skip this section
             if 'wine_price' not in record:
                 i += 1
                 if debug: print('winerequest:generic_wine_parser:did not match any wine price regex - skipping and looking again at line:', i)
-                logger.debug('did not match any wine price regex - skipping and looking again at line:%d', i)
+                if trace: logger.debug('did not match any wine price regex - skipping and looking again at line:%d', i)
                 continue
             
         # debugging
@@ -859,11 +1567,11 @@ def generic_wine_parser( file_list, label, re_name_start, re_name_end=None, re_n
                 if name in record:
                     print(name, ':', record[name])
             print('------------------------------')
-        logger.debug('------------------------------')
+        if trace: logger.debug('------------------------------')
         for name in ['wine_name', 'wine_year', 'wine_price']:
             if name in record:
-                logger.debug('%s:%s', name, record[name])
-        logger.debug('------------------------------')
+                if trace: logger.debug('%s:%s', name, record[name])
+        if trace: logger.debug('------------------------------')
                 
         # save this record to results - if it is not already in there
         if record not in results:
@@ -871,7 +1579,7 @@ def generic_wine_parser( file_list, label, re_name_start, re_name_end=None, re_n
         else:
             if debug:
                 print('winerequest:generic_wine_parser:duplicate record not saved')
-            logger.debug('duplicate record not saved:%s', record)
+            if trace: logger.debug('duplicate record not saved:%s', record)
     
         # need to determine if want to increment here or not - we could just use the following
         # logic, that says if we are on the same line we found the wine_name on - then increment - otherwise don't
@@ -884,7 +1592,7 @@ def generic_wine_parser( file_list, label, re_name_start, re_name_end=None, re_n
             i += 1
             # debugging
             if debug: print('winerequest:generic_wine_parser:all information on the same line - increment the line counter:', i)
-            logger.debug('all information on the same line - increment the line counter:%d', i)
+            if trace: logger.debug('all information on the same line - increment the line counter:%d', i)
 
     # check to see if we got any results
     if not results:
@@ -909,12 +1617,16 @@ def generic_wine_splitter( content, re_splitters=None, debug=False ):
 
 
 # generic utility used to go to a page, enter search, parse results and return list of vlaues
-def generic_wine_searcher( srchstring, store, store_args, debug=False ):
+#   session - (opt) the keep-alive session for this store (see winehttp.get_store_session)
+#   cache - (opt) the http cache pages are read from/saved to (see winehttp.create_http_cache)
+#   dedup - (opt) run level duplicate filter (see create_dedup)
+#   throttle - (opt) winethrottle throttle that paces the requests to the store
+def generic_wine_searcher( srchstring, store, store_args, session=None, cache=None, dedup=None, throttle=None, debug=False ):
     
     # full test of the generic features
     if False:
         try:
-            content = generic_wine_content_searcher( srchstring, **store_args[store]['search_args'], debug=debug )
+            content = generic_wine_content_searcher( srchstring, **store_args[store]['search_args'], store=store, session=session, cache=cache, throttle=throttle, debug=debug )
         except:
             return []
     else:
@@ -922,7 +1634,7 @@ def generic_wine_searcher( srchstring, store, store_args, debug=False ):
         if debug:
             print('winerequest:generic_wine_searcher:store:', store)
         # want it to fail here so we can see the error
-        content = generic_wine_content_searcher( srchstring, **store_args[store]['search_args'], debug=debug )
+        content = generic_wine_content_searcher( srchstring, **store_args[store]['search_args'], store=store, session=session, cache=cache, throttle=throttle, debug=debug )
 
     # check the content - there may be nothing here - if so return blank array
     if not content:
@@ -932,20 +1644,30 @@ def generic_wine_searcher( srchstring, store, store_args, debug=False ):
     file_list = generic_wine_splitter( content, **store_args[store]['splitter_args'] )
     
     # pull out the the results
-    return generic_wine_parser(file_list, **store_args[store]['parser_args'], debug=debug)
+    results = generic_wine_parser(file_list, **store_args[store]['parser_args'], debug=debug)
+
+    # drop what we already returned in this run
+    return dedup_wine_records( results, dedup, store_args[store]['parser_args']['label'] )
 
 # generic utility used to take in a search string, and a url formatter that will place this
 # string into the URL and then use requests to get that URL
 # optionally, use the list of re_noresults to determine if no results were found
 # return back the content that will then be split and parsed
 #
-def generic_wine_content_searcher( srch_string, url_fmt, payload=None, payload_fld = None, re_noresults=None, UserAgent = None, debug=False ):
+# session - (opt) keep-alive session to send the request on - it already carries the store headers
+# store - (opt) the store we are searching - used to key the cache
+# cache - (opt) http cache (or fixture store) the page is read from/saved to
+#
+def generic_wine_content_searcher( srch_string, url_fmt, payload=None, payload_fld = None, re_noresults=None, UserAgent = None, store=None, session=None, cache=None, throttle=None, debug=False ):
 
     # create headers if we need to
     headers = None
-    if UserAgent:
+    if UserAgent and session is None:
         headers = {'User-agent' : UserAgent}
 
+    # send through the store session when we have one
+    http = session if session is not None else requests
+
     # action based on the type of information provided
     if payload:
         # POST a form transaction
@@ -956,7 +1678,8 @@ def generic_wine_content_searcher( srch_string, url_fmt, payload=None, payload_f
             logger.error('payload-populated:payload_fld-NOT-populated-ERROR')
             raise Exception('payload_fld not populated')
         else:
-            # put the search string into the payload
+            # put the search string into a copy of the payload - the store definition is shared across searches
+            payload = dict(payload)
             payload[payload_fld] = srch_string
 
         # just create the url in the right string point
@@ -970,8 +1693,7 @@ def generic_wine_content_searcher( srch_string, url_fmt, payload=None, payload_f
         logger.debug('payload-payload:%s', payload)
 
         # now we create the post request
-        session = requests.session()
-        r = requests.post( url_final, payload, headers=headers )
+        r = winehttp.cached_request( http, 'POST', url_final, store if store else url_fmt, payload=payload, headers=headers, cache=cache, srchstring=srch_string, throttle=throttle )
     else:
         # GET a page transaction
         #
@@ -984,7 +1706,7 @@ def generic_wine_content_searcher( srch_string, url_fmt, payload=None, payload_f
         logger.debug('get_url:%s', url_final)
 
         # get the page
-        r = requests.get( url_final, headers=headers )
+        r = winehttp.cached_request( http, 'GET', url_final, store if store else url_fmt, headers=headers, cache=cache, srchstring=srch_string, throttle=throttle )
 
     # check the status code - if invalid raise error
     if r.status_code != 200:
@@ -1008,7 +1730,14 @@ def generic_wine_content_searcher( srch_string, url_fmt, payload=None, payload_f
 
 #---------------------------------------------------------------------------
 
-def nhliquor_wine_searcher( srchstring, debug=False ):
+# search nhliquor - results come back across up to max_pages pages
+#
+#   page_workers - number of pages fetched at the same time - page 1 is always fetched first
+#                  as it tells us whether there are results and how many pages there are
+#   max_pages - the most pages we read
+#
+# each page is decoded once and parsed as it arrives - the records are returned in page order
+def nhliquor_wine_searcher( srchstring, session=None, cache=None, dedup=None, throttle=None, page_workers=1, max_pages=4, debug=False ):
 
     label = 'NHLiq'
 
@@ -1016,59 +1745,272 @@ def nhliquor_wine_searcher( srchstring, debug=False ):
     url_fmt = 'http://www.liquorandwineoutlets.com/products?page=%s&search=%s'
     re_noresults = [ re.compile('no products that match'), ]
 
+    # the links to other pages of results
+    re_page = re.compile( r'page=(\d+)&search=' + re.escape(srchstring) )
+
     # local variables
-    results = []
-    
-    # loop through all the pages that might have results
-    for page in range(1,5):
-        # GET a page transaction
-        #
-        # calculate the final url
-        url_final = url_fmt % (page, srchstring)
+    http = session if session is not None else requests
+    pages = {}
+
+    # page 1 - check that there are results
+    html = nhliquor_page( http, url_fmt, srchstring, 1, cache, throttle, debug=debug )
+    for re_noresult in re_noresults:
+        if re_noresult.search( html ):
+            if debug: print('nhliquor_wine_searcher:url_final:', url_fmt % (1, srchstring), ':no_result:', re_noresult)
+            logger.debug('nhliquor_wine_searcher:url_final:%s:no_result:%s', url_fmt % (1, srchstring), re_noresult)
+            return wineselenium.returnNoWineFound( label )
+    pages[1] = nhliquor_main_parser( html, label, debug=debug )
+    last_page = nhliquor_last_page( html, re_page, 1, max_pages )
+
+    # the remaining pages - a page can link to pages past the ones page 1 showed
+    # so we keep going until the pages we read do not take us any further
+    fetched = 1
+    while fetched < last_page:
+        pagelist = list(range(fetched+1, last_page+1))
+        if pmsg: print('nhliquor_wine_searcher:',srchstring,':retreiving pages:',pagelist)
+        logger.info('%s:retreiving pages:%s',srchstring, pagelist)
+
+        if page_workers > 1 and len(pagelist) > 1:
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(page_workers, len(pagelist))) as executor:
+                futures = { executor.submit( nhliquor_page, http, url_fmt, srchstring, page, cache, throttle, debug ) : page for page in pagelist }
+                for future in concurrent.futures.as_completed( futures ):
+                    html = future.result()
+                    pages[futures[future]] = nhliquor_main_parser( html, label, debug=debug )
+                    last_page = nhliquor_last_page( html, re_page, last_page, max_pages )
+        else:
+            for page in pagelist:
+                html = nhliquor_page( http, url_fmt, srchstring, page, cache, throttle, debug=debug )
+                pages[page] = nhliquor_main_parser( html, label, debug=debug )
+                last_page = nhliquor_last_page( html, re_page, last_page, max_pages )
 
-        # debugging
-        if debug: print('nhliquor_wine_searcher:url_final:', url_final)
-        
+        fetched = pagelist[-1]
 
-        # get the page
-        r = requests.get( url_final )
-        
-        # check the status code - if invalid raise error
-        if r.status_code != 200:
-            if pmsg: print('nhliquor_wine_searcher:url_final:', url_final, ':status_code:', r.status_code)
-            logger.warning('nhliquor_wine_searcher:url_final:%s:status_code:%s', url_final, r.status_code)
-            raise
-        
-        # check to see if there were any results
-        if re_noresults:
-            for re_noresult in re_noresults:
-                if re_noresult.search( r.text ):
-                    if debug: print('nhliquor_wine_searcher:url_final:', url_final, ':no_result:', re_noresult)
-                    logger.debug('nhliquor_wine_searcher:url_final:%s:no_result:%s', url_final, re_noresult)
-                    return wineselenium.returnNoWineFound( label )
-
-        # return the ASCII web page content
-        results.extend(nhliquor_main_parser(r.content.decode('ascii', 'ignore'), label, debug=debug))
-
-        # check to see if we are done - does page have a link to this next page 
-        new_url = 'page=%s&search=%s' % (page+1, srchstring)
-        re_done = re.compile( new_url )
-        if not re_done.search( r.content.decode('ascii', 'ignore') ):
-            # link does not exist - we are done
-            break
-        else:
-            if pmsg: print('nhliquor_wine_searcher:',srchstring,':retreiving page:',page+1)
-            logger.info('%s:retreiving page:%d',srchstring, page+1)
+    # put the pages back in order
+    results = []
+    for page in sorted(pages):
+        results.extend(dedup_wine_records(pages[page], dedup, label))
 
     # return the results
     return results
 
 
+# get one nhliquor page - returns the ASCII page content
+def nhliquor_page( http, url_fmt, srchstring, page, cache=None, throttle=None, debug=False ):
+    # calculate the final url
+    url_final = url_fmt % (page, srchstring)
+
+    # debugging
+    if debug: print('nhliquor_wine_searcher:url_final:', url_final)
+
+    # get the page
+    r = winehttp.cached_request( http, 'GET', url_final, 'nhliquor', cache=cache, srchstring=srchstring, page=page, throttle=throttle )
+
+    # check the status code - if invalid raise error
+    if r.status_code != 200:
+        if pmsg: print('nhliquor_wine_searcher:url_final:', url_final, ':status_code:', r.status_code)
+        logger.warning('nhliquor_wine_searcher:url_final:%s:status_code:%s', url_final, r.status_code)
+        raise Exception('nhliquor_wine_searcher:url_final:%s:status_code:%s' % (url_final, r.status_code))
+
+    # return the ASCII web page content
+    return r.content.decode('ascii', 'ignore')
+
+
+# the last page of results we know about - the highest page linked to from this page
+# (never less than last_page and never more than max_pages)
+def nhliquor_last_page( html, re_page, last_page, max_pages ):
+    for m in re_page.finditer( html ):
+        last_page = max( last_page, int(m.group(1)) )
+    return min( last_page, max_pages )
+
+
 # parse an HTML page with table data to get back wine results from NHLiquor store
 def nhliquor_main_parser( html, label, debug=False ):
 
     # capture the place that we pull out the wine information from
     results = []
+    trace = winetrace.start_page( label )
+
+    # pull the header and rows out of the table
+    table = html_table_extract( html_table_lines( html ), debug=debug )
+    if table is None:
+        return []
+
+    header = table['header']
+    for row in table['rows']:
+        # validate we got enough columns in this row
+        if len(row) < 7:
+            continue
+
+        rawrec = (dict(zip(header, row)))
+        rec = {
+            'label'      : label,
+            'wine_store' : label,
+            'wine_name'  : ' '.join([rawrec['Name'], rawrec['Size']]),
+            'wine_year'  : '',
+        }
+        if rawrec['Sale Price'] == '-':
+            rec['wine_price'] = price_cleanup(rawrec['Reg. Price'])
+        else:
+            rec['wine_price'] = price_cleanup(rawrec['Sale Price'])
+
+        # debugging
+        if debug:
+            print('rawrec:', rawrec)
+            print('rec:', rec)
+        if trace: logger.debug('rec:%s', rec)
+
+        # add what we found to the results array
+        results.append(rec)
+
+    if not results:
+        return wineselenium.returnNoWineFound( label )
+
+    # done return the results
+    return results
+
+
+# split an HTML page into stripped lines ready for html_table_extract
+#
+# blocks of HTML comments inside the table structure are removed - comments that are
+# inline (start and end on the same line) are left in place
+def html_table_lines( html ):
+    intable=False
+    comment=False
+    htmllist=[]
+    for line in generic_wine_splitter( html ):
+        line = line.strip()
+        if '<table' in line:
+            intable=True
+
+        if not intable:
+            htmllist.append(line)
+            continue
+
+        if line.startswith('<!--') and not line.endswith('-->'):
+            comment=True
+        if not comment:
+            htmllist.append(line)
+        if line.startswith('-->'):
+            comment=False
+
+        if '</table>' in line:
+            intable = False
+
+    return htmllist
+
+
+# table extraction engine - one forward pass over the lines of the first table in htmllist
+#
+# each line is tagged once with the table tags it holds (glb_table_tags) and each cell
+# line is run through kev_html_stripper once.  The value of a <th>/<td> is the first line at
+# or after the tag that has text once the html is stripped.
+#
+# returns dict with 'header' (list of column names) and 'rows' (list of lists of column values)
+# or None when there is no table or it has no rows
+def html_table_extract( htmllist, debug=False ):
+    list_len = len(htmllist)
+    trace    = winetrace.tracing()
+
+    # tag each line
+    tags = []
+    for line in htmllist:
+        flags = 0
+        if '<' in line or '/' in line:
+            for tag, flag in glb_table_tags.items():
+                if tag in line:
+                    flags |= flag
+        tags.append( flags )
+
+    # stripped text of a line - computed once
+    stripped = {}
+    def line_text( idx ):
+        if idx not in stripped:
+            stripped[idx] = kev_html_stripper( htmllist[idx] )
+        return stripped[idx]
+
+    # move forward from idx to the line that has flag - stopping at a line with stop_flag
+    # returns the line found or None
+    def find_tag( idx, flag, stop_flag=0 ):
+        while idx < list_len:
+            if tags[idx] & flag:
+                return idx
+            if tags[idx] & stop_flag:
+                return None
+            idx += 1
+        return None
+
+    # the value of the cell at idx - returns (value, next line) or (None, list_len) if we ran out of lines
+    def cell_value( idx ):
+        while idx < list_len and not line_text( idx ):
+            idx += 1
+        if idx >= list_len:
+            return (None, list_len)
+        return (line_text( idx ).strip(), idx+1)
+
+    # find table and the first row
+    i = find_tag( 0, glb_table_tags['<table'] )
+    if i is None:
+        logger.warning('did not find the table - stopped processing')
+        if pmsg: print('winerequest:html_table_extract:did not find the table - stopped processing')
+        return None
+    i = find_tag( i, glb_table_tags['<tr'] )
+    if i is None:
+        logger.warning('did not find the first row in table - stopped processing')
+        if pmsg: print('winerequest:html_table_extract:did not find the first row in table - stopped processing')
+        return None
+
+    # the header - each <th until the end of the row
+    header = []
+    while True:
+        found = find_tag( i, glb_table_tags['<th'], glb_table_tags['/tr>'] )
+        if found is None:
+            break
+        (value, i) = cell_value( found )
+        if value is None:
+            break
+        header.append( value )
+
+    # debugging
+    if debug: print('header:', header)
+    if trace: logger.debug('%d:header:%s', i, header)
+
+    # the rows - each <tr until the end of the table, each <td until the end of the row
+    rows = []
+    while i < list_len:
+        found = find_tag( i, glb_table_tags['<tr'], glb_table_tags['/table>'] )
+        if found is None:
+            break
+        row = []
+        i = found
+        while True:
+            found = find_tag( i, glb_table_tags['<td'], glb_table_tags['/tr>'] )
+            if found is None:
+                break
+            (value, i) = cell_value( found )
+            if value is None:
+                break
+            row.append( value )
+
+        # an empty row - step past its <tr so we do not find it again
+        if not row:
+            i += 1
+
+        # debugging
+        if debug: print('row:', row)
+        if trace: logger.debug('row:%s', row)
+
+        rows.append( row )
+
+    return { 'header' : header, 'rows' : rows }
+
+
+# original nhliquor parser (built on search_list_for) - kept so the results of
+# nhliquor_main_parser can be compared back to it
+def nhliquor_main_parser_legacy( html, label, debug=False ):
+
+    # capture the place that we pull out the wine information from
+    results = []
+    trace = winetrace.start_page( label )
 
     # we needed to build a CUSTOM HTML table parser
     # tried to use lxml and BeautifulSoup to do this 
@@ -1151,12 +2093,12 @@ def nhliquor_main_parser( html, label, debug=False ):
         # found the table header and look at next line
         while not kev_html_stripper( htmllist[i] ):
             if debug:  print('B:{:04d}:{}'.format(i, htmllist[i]))
-            logger.debug('B:{:04d}:{}'.format(i, htmllist[i]))
+            if trace: logger.debug('B:{:04d}:{}'.format(i, htmllist[i]))
             # blank line - get next line
             i += 1
         # got a non blank line - put this in the header array
         if debug:  print('X:{:04d}:{}'.format(i, htmllist[i]))
-        logger.debug('X:{:04d}:{}'.format(i, htmllist[i]))
+        if trace: logger.debug('X:{:04d}:{}'.format(i, htmllist[i]))
         header.append( kev_html_stripper( htmllist[i] ).strip() )
         # move past this processed line
         i += 1
@@ -1165,8 +2107,8 @@ def nhliquor_main_parser( html, label, debug=False ):
     if debug:
         print(i, ':file:', htmllist[i])
         print(i, ':header:', header)
-    logger.debug('%d:file:%s', i, htmllist[i])
-    logger.debug('%d:header:%s', i, header)
+    if trace: logger.debug('%d:file:%s', i, htmllist[i])
+    if trace: logger.debug('%d:header:%s', i, header)
 
     ### ROWS ######
     while i < list_len:
@@ -1175,7 +2117,7 @@ def nhliquor_main_parser( html, label, debug=False ):
         (i,match,found) = search_list_for( re.compile('<tr'), htmllist, i, re.compile('\/table>'), debug=debug )
         if not match:
             if debug:  print(i,':table complete')
-            logger.debug('%d:table complete', i )
+            if trace: logger.debug('%d:table complete', i )
             break
 
         ### COLUMNS ####
@@ -1184,16 +2126,16 @@ def nhliquor_main_parser( html, label, debug=False ):
             (i,match,found) = search_list_for( re.compile('<td'), htmllist, i, re.compile('\/tr>'), debug=debug )
             if not match:
                 if debug:  print(i,':row complete')
-                logger.debug('%d:row complete',i)
+                if trace: logger.debug('%d:row complete',i)
                 break
             # go through lines until we find the one with data
             while not kev_html_stripper( htmllist[i] ):
                 if debug:  print('B:{:04d}:{}'.format(i, htmllist[i]))
-                logger.debug('B:{:04d}:{}'.format(i, htmllist[i]))
+                if trace: logger.debug('B:{:04d}:{}'.format(i, htmllist[i]))
                 # blank line - get next line
                 i += 1
             if debug:  print('X:{:04d}:{}'.format(i, htmllist[i]))
-            logger.debug('X:{:04d}:{}'.format(i, htmllist[i]))
+            if trace: logger.debug('X:{:04d}:{}'.format(i, htmllist[i]))
             row.append( kev_html_stripper( htmllist[i] ).strip() )
             i += 1
             
@@ -1202,8 +2144,8 @@ def nhliquor_main_parser( html, label, debug=False ):
         if debug:
             print('row:', row)
             print('len-row:', len(row), '\n\n')
-        logger.debug('row:%s', row)
-        logger.debug('len-row:%d', len(row))
+        if trace: logger.debug('row:%s', row)
+        if trace: logger.debug('len-row:%d', len(row))
                   
         # validate we got enough columns in this row
         if len(row) >= 7:
@@ -1225,17 +2167,17 @@ def nhliquor_main_parser( html, label, debug=False ):
                 print(i, ':row:', row)
                 print('rawrec:', rawrec)
                 print('rec:', rec)
-            logger.debug('header:%s', header)
-            logger.debug('%i:row:%s', i, row)
-            logger.debug('rawrec:%s', rawrec)
-            logger.debug('rec:%s', rec)
+            if trace: logger.debug('header:%s', header)
+            if trace: logger.debug('%i:row:%s', i, row)
+            if trace: logger.debug('rawrec:%s', rawrec)
+            if trace: logger.debug('rec:%s', rec)
             
             # add what we found to the results array
             results.append(rec)
 
     # debugging
     if debug:  print('results:', results)
-    logger.debug('results:%s', results)
+    if trace: logger.debug('results:%s', results)
 
     if not results:
         return wineselenium.returnNoWineFound( label )
@@ -1254,7 +2196,7 @@ def nhliquor_main_parser( html, label, debug=False ):
 ###
 def kev_html_stripper(string,nocommafilter=False):
     # strip out hmtl
-    string = re.sub('<[^>]*>','',string)
+    string = glb_re_html_tag.sub('',string)
 
     # regex to convert values
     string = string.replace('&amp;','&').replace('%quot;',' ').replace('&rsquo;',' ').replace('%nbsp;',' ')
@@ -1265,28 +2207,24 @@ def kev_html_stripper(string,nocommafilter=False):
 
     return string
 
-# this utility is used to pull the name from a string (wine_name)
+# this utility is used to pull the year from a string (wine_name) - the rules are in winevintage
 def _extract_year_from_name( winename, debug=False ):
-    # define the list of regex in order to find a year in a string
-    re_dates = [
-        re.compile('\s(\d\d\d\d)\s'),
-        re.compile('(\d\d\d\d)\s'),
-        re.compile('\s(\d\d\d\d)'),
-        re.compile('\s\'(\d\d)\s'),
-        re.compile('\s(\d\d)\s')
-    ]
-
-    # loop through the list of regex used to find a date
-    for date_match in re_dates:
-        found = date_match.search( winename )
-        if found:
-            # debugging
-            if debug: print('winerequest:_extract_year_from_name:winename:', winename, ':wine_year:', found.group(1))
-            logger.debug('winename:%s:wine_year:%s', winename, found.group(1))
-            # return back the value we found
-            return found.group(1)
-    # all loops performed nothing found
-    return None
+    wine_year = winevintage.find_vintage( winename )
+    if debug: print('winerequest:_extract_year_from_name:winename:', winename, ':wine_year:', wine_year)
+    return wine_year
+
+# register this engine and its stores with the store registry (see winestores) - a store searches
+# with the keep-alive session of its store from the session pool
+def register_stores():
+    winestores.register_engine( 'request', 'http', get_wines_from_stores )
+    for store, store_args in store_definitions().items():
+        if store.startswith('zz'):
+            continue
+        winestores.register_store( 'request', store,
+                                   lambda session_pool, store=store, useragent=store_args['search_args'].get('UserAgent'): winehttp.get_store_session( session_pool, store, useragent ),
+                                   lambda srchstring, session_pool=None, store=store, **kwargs: get_wines_from_store( srchstring, store, store_definitions(), session_pool, **kwargs ) )
+
+register_stores()
 
 #####################################################################################
 
@@ -1306,26 +2244,8 @@ if __name__ == '__main__':
         # passed in on the command line
         winereq_storelist = [optiondict['storelist']]
     else:
-        # (winerequest) request stores
-        winereq_storelist = [
-            'binnys',
-            'hiddenvine',
-#            'winex',  # done in wineselenium
-            'napacab',
-#            'webwine',  #05/15/2020 - not working - commented out - run with findwine.pl it works there
-            'lawineco',
-            'wineconn',
-            'johnpete',
-#            'wine2020', #05/15/2020 - not working - commented out - port to wineselenium.py
-#            'acwine',   #05/15/2020 - too much work to make work - ignoring this wine site.
-            'klwine', 
-            'nhliquor',
-            'rolf',
-#            'winezap',
-#           'winehouse', # needs to be implemented
-#           'winecom', # needs to be implemented
-#           'bestwine', # needs to be implemented
-        ]
+        # (winerequest) request stores (see winestores)
+        winereq_storelist = winestores.store_list( 'winerequest', 'request' )
 
     # dump out what we have done here
     if optiondict['test']:
@@ -1345,6 +2265,12 @@ if __name__ == '__main__':
         if pmsg: print('---------------STARTUP(v', optiondictconfig['AppVersion']['value'], ')-(', datetime.datetime.now().strftime('%Y%m%d:%T'), ')---------------------------')
     logger.info('STARTUP(v%s)%s', optiondictconfig['AppVersion']['value'], '-'*40)
 
+    # per line parser trace and the time we spend logging
+    runstart = time.monotonic()
+    store_args = store_definitions()
+    trace_labels = [store_args[store]['parser_args']['label'] if store in store_args else store for store in (optiondict['trace_stores'] or [])]
+    winetrace.configure_trace( trace_labels, optiondict['trace_sample'] )
+    winetrace.install_log_timer()
 
 
     ### WINE_XLAT ###
@@ -1374,9 +2300,15 @@ if __name__ == '__main__':
         logger.info('test:srchstring_list:%s', srchstring_list)
 
     # if not user defined - generate the list if we don't have one predefined
+    journal = None
     if srchstring_list == None:
         srchstring_list = wineselenium.get_winelist_from_file( optiondict['wineinputfile'], debug=debug )
-        wineselenium.remove_already_processed_wines( optiondict['wineoutfile'], srchstring_list, debug=debug )
+        if optiondict['journal']:
+            # the wine/stores already done today - the run picks up where it left off
+            journal = winejournal.open_journal( winejournal.journal_file( optiondict['wineoutfile'], wineselenium.rundate ), wineselenium.rundate )
+            srchstring_list = winejournal.journal_wines_left( journal, srchstring_list, stores_to_search( winereq_storelist, store_definitions() ) )
+        else:
+            wineselenium.remove_already_processed_wines( optiondict['wineoutfile'], srchstring_list, debug=debug )
         if not srchstring_list:
             if pmsg: print('main:no wines to search for - ending program')
             logger.info('main:no wines to search for - ending program')
@@ -1393,12 +2325,34 @@ if __name__ == '__main__':
     logger.debug('srchstring_list:%s', srchstring_list)
 
     
+    ### PAGE CACHE ###
+    cache = None
+    if optiondict['fixture_dir']:
+        # record/replay the store pages (see winebench)
+        if optiondict['cache_dir']:
+            logger.warning('fixture_dir set - cache_dir ignored:%s', optiondict['cache_dir'])
+        cache = winehttp.create_fixture_store( optiondict['fixture_dir'], optiondict['fixture_mode'] )
+    elif optiondict['cache_dir']:
+        cache = winehttp.create_http_cache( optiondict['cache_dir'], ttl=optiondict['cache_ttl'], max_bytes=optiondict['cache_maxmb']*1024*1024 )
+
+    # the wines found are written to wineoutfile by one writer for the run
+    writer = winewriter.create_writer( optiondict['wineoutfile'], optiondict['flush_rows'], optiondict['flush_seconds'] )
+
     # read in the wines defined
-    wines = get_wines_from_stores( srchstring_list, winereq_storelist, optiondict['wineoutfile'], debug=debug )
+    wines = get_wines_from_stores( srchstring_list, winereq_storelist, optiondict['wineoutfile'], workers=optiondict['workers'], store_workers=optiondict['store_workers'], pool_size=optiondict['pool_size'], cache=cache, dedup_run=optiondict['dedup_run'], page_workers=optiondict['page_workers'], max_pages=optiondict['max_pages'], throttle=None if optiondict['throttle'] else winethrottle.create_throttle(enabled=False), breaker=winebreaker.create_breaker(optiondict['breaker_threshold'], optiondict['breaker_cooldown']), journal=journal, writer=writer, debug=debug )
+    winewriter.close_writer( writer )
+    if journal:
+        winejournal.close_journal( journal )
 
 
     # display what we read
     if debug:  print('winerequest:wines:', wines)
     logger.debug('wines:%s', wines)
 
+    # how much of the run went to the log
+    winetrace.log_trace_summary( time.monotonic() - runstart )
+
+    # the store wine names that did not translate
+    winexlat.log_xlat_stats( wineselenium.store_wine_lookup )
+
 #eof
@@ -13,38 +13,18 @@ echo %date% %time% wineselenium.py use selenium to read in new data >> wineselen
 REM
 python wineselenium.py >> wineselenium.log 2>>wineselenium-err.log
 REM 
-REM check to see if we error'd out
+REM check to see if we error'd out - a failing store is restarted inside wineselenium.py
+REM (see winesupervisor) so an error here is not fixed by running the whole program again
 if errorlevel 1 (
    TASKKILL /IM chrome.exe /F
    TASKKILL /IM chromedriver.exe /f
-   echo %date% %time% wineselenium.py run again to do failure 1 >> wineselenium.log
-   sendgmail subject_adder=" - wineselenium RESTARTED 1" 
-   python wineselenium.py >> wineselenium.log 2>>wineselenium-err.log
-)
-if errorlevel 1 (
-   TASKKILL /IM chrome.exe /F
-   TASKKILL /IM chromedriver.exe /f
-   echo %date% %time% wineselenium.py run again to do failure 2 >> wineselenium.log
-   sendgmail subject_adder=" - wineselenium RESTARTED 2"
-   python wineselenium.py >> wineselenium.log 2>>wineselenium-err.log
-)
-if errorlevel 1 (
-   TASKKILL /IM chrome.exe /F
-   TASKKILL /IM chromedriver.exe /f
-   echo %date% %time% wineselenium.py run again to do failure 3 >> wineselenium.log
-   sendgmail subject_adder=" - wineselenium RESTARTED 3"
-   python wineselenium.py >> wineselenium.log 2>>wineselenium-err.log
-)
-if errorlevel 1 (
-   TASKKILL /IM chrome.exe /F
-   TASKKILL /IM chromedriver.exe /f
-   echo %date% %time% wineselenium.py not run again to do failure 4 >> wineselenium.log
+   echo %date% %time% wineselenium.py FAILED - see the store failure report in the log >> wineselenium.log
    sendgmail subject_adder=" - wineselenium FAILED and not restarted"
    echo %date% %time% wineselenium.py TERMINATE this program >> wineselenium.log
    exit 1
 )
 REM notify if there is issue processing
-IF EXIST fail*.html (
+IF EXIST fail*.html* (
    echo %date% %time% wineselenium.py errors in HTML files >> wineselenium.log
    sendgmail subject_adder=" - wineselenium had ERRORS please review log file and HTML files"
 )
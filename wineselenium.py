@@ -1,7 +1,7 @@
 '''
 @author:   Ken Venner
 @contact:  ken@venerllc.com
-@version:  1.157
+@version:  1.172
 
 Using Selenium and Chrome/Firefox - screen scrape wine websites to draw
 down wine pricing and availiability information
@@ -16,10 +16,30 @@ import requests
 
 import kvutil
 import kvgmailsend
+import winethrottle
+import winebreaker
+import winewait
+import winedom
+import winejournal
+import winesupervisor
+import winewriter
+import winexlat
+import winestores
+import wineartifact
+import winepark
 
 import time
 import re
+import csv
+import os
 import datetime
+import functools
+import json
+import atexit
+import multiprocessing
+import concurrent.futures
+import queue
+import threading
 import sys
 
 
@@ -43,7 +63,7 @@ sys.excepthook = handle_exception
 # application variables
 optiondictconfig = {
     'AppVersion' : {
-        'value' : '1.157',
+        'value' : '1.172',
         'description' : 'defines the version number for the app',
     },
     'test' : {
@@ -116,12 +136,143 @@ optiondictconfig = {
         'value' : 'Please RDP into the machine and interact with TotalWines web page to get past robot detection',
         'description' : 'defines the body of the email',
     },
+    'robot_poll' : {
+        'value' : 180,
+        'type'  : 'int',
+        'description' : 'defines the seconds between checks of a store parked on a robot check',
+    },
+    'robot_max_wait' : {
+        'value' : 0,
+        'type'  : 'int',
+        'description' : 'defines the seconds we wait at the end of the run on a parked store before its wines are given up (0 - no limit)',
+    },
 
     # control the type of browser we are using to do the automation
     'browser' : {
         'value' : 'chrome',
         'description' : 'defines which browser we are using to automate with',
     },
+    'browser_profile' : {
+        'value' : 'full',
+        'description' : 'defines the browser profile used for the stores (full - visible browser, lite - headless with images/fonts/media/trackers blocked)',
+    },
+    'store_profiles' : {
+        'value' : None,
+        'type'  : 'liststr',
+        'description' : 'defines the store:profile pairs that override browser_profile for a store (ex: totalwine:full)',
+    },
+    'page_load_file' : {
+        'value' : 'wineselenium_pageload.json',
+        'description' : 'defines the file the page load times by store and profile are kept in - a run is compared to the last run of the other profile (None - not kept)',
+    },
+
+    # pace the searches against each store
+    'throttle' : {
+        'value' : True,
+        'type'  : 'bool',
+        'description' : 'defines if the searches against each store are paced (see winethrottle)',
+    },
+
+    # skip the stores that keep failing
+    'breaker_threshold' : {
+        'value' : 3,
+        'type'  : 'int',
+        'description' : 'defines the failures in a row that cause a store to be skipped (0 - never skip)',
+    },
+    'breaker_cooldown' : {
+        'value' : 300,
+        'type'  : 'int',
+        'description' : 'defines the seconds a failing store is skipped before we try it again',
+    },
+
+    # run each store's browser in its own process
+    'max_browsers' : {
+        'value' : 0,
+        'type'  : 'int',
+        'description' : 'defines the max number of store browsers (worker processes) running at the same time (0 - all stores in this process)',
+    },
+    'pool_ahead' : {
+        'value' : 10,
+        'type'  : 'int',
+        'description' : 'defines how many wines a browser keeps searching its store past the oldest wine not saved before it moves to a store that is behind (max_browsers > 0)',
+    },
+    'startup_timeout' : {
+        'value' : 600,
+        'type'  : 'int',
+        'description' : 'defines the seconds each store has to get its browser started before it is dropped from the run',
+    },
+
+    # pull the wines off the search page with one script call (False - one call per element)
+    'dom_script' : {
+        'value' : True,
+        'type'  : 'bool',
+        'description' : 'defines if the wines are pulled from the page with one script call (see winedom)',
+    },
+
+    # pick up a restarted run where it left off
+    'journal' : {
+        'value' : True,
+        'type'  : 'bool',
+        'description' : 'defines if the run journal (see winejournal) is used to skip the wine/stores already done today (False - rescan wineoutfile)',
+    },
+
+    # restart just the store that failed (see winesupervisor)
+    'store_retries' : {
+        'value' : 2,
+        'type'  : 'int',
+        'description' : 'defines the times a wine is retried on a store (restarting the store driver) after the search failed',
+    },
+    'store_backoff' : {
+        'value' : 15,
+        'type'  : 'int',
+        'description' : 'defines the seconds before the first retry of a failed store search (doubles each retry)',
+    },
+    'store_max_restarts' : {
+        'value' : 10,
+        'type'  : 'int',
+        'description' : 'defines the driver restarts allowed per store for the run (0 - no limit)',
+    },
+
+    # the wines found are buffered and written by one writer thread (see winewriter)
+    'flush_rows' : {
+        'value' : 200,
+        'type'  : 'int',
+        'description' : 'defines the rows buffered before wineoutfile is flushed',
+    },
+    'flush_seconds' : {
+        'value' : 5,
+        'type'  : 'int',
+        'description' : 'defines the max seconds a row is buffered before wineoutfile is flushed',
+    },
+
+    # translate the store wine names (see winexlat)
+    'xlat_fuzzy' : {
+        'value' : 0.0,
+        'type'  : 'float',
+        'description' : 'defines the close match cutoff (0.0-1.0) used when a store wine name is not in winexlatfile (0 - exact/normalized match only)',
+    },
+    'xlat_sidecar' : {
+        'value' : True,
+        'type'  : 'bool',
+        'description' : 'defines if the winexlatfile index is saved to/loaded from a sidecar file (winexlatfile.idx)',
+    },
+
+    # the pages saved when a store search fails (see wineartifact)
+    'artifact_max_mb' : {
+        'value' : 200,
+        'type'  : 'int',
+        'description' : 'defines the max MB of fail* page files kept in the directory',
+    },
+    'artifact_per_store' : {
+        'value' : 3,
+        'type'  : 'int',
+        'description' : 'defines the max fail* pages saved for a store every artifact_window seconds',
+    },
+    'artifact_window' : {
+        'value' : 600,
+        'type'  : 'int',
+        'description' : 'defines the seconds artifact_per_store applies to',
+    },
 
 }
 
@@ -151,6 +302,68 @@ pavillions_search_xpath = ''
 # define the brower to use (chrome or firefox)
 browser = 'chrome'
 
+# define the browser profile used for a store that is not in glb_store_profiles (full or lite)
+browser_profile = 'full'
+
+# the browser profiles
+#   headless - run the browser without a window
+#   window_size - (width, height) of the browser window (None - browser default)
+#   block_images/block_fonts/block_media - do not download these from the store pages
+#   block_trackers - do not load anything from the domains in glb_tracker_blocklist
+glb_browser_profiles = {
+    'full' : {
+        'headless'       : False,
+        'window_size'    : None,
+        'block_images'   : False,
+        'block_fonts'    : False,
+        'block_media'    : False,
+        'block_trackers' : False,
+    },
+    'lite' : {
+        'headless'       : True,
+        'window_size'    : (1280, 900),
+        'block_images'   : True,
+        'block_fonts'    : True,
+        'block_media'    : True,
+        'block_trackers' : True,
+    },
+}
+
+# stores that always use a profile - totalwine checks for robots and needs the full browser
+glb_store_profiles = {
+    'totalwine' : 'full',
+}
+
+# third party tracker/ad domains not loaded by a profile with block_trackers
+glb_tracker_blocklist = [
+    'google-analytics.com',
+    'googletagmanager.com',
+    'googleadservices.com',
+    'doubleclick.net',
+    'facebook.net',
+    'connect.facebook.com',
+    'bat.bing.com',
+    'hotjar.com',
+    'criteo.com',
+    'criteo.net',
+    'adsrvr.org',
+    'scorecardresearch.com',
+    'quantserve.com',
+    'taboola.com',
+    'outbrain.com',
+    'ct.pinterest.com',
+    'nr-data.net',
+    'yottaa.net',
+]
+
+# url patterns not loaded by a profile with block_fonts/block_media (chrome)
+glb_font_blocklist  = ['*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot']
+glb_media_blocklist = ['*.mp4', '*.webm', '*.mp3', '*.m3u8', '*.ogg']
+
+# page load times by (store, profile) - see log_page_load_stats
+glb_page_loads = {}
+glb_page_loads_lock = threading.Lock()
+
 # --- FILE ROUTINES --------------------
 
 # -- read in the list of wines
@@ -239,57 +452,34 @@ def remove_already_processed_wines( winefile, searchlist, debug=False):
     return searchlist
 
 # read in the translation file from store/wine to store/wine with vintage
-def read_wine_xlat_file( getwines_file, debug=False ):
+#   fuzzy - (opt) close match cutoff for names not in the file (see winexlat)
+#   sidecar - (opt) save/load the index in a sidecar file
+def read_wine_xlat_file( getwines_file, debug=False, fuzzy=0, sidecar=True ):
     # we are populating the module level variable that will be used by other functions in this module
     #
     # Module level variable:
-    # store_wine_lookup = {}
-    
-    # open file and process
-    with open(getwines_file, 'r') as fp:
-        # for each line in the file see if it matches a regex of interest
-        for line in fp:
-            elem = line.split(',')
-            if elem[0] not in store_wine_lookup.keys():
-                # never seen store = build the entity in entirity
-                store_wine_lookup[elem[0]] = { elem[1] : elem[2] }
-            else:
-                # seen the store check next level down
-                if elem[1] in store_wine_lookup[elem[0]].keys():
-                    # debugging
-                    if debug:
-                        if pmsg: print('read_wine_xlat_file:',elem[0],':',elem[1],' mapping changed from (', store_wine_lookup[elem[0]][elem[1]], ') to (', elem[2], ')')
-                    logger.debug('%s:%s:mapping changed from:%s:to:%s',elem[0],elem[1], store_wine_lookup[elem[0]][elem[1]], elem[2])
-                # set the value no matter what
-                store_wine_lookup[elem[0]][elem[1]] = elem[2]
-            
+    # store_wine_lookup = {}  - the winexlat index of the file
+    store_wine_lookup.update( winexlat.load_xlat_index( getwines_file, fuzzy=fuzzy, sidecar=sidecar ) )
+
+    # debugging
+    if debug:
+        if pmsg: print('read_wine_xlat_file:', getwines_file, ':names:', len(store_wine_lookup['exact']))
+
     # return
     return store_wine_lookup
 
 
 # now convert a wine name to appropriate translatoin
 def xlat_wine_name( store_wine_lookup, store, wine ):
-    global verbose
-    
-    # check for a match based on the passed in name
-    if store in store_wine_lookup.keys():
-        # debugging
-        logger.debug('store matched:%s', store)
-        logger.debug('store list of wines:%s', store_wine_lookup[store])
-        if wine in store_wine_lookup[store].keys():
-            # debugging
-            logger.debug('wine matched:%s', wine)
-            return store_wine_lookup[store][wine]
+    # check for a match based on the passed in name (see winexlat)
+    xlat = winexlat.xlat_lookup( store_wine_lookup, store, wine )
+    if xlat is not None:
+        return xlat
 
     # did not find a match based on the wine name passed in
-    # regex the name field to remove any commas
-    # and try again
-    if re.search(',', wine):
-        # debugging
-        logger.debug('comma in wine:%s',wine)
-        wine = re.sub(',',' ',wine)
-        # debugging
-        logger.debug('comma stripped wine:%s',wine)
+    # remove any commas from the name field
+    if ',' in wine:
+        wine = wine.replace(',',' ')
     
     # pass back the wine passed in (cleaned up)
     return wine
@@ -297,7 +487,9 @@ def xlat_wine_name( store_wine_lookup, store, wine ):
 
 
 # -- output file
-def save_wines_to_file(file, srchstring, winelist, debug=False):
+#   writer - (opt) the run writer (see winewriter) - the rows are queued to it instead of opening file
+#   done - (opt) function called once the rows are in file (with a writer - once they are flushed)
+def save_wines_to_file(file, srchstring, winelist, debug=False, writer=None, done=None):
     global verbose
     
     # module level variables used:
@@ -322,43 +514,56 @@ def save_wines_to_file(file, srchstring, winelist, debug=False):
 #        'wine_case_price', 'wine_avail',  'wine_descr'
 #    ]
 
-    # open the file
-    with open( file, 'a' ) as winecsv:
-        # move through each row
-        for rec in winelist:
-            # check to see this was not no results
-            if (rec['wine_price'] != 0):
-                # make sure the wine price has no comma's in it
-                # regex the name field to remove any commas
-                if re.search(',', rec['wine_price']):
-                    # debugging
-                    logger.debug('comma in price:%s',rec['wine_price'])
-                    # strip out the comma in price if it exists (might wnat to get rid of this)
-                    rec['wine_price'] = re.sub(',','',rec['wine_price'])
-                    # debugging
-                    logger.debug('comma stripped price:%s',rec['wine_price'])
-                
-                # save - but also convert the wine name if there is a translation
-                winecsv.write(','.join([rundate,srchstring,rec['wine_store'],xlat_wine_name(store_wine_lookup,rec['wine_store'],rec['wine_name']),rec['wine_price']])+"\n")
-            else:
-                # debugging
-                logger.info('no wine price for:%s:%s', rec['wine_store'], rec['wine_name'])
+    # build the rows
+    rows = []
+    for rec in winelist:
+        # check to see this was not no results
+        if (rec['wine_price'] != 0):
+            # save - but also convert the wine name if there is a translation
+            # and strip out the comma in price if it exists (might wnat to get rid of this)
+            rows.append( [rundate, srchstring, rec['wine_store'], xlat_wine_name(store_wine_lookup,rec['wine_store'],rec['wine_name']), str(rec['wine_price']).replace(',','')] )
+        else:
+            # debugging
+            logger.info('no wine price for:%s:%s', rec['wine_store'], rec['wine_name'])
+
+    # queue them to the run writer - or append them to the file
+    if writer:
+        winewriter.writer_put( writer, rows, done )
+    else:
+        with open( file, 'a', newline='' ) as winecsv:
+            csv.writer( winecsv, lineterminator=os.linesep ).writerows( rows )
+        if done:
+            done()
 
     # debugging
     logger.info('saved records for:%s:%d', srchstring, len(winelist))
                 
-# routine that saves the current browser content to a file
+# routine that saves the current browser content to a file - the page source and screen shot
+# are handed to the artifact writer (see wineartifact) and the search carries on
 def saveBrowserContent( driver, filenametemplate, function ):
-    # save the page content in HTML file
-    filename = kvutil.filename_unique( 'fail' + filenametemplate + '.html', {'uniqtype': 'datecnt', 'forceuniq' : True } )
-    with open( filename, 'wb' ) as p:
-        p.write( driver.page_source.encode('utf-8') )
-    logger.info('%s:saved html page content to:%s', function, filename)
+    artifacts = wineartifact.get_artifact_writer()
 
-    # save the page picture in a PNG file
-    filename = kvutil.filename_unique( 'fail' + filenametemplate + '.png', {'uniqtype': 'datecnt', 'forceuniq' : True } )
-    driver.save_screenshot(filename)
-    logger.info('%s:saved page screen shot to:%s', function, filename)
+    # a store that keeps failing only saves so many pages
+    if not wineartifact.artifact_allowed( artifacts, filenametemplate ):
+        logger.info('%s:page not saved - artifact limit for:%s', function, filenametemplate)
+        return
+
+    # grab the page content and picture
+    try:
+        html = driver.page_source
+        png = driver.get_screenshot_as_png()
+    except Exception as e:
+        logger.warning('%s:could not grab page content:%s', function, str(e))
+        return
+
+    wineartifact.save_artifact( artifacts, filenametemplate, function, html, png )
+
+
+# the limits of the artifact writer from the command line options
+def set_artifact_limits( optiondict ):
+    wineartifact.glb_artifact_defaults['max_bytes'] = optiondict.get('artifact_max_mb', 200) * 1024 * 1024
+    wineartifact.glb_artifact_defaults['per_store'] = optiondict.get('artifact_per_store', 3)
+    wineartifact.glb_artifact_defaults['window'] = optiondict.get('artifact_window', 600)
 
 
 # except print 
@@ -410,33 +615,20 @@ def get_url_looped( driver, url, msg, loopcnt=4, waitsecs=1, displayFailure=True
             loopcnt -= 1
             time.sleep(waitsecs)
 
-# attempt to find a set of elements in a page
-def find_elements_looped(driver, name, byType, msg, msg2, loopcnt=4, waitsecs=3, displayFailure=True, debug=False ):
-    if byType in ('by_class_name', 'byClassName', 'class_name', 'className'):
-        results = driver.find_elements_by_class_name( name )
-    elif byType in ('by_name', 'byName', 'name'):
-        results = driver.find_elements_by_name( name )
-    elif byType in ('by_xpath', 'byXpath', 'xpath'):
-        results = driver.find_elements_by_xpath( name )
-    elif byType in ('by_id', 'byID', 'id'):
-        results = driver.find_elements_by_id( name )
-
-    while not results and loopcnt:
-        if displayFailure:
-            logger.info('%s:%s:%s:%d',msg,msg2,name,loopcnt)
-        loopcnt -= 1
-        time.sleep(waitsecs)
+# attempt to find a set of elements in a page - waits up to loopcnt * waitsecs seconds for them to show up
+def find_elements_looped(driver, name, byType, msg, msg2, loopcnt=4, waitsecs=3, displayFailure=True, debug=False, store=None ):
+    results = winewait.find_elements( driver, byType, name )
+    if results or not loopcnt:
+        return results
 
-        if byType in ('by_class_name', 'byClassName', 'class_name', 'className'):
-            results = driver.find_elements_by_class_name( name )
-        elif byType in ('by_name', 'byName', 'name'):
-            results = driver.find_elements_by_name( name )
-        elif byType in ('by_xpath', 'byXpath', 'xpath'):
-            results = driver.find_elements_by_xpath( name )
-        elif byType in ('by_id', 'byID', 'id'):
-            results = driver.find_elements_by_id( name )
+    if displayFailure:
+        logger.info('%s:%s:%s:%d',msg,msg2,name,loopcnt)
 
-    return results
+    # the store the wait is charged to - the store name is in msg
+    if not store:
+        store = next( (store for store in glb_store_browsers if store in msg), msg )
+
+    return winewait.wait_until( driver, store, winewait.elements_present( byType, name ), loopcnt * waitsecs, msg2 ) or []
 
 
 # ---------------------------------------------------------------------------
@@ -456,40 +648,189 @@ def print_html_elem( msg, index, elem):
     if pmsg: print(msg, ' size:', elem.size)
     if pmsg: print('-----------------------------------------')
 
-# exit application with error code
+# give up on the store routine - raises so only this store is restarted (see supervised_search)
+# and the other stores carry on
 def exitWithError( msg='' ):
     # display optional message
     if msg:
         if pmsg: print(msg)
-        logger.error(smg)
+        logger.error(msg)
         
-    # display that we terminated and then terminate
+    # display that we terminated the store routine
     if pmsg: print('TERMINATE')
     logger.error('TERMINATE')
-    sys.exit(1)
+    raise RuntimeError( msg if msg else 'store routine terminated' )
 
 # -----------------------------------------------------------------------
 
 # CHROME SPECIFIC FEATURES #
 
+# set the browser profiles from the command line options - browser_profile and store_profiles
+def set_browser_profiles( optiondict ):
+    global browser_profile
+
+    if optiondict.get('browser_profile'):
+        if optiondict['browser_profile'] not in glb_browser_profiles:
+            logger.warning('unknown browser_profile:%s:using:%s', optiondict['browser_profile'], browser_profile)
+        else:
+            browser_profile = optiondict['browser_profile']
+
+    for pair in optiondict.get('store_profiles') or []:
+        store, sep, profile = pair.partition(':')
+        if profile not in glb_browser_profiles:
+            logger.warning('store_profiles:unknown profile skipped:%s', pair)
+            continue
+        glb_store_profiles[store] = profile
+
+    logger.info('browser_profile:%s:store_profiles:%s', browser_profile, glb_store_profiles)
+
+
+# the browser profile name used for a store
+def store_browser_profile( store ):
+    return glb_store_profiles.get( store, browser_profile )
+
+
 # created this because upgrade to ChromeDriver 75 broke this script
-def create_webdriver_from_global_var( message ):
+#   message - <store>_driver - the store picks the browser profile (see store_browser_profile)
+def create_webdriver_from_global_var( message, store=None ):
     global browser
+
+    if not store:
+        store = message.split('_driver')[0] if message else ''
+    profile_name = store_browser_profile( store )
+    profile = glb_browser_profiles[profile_name]
+
     if message:
         if pmsg: print(message + ':start:---------------------------------------------------')
-        if pmsg: print(message + ':Start up webdriver.' + browser)
-        logger.info('%s:start up webdriver:%s', message, browser)
+        if pmsg: print(message + ':Start up webdriver.' + browser + ':profile:' + profile_name)
+        logger.info('%s:start up webdriver:%s:profile:%s', message, browser, profile_name)
 
     if browser == 'chrome':
         # turn off w3c - implemented 20190623;kv
         opt = webdriver.ChromeOptions()
         opt.add_experimental_option('w3c', False)
+        if profile['headless']:
+            opt.add_argument('--headless')
+        if profile['window_size']:
+            opt.add_argument('--window-size=%d,%d' % profile['window_size'])
+        if profile['block_images']:
+            opt.add_experimental_option('prefs', {'profile.managed_default_content_settings.images' : 2})
         driver = webdriver.Chrome(chrome_options=opt)
+
+        # fonts, media and trackers are blocked by url through devtools
+        blocked = []
+        if profile['block_fonts']:
+            blocked.extend( glb_font_blocklist )
+        if profile['block_media']:
+            blocked.extend( glb_media_blocklist )
+        if profile['block_trackers']:
+            blocked.extend( '*' + domain + '*' for domain in glb_tracker_blocklist )
+        if blocked:
+            try:
+                driver.execute_cdp_cmd('Network.enable', {})
+                driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls' : blocked})
+            except Exception as e:
+                logger.warning('%s:unable to block urls:%s', message, str(e))
     else:
-        driver = webdriver.Firefox()
+        opt = webdriver.FirefoxOptions()
+        if profile['headless']:
+            opt.add_argument('-headless')
+        fp = webdriver.FirefoxProfile()
+        if profile['block_images']:
+            fp.set_preference('permissions.default.image', 2)
+        if profile['block_fonts']:
+            fp.set_preference('gfx.downloadable_fonts.enabled', False)
+        if profile['block_media']:
+            fp.set_preference('media.autoplay.default', 5)
+            fp.set_preference('media.play-stand-alone', False)
+        if profile['block_trackers']:
+            fp.set_preference('privacy.trackingprotection.enabled', True)
+        driver = webdriver.Firefox(firefox_profile=fp, options=opt)
+        if profile['window_size']:
+            driver.set_window_size( *profile['window_size'] )
+
+    # time the pages this driver loads and count the commands it sends
+    time_page_loads( driver, store, profile_name )
+    winedom.count_round_trips( driver, store )
 
     return driver
 
+
+# wrap driver.get so each page load is timed by store and browser profile
+def time_page_loads( driver, store, profile_name ):
+    get = driver.get
+
+    def timed_get( url ):
+        start = time.monotonic()
+        try:
+            return get( url )
+        finally:
+            seconds = time.monotonic() - start
+            with glb_page_loads_lock:
+                loads = glb_page_loads.setdefault( (store, profile_name), {'pages' : 0, 'seconds' : 0.0} )
+                loads['pages'] += 1
+                loads['seconds'] += seconds
+
+    driver.get = timed_get
+
+
+# log (and return) the page load times by store and profile - a store runs one profile in a
+# run, so its lite/full load times are compared to the last run of the other profile kept in
+# loadfile (this run's times are then saved to loadfile)
+#   loadfile - (opt) json file of store - profile - pages/seconds/avg/rundate
+def log_page_load_stats( loadfile=None ):
+    stats = {}
+    with glb_page_loads_lock:
+        for (store, profile_name), loads in sorted(glb_page_loads.items()):
+            stats.setdefault( store, {} )[profile_name] = dict(loads, avg=loads['seconds'] / loads['pages'] if loads['pages'] else 0.0)
+
+    saved = load_page_load_file( loadfile ) if loadfile else {}
+
+    for store in stats:
+        for profile_name, loads in stats[store].items():
+            logger.info('page load:%s:profile:%s:pages:%d:seconds:%.1f:avg seconds:%.2f', store, profile_name, loads['pages'], loads['seconds'], loads['avg'])
+
+        # this run's profile against the last saved run of the other
+        full = stats[store].get('full') or saved.get(store, {}).get('full')
+        lite = stats[store].get('lite') or saved.get(store, {}).get('lite')
+        if full and lite and full['avg'] and lite['avg']:
+            logger.info('page load:%s:full avg seconds:%.2f:%s:lite avg seconds:%.2f:%s:lite is %.1fx faster', store,
+                        full['avg'], full.get('rundate', 'this run'), lite['avg'], lite.get('rundate', 'this run'), full['avg'] / lite['avg'])
+
+    if loadfile and stats:
+        save_page_load_file( loadfile, stats )
+    return stats
+
+
+# read the page load file - {} when there is none (or it can not be read)
+def load_page_load_file( loadfile ):
+    if not os.path.exists( loadfile ):
+        return {}
+    try:
+        with open( loadfile, 'r' ) as fp:
+            return json.load( fp )
+    except Exception as e:
+        logger.warning('page load file:%s:could not be read:%s', loadfile, str(e))
+        return {}
+
+
+# save this run's page load times by store and profile to the page load file - the other stores
+# and profiles in the file are kept (the pool workers each save the stores they ran)
+def save_page_load_file( loadfile, stats ):
+    saved = load_page_load_file( loadfile )
+    rundate = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+    for store in stats:
+        for profile_name, loads in stats[store].items():
+            if loads['pages']:
+                saved.setdefault( store, {} )[profile_name] = dict(loads, rundate=rundate)
+
+    # write it to the side and swap it in so a reader never sees half a file
+    tmpfile = '%s.%d.tmp' % (loadfile, os.getpid())
+    with open( tmpfile, 'w' ) as fp:
+        json.dump( saved, fp, indent=2, sort_keys=True )
+    os.replace( tmpfile, loadfile )
+    logger.info('page load file:%s:stores saved:%d', loadfile, len(stats))
+
 # -----------------------------------------------------------------------
 
 # routine can be called to create a blank record - no wine found - because we want to know that we looked and did not find anything
@@ -583,17 +924,8 @@ def bevmo_search_box_find( bevmo_driver ):
         # refresh page and find search box
         bevmo_driver.get('https://www.bevmo.com')
 
-        # loop while we have not found the search box and 
-        results = bevmo_driver.find_elements_by_name('fp-input-search')
-        loopcnt = 4
-        while not results and loopcnt:
-        
-            # wait time for page to refres
-            if pmsg: print('bevmo_search_box_find:waiting for search box to appear:', loopcnt)
-            logger.info('waiting for search box to appear:loopcnt:%d', loopcnt)
-            loopcnt -= 1
-            time.sleep(3)
-            results = bevmo_driver.find_elements_by_name('fp-input-search')
+        # wait for the search box to appear
+        results = winewait.wait_until( bevmo_driver, 'bevmo', winewait.elements_present('by_name', 'fp-input-search'), 12, 'search box' ) or []
 
 
     # debugging
@@ -642,8 +974,8 @@ def bevmo_search_box_find( bevmo_driver ):
             if pmsg: print('bevmo_search_box_find:click search icon')
             logger.info('click search icon')
             searchbtn.click()
-            # pause for a second
-            time.sleep(1)
+            # wait for the search box to open
+            winewait.wait_until( bevmo_driver, 'bevmo', winewait.elements_visible('by_name', 'fp-input-search'), 1, 'search box open' )
         else:
             if pmsg: print('bevmo_search_box_find:search button NOT visible - NOT pressed')
             logger.info('search button NOT visible - NOT pressed')
@@ -675,7 +1007,7 @@ def bevmo_search_box_find( bevmo_driver ):
 
     if pmsg: print('bevmo_search_box_find:no visible search boxes:again:TERMINATE program')
     logger.error('bevmo_search_box_find:no visible search boxes:again:TERMINATE program')
-    sys.exit()
+    exitWithError('bevmo_search_box_find:no visible search boxes')
 
 
 # create a search on the web
@@ -738,16 +1070,9 @@ def bevmo_search( srchstring, bevmo_driver ):
         
     
     # now look for no result or result
+    winewait.wait_until( bevmo_driver, 'bevmo', winewait.any_of( winewait.elements_present('by_class_name', 'fp-product-not-found'), winewait.elements_present('by_class_name', 'fp-item-content') ), 8, 'results post breadcrumbs' )
     noresults =  bevmo_driver.find_elements_by_class_name('fp-product-not-found')
     results =  bevmo_driver.find_elements_by_class_name('fp-item-content')
-    loopcnt = 4
-    while not noresults and not results and loopcnt:
-        if pmsg: print('bevmo_search:waiting for results post breadcrumbs to show up:', loopcnt)
-        logger.info('waiting for results post breadcrumbs to show up:%d', loopcnt)
-        time.sleep(2)
-        loopcnt -= 1
-        noresults =  bevmo_driver.find_elements_by_class_name('fp-product-not-found')
-        results =  bevmo_driver.find_elements_by_class_name('fp-item-content')
 
 
     # if no results
@@ -847,17 +1172,12 @@ def bevmo_find_selected_store( driver ):
     for stores in selectedstores:
         if stores.text: 
             storetext=stores.text
-    loopcnt=4
-    while not storetext and loopcnt:
-        if pmsg: print('bevmo_driver:waiting for selected store to be shown:', loopcnt)
-        logger.info('waiting for selected store to be shown:%d', loopcnt)
-        time.sleep(3)
-        loopcnt -= 1
-        selectedstores = driver.find_elements_by_class_name('fp-store-label')
-        for stores in selectedstores:
-            if stores.text: 
-                storetext=stores.text
-                return storetext
+    if not storetext:
+        if pmsg: print('bevmo_driver:waiting for selected store to be shown')
+        logger.info('waiting for selected store to be shown')
+        selectedstores = winewait.wait_until( driver, 'bevmo', winewait.text_present('by_class_name', 'fp-store-label'), 12, 'selected store' )
+        if selectedstores:
+            storetext = selectedstores[0].text
 
     return storetext
     
@@ -876,16 +1196,7 @@ def create_bevmo_selenium_driver_worker(defaultstore, defaultstoreid):
     driver.get('https://www.bevmo.com')
 
     # loop waiting for the modal dialogue to appear
-    modal_found = driver.find_elements_by_class_name('fp-modal-content')
-    modal_count_down = 4
-    while not modal_found and modal_count_down:
-        if pmsg: print('create_bevmo_selenium_driver_worker:waiting for web page to render:', modal_count_down)
-        logger.info('waiting for web page to render:%d', modal_count_down)
-        time.sleep(3)
-        # decrement the modal count down
-        modal_count_down -= 1
-        # search for this again
-        modal_found = driver.find_elements_by_class_name('fp-modal-content')
+    modal_found = winewait.wait_until( driver, 'bevmo', winewait.elements_present('by_class_name', 'fp-modal-content'), 12, 'modal dialogue' )
         
     # did not find it - return none
     if not modal_found:
@@ -902,9 +1213,9 @@ def create_bevmo_selenium_driver_worker(defaultstore, defaultstoreid):
         checkboxes = driver.find_elements_by_class_name('fp-checkbox')
         for checkbox in checkboxes:
             if checkbox.is_displayed():
-                if pmsg: print('bevmo_driver:wait 2 seconds for screen to make box clickable')
-                logger.info('bevmo_driver:wait 2 seconds for screen to make box clickable')
-                time.sleep(2)
+                if pmsg: print('bevmo_driver:wait for screen to make box clickable')
+                logger.info('bevmo_driver:wait for screen to make box clickable')
+                winewait.settle( driver, 'bevmo', 2, 'checkbox clickable' )
                 checkbox.click()
                 break
         else:
@@ -926,10 +1237,10 @@ def create_bevmo_selenium_driver_worker(defaultstore, defaultstoreid):
         logger.warning('bevmo_driver:got an error:%s', errorsent[0].text)
         return None
     
-    # sleep for 1 second to allow page to respond
-    if pmsg: print('bevmo_driver:wait for 1 second')
-    logger.info('bevmo_driver:wait for 1 second')
-    time.sleep(1)
+    # wait for the page to respond
+    if pmsg: print('bevmo_driver:wait for page to respond')
+    logger.info('bevmo_driver:wait for page to respond')
+    winewait.settle( driver, 'bevmo', 1, 'page respond' )
 
     # select the store we want to work with
     try:
@@ -947,7 +1258,7 @@ def create_bevmo_selenium_driver_worker(defaultstore, defaultstoreid):
                 logger.info('is button displayed:%s', button.is_displayed())
                 # print('bevmo_driver:before-clicking-button:saving-browser-for-debugging')
                 # saveBrowserContent( driver, 'bevmobtn', 'bevmo_driver:click-button' )
-                time.sleep(1)
+                winewait.settle( driver, 'bevmo', 1, 'pickup button' )
                 button.click()
                 if pmsg: print('bevmo_driver:button successfully clicked-break out of loop')
                 logger.info('button successfully clicked-break out of loop')
@@ -955,9 +1266,9 @@ def create_bevmo_selenium_driver_worker(defaultstore, defaultstoreid):
             
     except  Exception as e:
         # we expect this to fail here so lets just deal with it
-        if pmsg: print('bevmo_driver:failed and expected - sleep 20 seconds')
-        logger.info('failed and expected - sleep 20 seconds')
-        time.sleep(20)
+        if pmsg: print('bevmo_driver:failed and expected - wait for page to settle')
+        logger.info('failed and expected - wait for page to settle')
+        winewait.settle( driver, 'bevmo', 20, 'btn-primary failed' )
         saveBrowserContent( driver, 'bevmo', 'bevmo_driver:btn-primary-failed' )
 
     # now we need to web page to update so loop until we see it
@@ -1002,10 +1313,10 @@ def create_bevmo_selenium_driver_worker(defaultstore, defaultstoreid):
         if pmsg: print('bevmo_driver:pressed return')
         logger.info('pressed return')
 
-        # wait 
-        if pmsg: print('bevmo_driver:wait 5 sec for stores to display')
-        logger.info('wait 5 sec for stores to display')
-        time.sleep(5)
+        # wait for the stores to display
+        if pmsg: print('bevmo_driver:wait for stores to display')
+        logger.info('wait for stores to display')
+        winewait.wait_until( driver, 'bevmo', winewait.elements_present('by_class_name', 'fp-btn-mystore'), 5, 'stores to display' )
 
         # select the cotinue button of the first one returned
         if pmsg: print('bevmo_driver:find the store of interest - and click that button')
@@ -1021,10 +1332,10 @@ def create_bevmo_selenium_driver_worker(defaultstore, defaultstoreid):
         exceptionPrint( e, 'bevmo_driver', 'failed selecting store', True, driver, 'bevmo', 'bevmo_driver-fp-btn-mystore', exitPgm=True )
 
 
-    # pause to let screen refresh
-    if pmsg: print('bevmo_driver:pause 3 seconds to allow screen to refresh for selected store')
-    logger.info('bevmo_driver:pause 3 seconds to allow screen to refresh for selected store')
-    time.sleep(3)
+    # let the screen refresh for the selected store
+    if pmsg: print('bevmo_driver:wait for screen to refresh for selected store')
+    logger.info('bevmo_driver:wait for screen to refresh for selected store')
+    winewait.settle( driver, 'bevmo', 3, 'selected store refresh' )
 
     # Test that the store got set correctly
     storetext=''
@@ -1073,7 +1384,14 @@ def totalwine_action_email( optiondict={} ):
     if pmsg: print('totalwine_action_email:message sent!')
     logger.info('message sent!')
 
+# the robot check page is up
+def totalwine_robot_present(driver):
+    return len( driver.find_elements_by_class_name('page-title') ) > 0
+
 # check to see if we encountered the robot and if so - then we need to interact with it to get past it
+#
+# totalwine is parked (see winepark) - the other stores keep searching and the robot page is checked
+# again every robot_poll seconds - once cleared totalwine searches the wines it queued
 def totalwine_robot_check(driver, calledby, optiondict={}):
     # validate we are not being checked out for being a robot
     totalwine_driver = driver
@@ -1094,43 +1412,75 @@ def totalwine_robot_check(driver, calledby, optiondict={}):
     # display a message
     try:
         if pmsg: print(calledby+':robot_check:', robot_check[0].text)
-        if pmsg: print(calledby+':please fill out the robot form and this program will continue')
+        if pmsg: print(calledby+':please fill out the robot form and totalwine will continue')
         logger.info('%s:robot_check:%s', calledby, robot_check[0].text)
-        logger.info('%s:please fill out the robot form and this program will continue', calledby)
+        logger.info('%s:please fill out the robot form and totalwine will continue', calledby)
     except:
         if pmsg: print(calledby+':robot_check:fill it out but we could not display the text')
         logger.info('%s:robot_check:fill it out but we could not display the text',calledby)
 
+    # park totalwine - the search loop checks the page again on a timer
+    if pmsg: print(calledby+':parking totalwine at:', time.ctime())
+    logger.info('%s:parking totalwine at:%s', calledby, time.ctime())
+    # removed the save browser code for robots
+    # saveBrowserContent( totalwine_driver, 'totalwine', 'totalwine_robot' )
+    raise winepark.StoreParked( 'totalwine', calledby+':robot check' )
+
+# wait on the robot check while the totalwine driver is created - this runs on the totalwine
+# startup thread so only totalwine waits - checked every robot_poll seconds
+def totalwine_robot_wait(driver, calledby, optiondict={}):
+    try:
+        return totalwine_robot_check(driver, calledby, optiondict)
+    except winepark.StoreParked:
+        pass
 
-    # loop until the user resolves this issue
-    loopcnt = 1
-    while( len(robot_check) ):
-        # then update the display
-        if pmsg: print(calledby+':loopcnt:', loopcnt)
-        logger.info('%s:loopcnt:%d', calledby, loopcnt)
-        loopcnt += 1
-        #input()
-        # sleep 5 minutes
-        if pmsg: print(calledby+':sleep for 3 minutes starts at:', time.ctime())
-        logger.info('%s:sleep for 3 minutes starts at:%s', calledby, time.ctime())
-        time.sleep(60*3)
-        # check again to see it as cleared
-        robot_check = totalwine_driver.find_elements_by_class_name('page-title')
+    start = time.monotonic()
+    while totalwine_robot_present(driver):
+        if pmsg: print(calledby+':robot check still up - checking again in seconds:', optiondict.get('robot_poll', 180))
+        logger.info('%s:robot check still up - checking again in seconds:%d', calledby, optiondict.get('robot_poll', 180))
+        time.sleep( optiondict.get('robot_poll', 180) )
 
     # cleared the issue - return true
     if pmsg: print(calledby+':problem cleared at:', time.ctime())
-    logger.info('%s:problem cleared at:%s', calledby, time.ctime())
-    # removed the save browser code for robots
-    # saveBrowserContent( totalwine_driver, 'totalwine', 'totalwine_robot' )
+    logger.info('%s:problem cleared at:%s:seconds waited:%.0f', calledby, time.ctime(), time.monotonic() - start)
     return True
 
 
-# function used to extract the data from the DOM that was returned
+# condition - a field totalwine_search gets the result count from is on the page
+glb_totalwine_result_count = winewait.any_of(
+    winewait.elements_present('by_class_name', 'resultCount__1rzUJ1mi'),
+    winewait.elements_present('by_class_name', 'resultsTitle__2yxTXNeW'),
+    winewait.elements_present('by_id', 'anProdCount'),
+    winewait.elements_present('by_id', 'listCount'),
+    winewait.elements_present('by_id', 'searchPageContainer'),
+)
+
+# the fields totalwine_search pulls off the page (see winedom) for each layout of the search page (fldmatch)
+glb_totalwine_fields = {
+    'searchPageContainer' : {
+        'title' : '.title__11ZhZ3BZ',
+        'avail' : '.messageHolder__20eUWkhD',
+        'price' : '.pricingHolder__1VkKua4M',
+    },
+    'resultCount__1rzUJ1mi' : {
+        'title' : '.title__2RoYeYuO',
+        'avail' : '.messageHolder__1LBm8SMH',
+        'price' : '.pricingHolder__1ItgGBnd',
+    },
+    'plp' : {
+        'title' : '.plp-product-title',
+        'avail' : '.plp-product-buy-limited',
+        'size'  : '.plp-product-qty',
+        'price' : '.price',
+    },
+}
+
+# function used to extract the data from the DOM that was returned - the lists are the text of the fields
 def totalwine_extract_wine_from_DOM(winestore,index,titlelist,pricelist,sizelist,fldmatch):
     
     # extract the values
-    winename = titlelist[index].text 
-    wineprice = pricelist[index].text
+    winename = titlelist[index]
+    wineprice = pricelist[index]
 
     # if pmsg: print('totalwine_extract_wine_from_DOM:',wineprice)
 
@@ -1143,7 +1493,7 @@ def totalwine_extract_wine_from_DOM(winestore,index,titlelist,pricelist,sizelist
             winename = winename.replace('\n',' ')
             winesize = '750ml'
     else:
-        winesize = sizelist[index].text
+        winesize = sizelist[index]
     
     # add size if size is NOT 750ml
     if winesize != '750ml':
@@ -1266,11 +1616,8 @@ def totalwine_search( srchstring, totalwine_driver, optiondict={} ):
     # call the search
     totalwine_search_lookup( srchstring, totalwine_driver, optiondict )
 
-    # test to see if we are being checked for a robot again
-    if totalwine_robot_check(totalwine_driver,'totalwine_search:send_keys', optiondict ):
-        if pmsg: print('totalwine_search:got robot - call search lookup again')
-        logger.info('got robot - call search lookup again')
-        totalwine_search_lookup( srchstring, totalwine_driver, optiondict )
+    # test to see if we are being checked for a robot again - parks totalwine and this wine is searched again once cleared
+    totalwine_robot_check(totalwine_driver,'totalwine_search:send_keys', optiondict )
 
 
     # message
@@ -1281,10 +1628,10 @@ def totalwine_search( srchstring, totalwine_driver, optiondict={} ):
     returned_recs = None
     loopcnt = 0
     while returned_recs == None:
-        # sleep to give page time to fill in
-        if pmsg: print('totalwine_search:pause 0.5 sec to allow the page to fill in')
-        logger.info('pause 0.5 sec to allow the page to fill in')
-        time.sleep(0.5)
+        # wait for the page to fill in one of the fields we get the result count from
+        if pmsg: print('totalwine_search:wait for the page to fill in')
+        logger.info('wait for the page to fill in')
+        winewait.wait_until( totalwine_driver, 'totalwine', glb_totalwine_result_count, 0.5, 'result count' )
 
         
         # check now for <span class="resultCount__1rzUJ1mi"><span>1 - 18 of 18 results</span></span>
@@ -1421,27 +1768,12 @@ def totalwine_search( srchstring, totalwine_driver, optiondict={} ):
     logger.info(rtnrecfmt, srchstring, returned_recs)
     
     # get results back and look for the thing we are looking for - the list of things we are going to process
-    if fldmatch == 'searchPageContainer':
-        titlelist = totalwine_driver.find_elements_by_class_name('title__11ZhZ3BZ')
-        availlist = totalwine_driver.find_elements_by_class_name('messageHolder__20eUWkhD')
-        #mix6list = totalwine_driver.find_elements_by_class_name('')
-        sizelist  = []
-        pricelist = totalwine_driver.find_elements_by_class_name('pricingHolder__1VkKua4M')
-    elif fldmatch == 'resultCount__1rzUJ1mi':
-        # <h2 class="title__2RoYeYuO titleDown__BwxDDzkX" id="product-117908175-1-0_Title">
-        titlelist = totalwine_driver.find_elements_by_class_name('title__2RoYeYuO')
-        # <div class="messageHolder__1LBm8SMH">
-        availlist = totalwine_driver.find_elements_by_class_name('messageHolder__1LBm8SMH')
-        #mix6list = totalwine_driver.find_elements_by_class_name('')
-        sizelist  = []
-        #<div class="pricingHolder__1ItgGBnd">
-        pricelist = totalwine_driver.find_elements_by_class_name('pricingHolder__1ItgGBnd')
-    else:
-        titlelist = totalwine_driver.find_elements_by_class_name('plp-product-title')
-        availlist = totalwine_driver.find_elements_by_class_name('plp-product-buy-limited')
-        #mix6list = totalwine_driver.find_elements_by_class_name('plp-product-buy-mix')
-        sizelist  = totalwine_driver.find_elements_by_class_name('plp-product-qty')
-        pricelist = totalwine_driver.find_elements_by_class_name('price')
+    # <h2 class="title__2RoYeYuO titleDown__BwxDDzkX" id="product-117908175-1-0_Title"> - one round trip for all of them
+    fields = winedom.extract_lists( totalwine_driver, glb_totalwine_fields.get( fldmatch, glb_totalwine_fields['plp'] ) )
+    titlelist = fields['title']
+    availlist = fields['avail']
+    sizelist  = fields.get('size', [])
+    pricelist = fields['price']
             
     # debugging
     if pmsg: print('totalwine_search:Counts:title,avail,size,price,fldmatch:', len(titlelist),len(availlist),len(sizelist),len(pricelist),fldmatch)
@@ -1459,26 +1791,24 @@ def totalwine_search( srchstring, totalwine_driver, optiondict={} ):
         # get the availability string
         if len(availlist)==0:
             availstring = ''
-        elif isinstance( availlist[index], str ):
-            availstring = availlist[index]
         else:
-            availstring = availlist[index].text
+            availstring = availlist[index]
 
         # debugging
         # if pmsg: print(availstring+':',"Unavailable" not in availstring,'\n')
 
         # we don't grab records where they are out of stock
-        if not titlelist[index].text:
+        if not titlelist[index]:
             if pmsg: print('totalwine_search:no wine title for this row:row skipped')
             logger.info('no wine title for this row:row skipped')
         elif availstring and "Pick Up Out of Stock" in availstring:
             # show the out of stock entries to the user/log
-            if pmsg: print('totalwine_search:unavailable_wine_skipped:',titlelist[index].text,':unavailable_string:',availstring)
-            logger.info('unavailable_wine_skipped:%s:unavailable_string:%s',titlelist[index].text,availstring)
+            if pmsg: print('totalwine_search:unavailable_wine_skipped:',titlelist[index],':unavailable_string:',availstring)
+            logger.info('unavailable_wine_skipped:%s:unavailable_string:%s',titlelist[index],availstring)
         elif availstring and "Pick Up Unavailable" in availstring:
             # show the out of stock entries to the user/log
-            if pmsg: print('totalwine_search:unavailable_wine_skipped:',titlelist[index].text,':unavailable_string:',availstring)
-            logger.info('unavailable_wine_skipped:%s:unavailable_string:%s',titlelist[index].text,availstring)
+            if pmsg: print('totalwine_search:unavailable_wine_skipped:',titlelist[index],':unavailable_string:',availstring)
+            logger.info('unavailable_wine_skipped:%s:unavailable_string:%s',titlelist[index],availstring)
         else:
             # this is not out of stock
             found_wines.append( totalwine_extract_wine_from_DOM(winestore,index,titlelist,pricelist,sizelist,fldmatch) )
@@ -1502,13 +1832,13 @@ def create_totalwine_selenium_driver(defaultstore, optiondict):
     # Open the website
     driver.get('https://www.totalwine.com')
 
-    # sleep to allow the dialogue to come up
-    if pmsg: print('totalwine_driver:sleep 1 to allow popup to appear')
-    logger.info('sleep 1 to allow popup to appear')
-    time.sleep(1)
+    # wait for the page to settle so the dialogue can come up
+    if pmsg: print('totalwine_driver:wait for popup to appear')
+    logger.info('wait for popup to appear')
+    winewait.settle( driver, 'totalwine', 1, 'popup' )
 
     # check for robot
-    totalwine_robot_check(driver,'totalwine_driver', optiondict)
+    totalwine_robot_wait(driver,'totalwine_driver', optiondict)
 
     # check for the button being visible
     try:
@@ -1657,15 +1987,7 @@ def totalwine_driver_set_store(driver, defaultstore):
     # class = storeFinderLister
     # find the list of stores returned
     #matching_stores = driver.find_elements_by_class_name('storeFinderLister')
-    matching_stores = None
-    matching_count_down = 4
-    while not matching_stores and matching_count_down:
-        matching_stores = driver.find_elements_by_class_name('shopThisStore')
-        if not matching_stores:
-            if pmsg: print('totalwine_driver_set_store:wait to find returned stores 3 secs')
-            logger.info('wait to find returned stores 3 secs')
-            time.sleep(3)
-            matching_count_down -= 1
+    matching_stores = winewait.wait_until( driver, 'totalwine', winewait.elements_present('by_class_name', 'shopThisStore'), 12, 'returned stores' ) or []
 
     # now capture the store we found
     select_store=matching_stores[0]
@@ -1682,10 +2004,10 @@ def totalwine_driver_set_store(driver, defaultstore):
         if pmsg: print('totalwine_driver_set_store:store is not clickable - must already be selected')
         logger.info('store is not clickable - must already be selected')
 
-    # sleep for 1 second to allow page refresh
-    if pmsg: print('totalwine_driver_set_store:sleep 1 sec to allow for page refresh')
-    logger.info('sleep 1 sec to allow for page refresh')
-    time.sleep(1)
+    # wait for the page refresh
+    if pmsg: print('totalwine_driver_set_store:wait for page refresh')
+    logger.info('wait for page refresh')
+    winewait.settle( driver, 'totalwine', 1, 'select store refresh' )
 
     # now pull the name of the store we are currently configured to work from
     return totalwine_driver_get_store(driver, defaultstore)
@@ -1821,7 +2143,7 @@ def get_wineclub_url( driver ):
                 if pmsg: print('wineclub_driver:page did not load - took too long - try again')
                 logger.warning('page did not load - took too long - try again')
                 driver.get('https://theoriginalwineclub.com/wine.html')
-            time.sleep(1)
+            winewait.wait_until( driver, 'wineclub', winewait.elements_present('by_xpath', '//*[@id="search"]'), 1, 'search box' )
             cnt -= 1
         else:
             if not 'took too long' in driver.page_source:
@@ -1873,20 +2195,30 @@ def create_wineclub_selenium_driver(defaultzip):
 
 #### HITIME ####
 
-# function used to extract the data from the DOM that was returned
+# the fields hitime_search pulls off the page for each wine (see winedom)
+#   title is page-title on a single wine page and product-name on a list of wines
+glb_hitime_fields = {
+    'price'        : '.price',
+    'regular'      : '.regular-price',
+    'special'      : '.special-price',
+    'specialprice' : '.special-price .price',
+    'wrapper'      : '.price-wrapper',
+}
+
+# function used to extract the data from the DOM that was returned - the lists are the text of the fields
 # pulling back the price record with the lowest price
 def hitime_extract_wine_from_DOM(winestore,index,titlelist,pricelist):
     global verbose
 
     
     # extract the values for title
-    winename = titlelist[index].text.upper()
+    winename = titlelist[index].upper()
 
     # now find the lowest of prices
     winepricemin=100000.00
     for winepricerec in pricelist:
-        #if pmsg: print('winepricemin:', winepricemin, ':winepricerec:', winepricerec.text)
-        winepriceflt = float(winepricerec.text.replace('$','').replace(',',''))
+        #if pmsg: print('winepricemin:', winepricemin, ':winepricerec:', winepricerec)
+        winepriceflt = float(winepricerec.replace('$','').replace(',',''))
         if winepricemin > winepriceflt:
             winepricemin = winepriceflt
             # if pmsg: print('min set to:', winepricemin)
@@ -1961,16 +2293,10 @@ def hitime_search( srchstring, hitime_driver ):
     # check to see that we got a search results page
     # and that our search string is in it
     results = find_elements_looped( hitime_driver, 'page-title-wrapper', 'by_class_name', 'hitime_search', 'waiting for search result string' )
-    loopcnt = 4
-    try:
-        while results and srchstring.upper() not in results[0].text and loopcnt:
-            if pmsg: print('htimes_search: srchstring not in srch result string:', loopcnt)
-            logger.info('srchstring not in srch result string:%d', loopcnt)
-            loopcnt -= 1
-            time.sleep(2)
-            results = find_elements_looped( hitime_driver, 'page-title-wrapper', 'by_class_name', 'hitime_search', 'waiting for search result string' )
-    except:
-        results = find_elements_looped( hitime_driver, 'page-title-wrapper', 'by_class_name', 'hitime_search', 'waiting for search result string' )
+    if results and not winewait.wait_until( hitime_driver, 'hitime', winewait.text_present('by_class_name', 'page-title-wrapper', srchstring.upper()), 8, 'search result string' ):
+        if pmsg: print('htimes_search: srchstring not in srch result string')
+        logger.info('srchstring not in srch result string')
+    results = find_elements_looped( hitime_driver, 'page-title-wrapper', 'by_class_name', 'hitime_search', 'waiting for search result string' )
 
     # if pmsg: print out what we found
     for pagetitle in results:
@@ -2026,51 +2352,35 @@ def hitime_search( srchstring, hitime_driver ):
         logger.info('single wine found - swapping entitylist2 into entitylist')
         entitylist = entitylist2
         
+    # skip the entities over the result count or the max items per page
+    if len(entitylist) > min(resultcnt, 25):
+        if pmsg: print('hitime_search:entitycount:{} > resultcnt:{} or max-items-per-page:{} - skipping the rest'.format(len(entitylist),resultcnt,25))
+        logger.info('entitycount:{} > resultcnt:{} or max-items-per-page:{} - skipping the rest'.format(len(entitylist),resultcnt,25))
+
+    # extract out for each entry the title and price lists - one round trip for all of them
+    try:
+        if entitylist2 == entitylist:
+            rows = winedom.extract_rows( hitime_driver, '.product-info-main', dict(glb_hitime_fields, title='.page-title'), min(resultcnt, 25) )
+        else:
+            rows = winedom.extract_rows( hitime_driver, '.product-item-info', dict(glb_hitime_fields, title='.product-name'), min(resultcnt, 25) )
+    except Exception as e:
+        exceptionPrint( e, 'hitime_search', 'ERROR:extracting title and price lists:'+srchstring, True, hitime_driver, 'hitime', 'hitime_search' )
+        if pmsg: print('hitime_search: {} : returned records:'.format(srchstring), len(found_wines))
+        logger.info(rtnrecfmt, srchstring, len(found_wines))
+        return found_wines
+
     # step through this list
     entitycount = 0
-    for entity in entitylist:
+    for row in rows:
         entitycount += 1
-        if entitycount > resultcnt:
-            if pmsg: print('hitime_search:entitycount:{} > resultcnt:{} - skipping'.format(entitycount,resultcnt))
-            logger.info('entitycount:{} > resultcnt:{} - skipping'.format(entitycount,resultcnt))
-            break
-
-        # check entitycount to maxresults per page
-        if entitycount > 25:
-            if pmsg: print('hitime_search:entitycount:{} > max-items-per-page:{} - skipping'.format(entitycount,25))
-            logger.info('entitycount:{} > max-items-per-page:{} - skipping'.format(entitycount,25))
-            break
-
-        # extract out for this entry these - we use elements so we don't need to try/catch
-        try:
-            if entitylist2 == entitylist:
-                titlelist = entity.find_elements_by_class_name('page-title')
-            else:
-                titlelist = entity.find_elements_by_class_name('product-name')
-            pricelistraw = entity.find_elements_by_class_name('price')
-            pricelistreg = entity.find_elements_by_class_name('regular-price')
-            pricelistspecial = entity.find_elements_by_class_name('special-price')
-            pricelistwrapper = entity.find_elements_by_class_name('price-wrapper')
-            if pricelistspecial:
-                pricelistwrapper = pricelistspecial[0].find_elements_by_class_name('price')
-        except Exception as e:
-            if pmsg: print('hitime_search:entitycount:', entitycount)
-            logger.info('entitycount:%d', entitycount)
-            exceptionPrint( e, 'hitime_search', 'ERROR:extracting title and price lists:'+srchstring, True, hitime_driver, 'hitime', 'hitime_search' )
-            if pmsg: print('hitime_search: {} : returned records:'.format(srchstring), len(found_wines))
-            logger.info(rtnrecfmt, srchstring, len(found_wines))
-            # capture and process errors if we get them
-            try:
-                resultidx = 0
-                for result in results:
-                    if pmsg: print('hitime_search:result[{}].text:{}'.format(resultidx, result.text))
-                    logger.info('resultidx:%s:result.text:%s',resultidx, result.text)
-                    resultidx += 1
-            except Exception as e:
-                exceptionPrint( e, 'hitime_search', 'ERROR:post error processing error:'+srchstring, True, hitime_driver, 'hitime', 'hitime_search' )
 
-            return found_wines
-            
+        # the special price replaces the price wrapper
+        titlelist = row['title']
+        pricelistraw = row['price']
+        pricelistreg = row['regular']
+        pricelistwrapper = row['wrapper']
+        if row['special']:
+            pricelistwrapper = row['specialprice']
 
         # debugging
         logger.debug('dump out the various things we just extracted')
@@ -2113,15 +2423,7 @@ def hitime_starting_dialogue_click_closed( driver ):
     try:
         # find the element
         close_link = driver.find_element_by_xpath('//*[@id="contentInformation"]/div[2]/div[2]/a')
-        loopcnt = 11
-        while not close_link.is_displayed() and loopcnt:
-            # increment the counter
-            loopcnt -= 1
-            # debugging
-            if pmsg: print('hitime_driver:wait for the object to be displayed:', loopcnt)
-            logger.info('wait for the object to be displayed:%d', loopcnt)
-            # sleep
-            time.sleep(2)
+        winewait.wait_until( driver, 'hitime', winewait.element_visible( close_link ), 22, 'close link displayed' )
 
         # now we waited long enough - what do we do now?
         if close_link.is_displayed():
@@ -2229,8 +2531,8 @@ def wally_search( srchstring, wally_driver ):
     search_box.send_keys(srchstring)
     search_box.send_keys(Keys.RETURN)
     
-    # pause for page to catch up
-    time.sleep(1)
+    # wait for the search page to replace this one
+    winewait.wait_until( wally_driver, 'wally', winewait.element_stale( search_box ), 1, 'search submit' )
 
     # create the array that we will add to
     found_wines = []
@@ -2250,21 +2552,7 @@ def wally_search( srchstring, wally_driver ):
         return returnNoWineFound( winestore )
 
     # odd - but the javascript in the page drives the population of content - so we have to wait for this to happen
-    loopcnt = 6
-    resulttext = ''
-    while not resulttext and loopcnt:
-        try:
-            resulttext = results[0].text
-        except Exception as e:
-            exceptionPrint( e, 'wally_search', 'ERROR:failed to get result.text for search on:'+srchstring, True, wally_driver, 'wally', 'wally_search' )
-            if pmsg: print('wally_search:find_elements_looped again')
-            logger.info('find_elements_looped again')
-            results = find_elements_looped( wally_driver, 'category-products', 'by_class_name', 'wally_search', 'look for content again' )
-            
-        time.sleep(1)
-        if pmsg: print('wally_search:waiting for result text to show up:result.text:', loopcnt)
-        logger.info('waiting for result text to show up:loopcnt:%d', loopcnt)
-        loopcnt -= 1
+    winewait.wait_until( wally_driver, 'wally', winewait.text_present('by_class_name', 'category-products'), 6, 'result text' )
     
     
     # get the specifics we want
@@ -2693,13 +2981,7 @@ def set_pavillions_shopping_zipcode(driver, defaultzip, storename):
     zipcode_box = results[0]
 
     # give time for this box to become displayed
-    loopcnt=6
-    while not zipcode_box.is_displayed() and loopcnt:
-        # message
-        if pmsg: print('set_pavillions_shopping_zipcode:zipcode_box is displayed:', zipcode_box.is_displayed(), ':loopcnt:', loopcnt)
-        logger.info('zipcode_box is_displayed:%s:loopcnt:%d', zipcode_box.is_displayed(), loopcnt)
-        time.sleep(2)
-        loopcnt -= 1
+    winewait.wait_until( driver, 'pavillions', winewait.element_visible( zipcode_box ), 12, 'zipcode box displayed' )
 
     # message
     if pmsg: print('set_pavillions_shopping_zipcode:zipcode_box is displayed:', zipcode_box.is_displayed())
@@ -2738,10 +3020,10 @@ def set_pavillions_shopping_zipcode(driver, defaultzip, storename):
                 # we have a match
                 storebtn=store.find_element_by_class_name('card-store-btn')
                 storebtn.click()
-                # sleep here
+                # wait for the page to refresh
                 if pmsg: print('set_pavillions_shopping_zipcode:clicked store button:', store.text)
                 logger.info('clicked store button:%s', store.text)
-                time.sleep(3)
+                winewait.settle( driver, 'pavillions', 3, 'store button' )
             except Exception as e:
                 exceptionPrint( e,'set_pavillions_shopping_zipcode' , 'found button and could not click it:'+storename, True, driver, 'pav', 'set_pavillions_shopping_zipcode' )
 
@@ -3135,14 +3417,7 @@ def napacab_search( srchstring, napacab_driver ):
 
 
     # look for the page heading
-    results= napacab_return_results( napacab_driver, srchstring )
-    loopcnt = 6
-    while not results and loopcnt:
-        if pmsg: print('napacab_search:waiting for web page to respond:', loopcnt)
-        logger.info('waiting for web page to respond:%d', loopcnt)
-        loopcnt -= 1
-        time.sleep(3)
-        results= napacab_return_results( napacab_driver, srchstring )
+    results = winewait.wait_until( napacab_driver, 'napacab', lambda driver: napacab_return_results( driver, srchstring ), 18, 'search response', poll=1 )
         
 
     # create the array that we will add to
@@ -3216,7 +3491,7 @@ def napacab_search( srchstring, napacab_driver ):
 
 
     # watch to see if the popup came in after we are done
-    time.sleep(2)
+    winewait.settle( napacab_driver, 'napacab', 2, 'popup' )
     napacab_over21( napacab_driver )
     napacab_email_signup( napacab_driver )
 
@@ -3267,18 +3542,27 @@ def create_napacab_selenium_driver(defaultzip):
 #### RALPHS ####
 
 
-# function used to extract the data from the DOM that was returned
+# the fields ralphs_search pulls off the page for each wine - ProductCard (see winedom)
+glb_ralphs_fields = {
+    'title'          : '.kds-Text--m',
+    'pricecontainer' : '.kds-Price',
+    'pricepromo'     : '.kds-Price-promotional',
+    'avail'          : '.AvailableModalities-line1',
+    'size'           : '.ProductCard-sellBy-unit',
+}
+
+# function used to extract the data from the DOM that was returned - the lists are the text of the fields
 def ralphs_extract_wine_from_DOM(winestore,index,titlelist,pricelist,sizelist):
     global verbose
 
     
     # extract the values
-    winename = titlelist[index].text
-    wineprice = pricelist[index].text
+    winename = titlelist[index]
+    wineprice = pricelist[index]
 
     # add the size to the name
     if sizelist:
-        winename += ' ' + sizelist[index].text
+        winename += ' ' + sizelist[index]
     
     # regex the price field to match our expections
     match = re.search('\$(.*)<',wineprice)
@@ -3342,12 +3626,7 @@ def ralphs_search( srchstring, ralphs_driver ):
         # put in saveBrowser here
         return []
 
-    loopcnt=4
-    while results[0].text.startswith('Search') and loopcnt:
-        if pmsg: print('ralphs_search:result count not populated yet - wait')
-        logger.info('result count not populated yet - wait:%d', loopcnt)
-        time.sleep(2)
-        loopcnt -= 1
+    winewait.wait_until( ralphs_driver, 'ralphs', lambda driver: not results[0].text.startswith('Search'), 8, 'result count populated' )
 
     # message
     if pmsg: print('ralphs_search:len result:', len(results))
@@ -3368,14 +3647,8 @@ def ralphs_search( srchstring, ralphs_driver ):
 
     
     # get the count from wine list
-    loopcnt = 4
+    winewait.wait_until( ralphs_driver, 'ralphs', lambda driver: len(driver.find_elements_by_class_name('ProductCard')) >= max(1, resultcnt), 8, 'wine list' )
     winelist = ralphs_driver.find_elements_by_class_name('ProductCard')
-    while loopcnt and (not winelist or len(winelist) < resultcnt):
-        if pmsg: print('ralphs_search:len(winelist)<resultcnt:wait:', loopcnt)
-        logger.info('len(winelist)<resultcnt:wait:%d', loopcnt)
-        time.sleep(2)
-        loopcnt -= 1
-        winelist = ralphs_driver.find_elements_by_class_name('ProductCard')
 
 
     # messaging
@@ -3388,20 +3661,27 @@ def ralphs_search( srchstring, ralphs_driver ):
         logger.info('DEBUGGING:resultcnt does not match winelist')
         #saveBrowserContent( ralphs_driver, 'ralphs', 'ralphs_search:winelist-not-match-resultcnt')
     
+    # get results back and look for the thing we are looking for - the list of things we are going to process
+    # one round trip for all the wines
+    try:
+        rows = winedom.extract_rows( ralphs_driver, '.ProductCard', glb_ralphs_fields )
+    except Exception as e:
+        exceptionPrint( e, 'ralphs_search', 'ERROR:extracting the wine list:'+srchstring, True, ralphs_driver, 'ralphs', 'ralphs_search')
+        return found_wines
+
     # step through the winelist
     index=0
-    for item in winelist:
+    for row in rows:
         
-        # get results back and look for the thing we are looking for - the list of things we are going to process
-        titlelist = item.find_elements_by_class_name('kds-Text--m')
-        pricecontainerlist  = item.find_elements_by_class_name('kds-Price')
-        priceoriglist = item.find_elements_by_class_name('kds-Price-original')
-        pricepromolist = item.find_elements_by_class_name('kds-Price-promotional')
-        availlist = item.find_elements_by_class_name('AvailableModalities-line1')
-        sizelist = item.find_elements_by_class_name('ProductCard-sellBy-unit')
+        # the lists for this wine
+        titlelist = row['title']
+        pricecontainerlist  = row['pricecontainer']
+        pricepromolist = row['pricepromo']
+        availlist = row['avail']
+        sizelist = row['size']
 
         # debugging
-        # if pmsg: print('ralphs_search:lengths:index:{},title:{},pricepromo:{},pricecontainer:{},priceorig:{}'.format(index,len(titlelist),len(pricepromolist),len(pricecontainerlist),len(priceoriglist)))
+        # if pmsg: print('ralphs_search:lengths:index:{},title:{},pricepromo:{},pricecontainer:{}'.format(index,len(titlelist),len(pricepromolist),len(pricecontainerlist)))
 
         # extract out the wine and price
         try:
@@ -3421,9 +3701,9 @@ def ralphs_search( srchstring, ralphs_driver ):
         try:
             # debugging for now
             if availlist:
-                if availlist[0].text != 'Pickup & Delivery Available':
-                    if pmsg: print('ralphs_search:debugging:', titlelist[0].text, ':', availlist[0].text)
-                    logger.info('debugging:%s:%s', titlelist[0].text, availlist[0].text)
+                if availlist[0] != 'Pickup & Delivery Available':
+                    if pmsg: print('ralphs_search:debugging:', titlelist[0], ':', availlist[0])
+                    logger.info('debugging:%s:%s', titlelist[0], availlist[0])
         except Exception as e:
             if pmsg: print('ralphs_availlist_print:', index)
             logger.info('index:%d', index)
@@ -3454,10 +3734,10 @@ def ralphs_set_store( driver, defaultzip, storename, dataTestID ):
         zip[0].send_keys(defaultzip)
         zip[0].send_keys(Keys.RETURN)
 
-    # now wait a second to allow screen to update
-    if pmsg: print('ralphs_set_store:wait 2 seconds')
-    logger.info('wait 2 seconds')
-    time.sleep(2)
+    # now wait for the screen to update
+    if pmsg: print('ralphs_set_store:wait for store buttons')
+    logger.info('wait for store buttons')
+    winewait.wait_until( driver, 'ralphs', winewait.elements_present('by_class_name', 'AvailableModality--Button'), 2, 'store buttons' )
 
     # get the list of buttons and search for the one that we want
     selectbtns = driver.find_elements_by_class_name('AvailableModality--Button')
@@ -3613,102 +3893,786 @@ def create_ralphs_selenium_driver(defaultzip, storename, dataTestID):
 
 
 
+# run a store search once the throttle shared by the process (see winethrottle)
+# gives us a slot for that store
+#
+# the breaker (see winebreaker) skips a store that keeps failing - a search fails when it
+# raises an exception (logged here so one store does not end the run) or returns no records
+# (the search routines return [] when the page did not work, no wine found is a record)
+def store_search( breaker, store, search_func, *args, errors=None ):
+    # skip a store that keeps failing
+    if not winebreaker.breaker_allow( breaker, store ):
+        if pmsg: print('store_search:', store, ':SKIPPING - breaker open')
+        logger.info('store:%s:skipped - breaker open', store)
+        return []
+
+    start = time.monotonic()
+    trips = winedom.round_trips( store )
+    try:
+        with winethrottle.throttled( winethrottle.get_throttle(), store ):
+            found_wines = search_func( *args )
+    except winepark.StoreParked:
+        # not a failure - the store is waiting on a person - give back the probe if this was it
+        winebreaker.breaker_release( breaker, store )
+        raise
+    except Exception as e:
+        if pmsg: print('store_search:', store, ':exception:', str(e))
+        logger.error('store:%s:error:%s', store, str(e))
+        found_wines = []
+        if errors is not None:
+            errors.add( store )
+
+    winedom.record_search( store, winedom.round_trips( store ) - trips )
+    winebreaker.breaker_record( breaker, store, len(found_wines) > 0, time.monotonic() - start )
+    return found_wines
+
+
+# the search function store_search calls under the supervisor (see winesupervisor) - when the search
+# raises the driver of this store is torn down and created again and the wine is searched again,
+# the drivers of the other stores are not touched
+#   drivers - dict of store to driver - the restarted driver replaces the old one
+def supervised_search( supervisor, drivers, store, srchstring, optiondict ):
+    return winesupervisor.supervised_call( supervisor, store, srchstring,
+                                           lambda: glb_store_browsers[store]['search']( srchstring, drivers[store], optiondict ),
+                                           lambda: restart_store_driver( drivers, store, optiondict ),
+                                           passthru=(winepark.StoreParked,) )
+
+
+# tear down the driver of one store and create it again - the old driver stays in drivers when a
+# new one could not be created (so the store is restarted again on its next search)
+def restart_store_driver( drivers, store, optiondict ):
+    if pmsg: print('restart_store_driver:', store, ':restarting driver')
+    logger.info('store:%s:restarting driver', store)
+    try:
+        drivers[store].quit()
+    except Exception as e:
+        logger.warning('store:%s:driver quit failed:%s', store, str(e))
+
+    driver = glb_store_browsers[store]['create']( optiondict )
+    if driver is None:
+        raise RuntimeError('driver could not be created for store:%s' % store)
+    drivers[store] = driver
+
+
+# create the supervisor for a run from the command line options
+def create_store_supervisor( optiondict ):
+    return winesupervisor.create_supervisor( optiondict.get('store_retries', 2), optiondict.get('store_backoff', 15), max_restarts=optiondict.get('store_max_restarts', 10) )
+
+
+# create the parking (see winepark) for a run from the command line options
+def create_store_parking( optiondict ):
+    return winepark.create_parking( optiondict.get('robot_poll', 180), optiondict.get('robot_max_wait', 0) )
+
+
+# search a store that can be parked (see winepark) - a parked store queues srchstring and is checked
+# again every robot_poll seconds, once its check clears it searches the wines it queued
+#   drivers - dict of store to driver
+#
+# returns the list of (srchstring, winelist) the store searched on this call - in the order queued
+def parked_store_search( parking, breaker, supervisor, drivers, store, srchstring, optiondict, errors=None ):
+    if winepark.store_parked( parking, store ):
+        winepark.queue_label( parking, store, srchstring )
+        if not winepark.poll_due( parking, store ) or store_still_parked( drivers, store ):
+            return []
+        srchstrings = winepark.unpark_store( parking, store )
+    else:
+        srchstrings = [ srchstring ]
+    return search_store_wines( parking, breaker, supervisor, drivers, store, srchstrings, optiondict, errors )
+
+
+# search the store for each wine in srchstrings - the store is parked with the wines left when a search parks it
+#
+# returns the list of (srchstring, winelist) searched
+def search_store_wines( parking, breaker, supervisor, drivers, store, srchstrings, optiondict, errors=None ):
+    searched = []
+    for wineidx, srchstring in enumerate(srchstrings):
+        try:
+            searched.append( (srchstring, store_search( breaker, store, supervised_search, supervisor, drivers, store, srchstring, optiondict, errors=errors )) )
+        except winepark.StoreParked as e:
+            if pmsg: print('search_store_wines:', store, ':parked:', e.reason)
+            winepark.park_store( parking, store, srchstrings[wineidx:], e.reason )
+            break
+    return searched
+
+
+# is the check that parked this store still up - a driver we can not ask is taken as cleared
+# (the search that follows fails and restarts it)
+def store_still_parked( drivers, store ):
+    try:
+        return glb_store_browsers[store]['robot']( drivers[store] )
+    except Exception as e:
+        logger.warning('store:%s:could not check parked store:%s', store, str(e))
+        return False
+
+
+# wait on the stores still parked at the end of the run - each is checked every robot_poll seconds and
+# searches its queued wines once it clears (its wines are given up after robot_max_wait)
+#
+# returns the list of (store, srchstring, winelist) searched
+def drain_parked_stores( parking, breaker, supervisor, drivers, optiondict, errors=None ):
+    searched = []
+    while winepark.parked_stores( parking ):
+        for store in winepark.parked_stores( parking ):
+            if winepark.wait_expired( parking, store ):
+                winepark.give_up_store( parking, store )
+            elif winepark.poll_due( parking, store ) and not store_still_parked( drivers, store ):
+                srchstrings = winepark.unpark_store( parking, store )
+                for srchstring, winelist in search_store_wines( parking, breaker, supervisor, drivers, store, srchstrings, optiondict, errors ):
+                    searched.append( (store, srchstring, winelist) )
+
+        # sleep until the next store is due to be checked
+        stores = winepark.parked_stores( parking )
+        if stores:
+            delay = max( 1, min( winepark.poll_seconds( parking, store ) for store in stores ) )
+            if pmsg: print('drain_parked_stores:waiting on parked stores:', stores, ':seconds:', int(delay))
+            logger.info('waiting on parked stores:%s:seconds:%d', stores, delay)
+            time.sleep( delay )
+    return searched
+
+
+# the stores we can search with a browser - in the order their results are saved
+#   create - function(optiondict) that returns the driver for the store (None when it could not be set up)
+#   search - function(srchstring, driver, optiondict) that returns the list of wines found
+#   robot - (opt) function(driver) that is True while the check that parked the store is still up (see winepark)
+glb_store_browsers = {
+    'bevmo' : {
+        'create' : lambda optiondict: create_bevmo_selenium_driver('Ladera Ranch', '2962', retrycount=3),
+        'search' : lambda srchstring, driver, optiondict: bevmo_search( srchstring, driver ),
+    },
+    'pavillions' : {
+        'create' : lambda optiondict: create_pavillions_selenium_driver('92692'),
+        'search' : lambda srchstring, driver, optiondict: pavillions_search( srchstring, driver ),
+    },
+    'wineclub' : {
+        'create' : lambda optiondict: create_wineclub_selenium_driver('92688'),
+        'search' : lambda srchstring, driver, optiondict: wineclub_search( srchstring, driver ),
+    },
+    'totalwine' : {
+        'create' : lambda optiondict: create_totalwine_selenium_driver('Laguna Hills', optiondict),
+        'search' : lambda srchstring, driver, optiondict: totalwine_search( srchstring, driver, optiondict ),
+        'robot'  : lambda driver: totalwine_robot_present( driver ),
+    },
+    'hitime' : {
+        'create' : lambda optiondict: create_hitime_selenium_driver('92688'),
+        'search' : lambda srchstring, driver, optiondict: hitime_search( srchstring, driver ),
+    },
+    'wally' : {
+        'create' : lambda optiondict: create_wally_selenium_driver(''),
+        'search' : lambda srchstring, driver, optiondict: wally_search( srchstring, driver ),
+    },
+    'winex' : {
+        'create' : lambda optiondict: create_winex_selenium_driver(''),
+        'search' : lambda srchstring, driver, optiondict: winex_search( srchstring, driver ),
+    },
+    'napacab' : {
+        'create' : lambda optiondict: create_napacab_selenium_driver('92688'),
+        'search' : lambda srchstring, driver, optiondict: napacab_search( srchstring, driver ),
+    },
+    'ralphs' : {
+        'create' : lambda optiondict: create_ralphs_selenium_driver('92677', 'La Paz & Marguerite S/C', "SelectStore-70300076"),
+        'search' : lambda srchstring, driver, optiondict: ralphs_search( srchstring, driver ),
+    },
+}
+
+
+# worker process - one browser slot - takes (store, wineidx, srchstring) tasks off its tasks queue
+# (see get_wines_from_stores_pool) and searches the store for the wine - when the slot moves to
+# another store the driver of the store it had is closed (a parked store is waited on first so the
+# person still has its browser) and the driver of the new store is created
+#
+# puts on the results queue:
+#   ('wine', store, wineidx, winelist) - what a store found for a wine
+#   ('failed', store, None, None)      - the store is dropped from the run (driver not created, worker error)
+#   ('ready', slot, None, None)        - the slot is done with its task and takes the next one
+#   ('exit', slot, None, None)         - the slot stopped (None task or worker error)
+def store_browser_worker( slot, tasks, results, optiondict ):
+    global browser
+    global verbose
+
+    # the settings main set up in the parent process
+    if optiondict.get('browser') in ('ff', 'firefox'):
+        browser = 'firefox'
+    verbose = optiondict.get('verbose', verbose)
+    winethrottle.get_throttle()['enabled'] = optiondict.get('throttle', True)
+    winedom.glb_script = optiondict.get('dom_script', True)
+    set_browser_profiles( optiondict )
+    set_artifact_limits( optiondict )
+
+    drivers = {}
+    store = None
+    try:
+        breaker = winebreaker.create_breaker( optiondict.get('breaker_threshold', 3), optiondict.get('breaker_cooldown', 300) )
+        supervisor = create_store_supervisor( optiondict )
+        parking = create_store_parking( optiondict )
+
+        # the wineidx of each wine of this store - a parked store reports its queued wines once it clears
+        wineidxs = {}
+        while True:
+            task = tasks.get()
+
+            # moving off this store - wait on it if it is parked and close its driver
+            if store and (task is None or task[0] != store):
+                for parked, searched, winelist in drain_parked_stores( parking, breaker, supervisor, drivers, optiondict ):
+                    results.put( ('wine', store, wineidxs[searched].pop(0), winelist) )
+                quit_worker_driver( drivers, store )
+                store = None
+            if task is None:
+                break
+
+            # moving on to this store - create its driver
+            if not store:
+                store = task[0]
+                wineidxs = {}
+                if pmsg: print('store_browser_worker:', slot, ':creating driver:', store)
+                logger.info('slot:%d:creating driver:%s', slot, store)
+                try:
+                    drivers[store] = glb_store_browsers[store]['create']( optiondict )
+                except Exception as e:
+                    logger.error('store:%s:driver create error:%s', store, str(e))
+                    drivers[store] = None
+                if drivers[store] is None:
+                    if pmsg: print('store_browser_worker:FAILED:removed store from search:', store)
+                    logger.warning('removing store from this run:%s', store)
+                    del drivers[store]
+                    results.put( ('failed', store, None, None) )
+                    results.put( ('ready', slot, None, None) )
+                    store = None
+                    continue
+
+            (store, wineidx, srchstring) = task
+            wineidxs.setdefault( srchstring, [] ).append( wineidx )
+            for searched, winelist in parked_store_search( parking, breaker, supervisor, drivers, store, srchstring, optiondict ):
+                results.put( ('wine', store, wineidxs[searched].pop(0), winelist) )
+            results.put( ('ready', slot, None, None) )
+
+        winebreaker.log_breaker_stats( breaker )
+        winesupervisor.log_supervisor_report( supervisor )
+        winepark.log_parking_report( parking )
+        log_page_load_stats( optiondict.get('page_load_file') )
+        winewait.log_wait_stats()
+        winedom.log_round_trip_stats()
+    except Exception as e:
+        if pmsg: print('store_browser_worker:', slot, ':exception:', str(e))
+        logger.error('slot:%d:store:%s:worker error:%s', slot, store, str(e))
+        if store:
+            results.put( ('failed', store, None, None) )
+    finally:
+        if store:
+            quit_worker_driver( drivers, store )
+        # a forked worker does not run atexit - write the failure pages still queued
+        wineartifact.close_artifact_writer( wineartifact.get_artifact_writer() )
+        results.put( ('exit', slot, None, None) )
+
+
+# close the driver of a store in a worker
+def quit_worker_driver( drivers, store ):
+    if drivers.get( store ) is not None:
+        try:
+            drivers.pop( store ).quit()
+        except Exception as e:
+            logger.warning('store:%s:driver quit failed:%s', store, str(e))
+
+
+# search the stores with max_browsers browser slots - each slot a worker process (see store_browser_worker)
+# fed one (store, wine) task at a time from here - and save each wine (in srchstring_list order, stores in
+# glb_store_browsers order) to wineoutfile as soon as every store has returned its results for that wine
+#
+# a slot that is free keeps its store (no new driver) until that store is pool_ahead wines past the
+# oldest wine not saved yet, then moves to the store not in a slot that is furthest behind - so with
+# fewer browsers than stores the stores take turns and the wines are saved as the run goes instead
+# of after the last store is done
+#   journal - (opt) run journal (see winejournal) - the wine/stores it has are not searched, the ones saved are added
+#   writer - (opt) run writer (see winewriter) the wines are saved through
+#
+# returns the list of wines found
+def get_wines_from_stores_pool( srchstring_list, storelist, optiondict={}, wineoutfile=None, max_browsers=2, journal=None, writer=None, debug=False ):
+    sched = {
+        'stores'   : [store for store in glb_store_browsers if store in storelist],
+        'wines'    : srchstring_list,
+        'ahead'    : max(1, optiondict.get('pool_ahead', 10)),
+        'grid'     : [{} for srchstring in srchstring_list],   # wineidx - store - wines found
+        'next'     : {},                                         # store - wineidx of the next wine it searches
+        'nextidx'  : 0,                                          # wineidx of the oldest wine not saved
+        'failed'   : set(),                                      # stores dropped from the run
+        'held'     : {},                                         # store - the slot that has its driver
+        'slots'    : {},                                         # slot - proc/tasks queue/store
+        'slotcnt'  : 0,
+        'results'  : multiprocessing.Queue(),
+        'optiondict' : optiondict,
+    }
+    found_wines = []
+    max_slots = min( max(1, max_browsers), len(sched['stores']) )
+
+    logger.info('stores:%s:max_browsers:%d:pool_ahead:%d', sched['stores'], max_browsers, sched['ahead'])
+    for store in storelist:
+        if store not in glb_store_browsers:
+            logger.warning('store not in glb_store_browsers - skipped:%s', store)
+
+    # the wine/stores the journal has are reported with no wines
+    for store in sched['stores']:
+        sched['next'][store] = 0
+        if journal:
+            for wineidx, srchstring in enumerate(srchstring_list):
+                if winejournal.journal_done( journal, srchstring, store ):
+                    sched['grid'][wineidx][store] = []
+
+    while True:
+        # a slot for each store not in a slot that has wines left - up to max_browsers
+        while len(sched['slots']) < max_slots and _pool_unheld_stores( sched ):
+            _pool_task( sched, _pool_start_slot( sched ) )
+        if not sched['slots']:
+            break
+
+        # get the next message
+        try:
+            (kind, key, wineidx, winelist) = sched['results'].get( timeout=5 )
+        except queue.Empty:
+            # a worker that died without telling us - its store is dropped
+            for slot, slotinfo in list(sched['slots'].items()):
+                if not slotinfo['proc'].is_alive() and sched['results'].empty():
+                    logger.warning('slot:%d:worker ended without finishing:exitcode:%s', slot, slotinfo['proc'].exitcode)
+                    if slotinfo['store']:
+                        _pool_store_failed( sched, slotinfo['store'] )
+                    _pool_end_slot( sched, slot )
+        else:
+            if kind == 'wine':
+                sched['grid'][wineidx][key] = winelist
+            elif kind == 'failed':
+                _pool_store_failed( sched, key )
+            elif kind == 'ready':
+                _pool_task( sched, key )
+            elif kind == 'exit':
+                _pool_end_slot( sched, key )
+
+        # save the wines every store has reported on
+        found_wines.extend( _pool_save_wines( sched, wineoutfile, journal, writer ) )
+
+    # the wines left (stores dropped)
+    found_wines.extend( _pool_save_wines( sched, wineoutfile, journal, writer ) )
+    return found_wines
+
+
+# start a browser slot worker process - returns the slot
+def _pool_start_slot( sched ):
+    sched['slotcnt'] += 1
+    slot = sched['slotcnt']
+    tasks = multiprocessing.Queue()
+    proc = multiprocessing.Process( target=store_browser_worker, args=(slot, tasks, sched['results'], sched['optiondict']), name='wineselenium-slot%d' % slot )
+    proc.start()
+    sched['slots'][slot] = { 'proc' : proc, 'tasks' : tasks, 'store' : None }
+    logger.info('slot:%d:worker started:pid:%s', slot, proc.pid)
+    return slot
+
+
+# a slot stopped
+def _pool_end_slot( sched, slot ):
+    _pool_hold( sched, slot, None )
+    sched['slots'].pop( slot )['proc'].join()
+    logger.info('slot:%d:worker complete', slot)
+
+
+# a store was dropped from the run - its wines not reported are saved without it
+def _pool_store_failed( sched, store ):
+    sched['failed'].add( store )
+    logger.warning('store:%s:dropped from the run at wine:%d', store, sched['next'].get( store, 0 ))
+
+
+# the index of the next wine this store searches - None when it has none left
+def _pool_next_wine( sched, store ):
+    if store in sched['failed']:
+        return None
+    # the wines before nextidx are saved
+    wineidx = max( sched['next'][store], sched['nextidx'] )
+    while wineidx < len(sched['wines']) and store in sched['grid'][wineidx]:
+        wineidx += 1
+    sched['next'][store] = wineidx
+    return wineidx if wineidx < len(sched['wines']) else None
+
+
+# the stores not in a slot that have wines left - furthest behind first
+def _pool_unheld_stores( sched ):
+    stores = [store for store in sched['stores'] if store not in sched['held'] and _pool_next_wine( sched, store ) is not None]
+    return sorted( stores, key=lambda store: sched['next'][store] )
+
+
+# the store a free slot searches next - None when there is nothing left for it
+#   1. its own store (no new driver) while that store has wines left and is less than pool_ahead
+#      wines past the oldest wine not saved
+#   2. else the store not in a slot that is furthest behind - when it is behind its own store
+#   3. else its own store while it has wines left
+def _pool_pick_store( sched, slot ):
+    current = sched['slots'][slot]['store']
+    if current and _pool_next_wine( sched, current ) is None:
+        current = None
+    if current and sched['next'][current] - sched['nextidx'] < sched['ahead']:
+        return current
+
+    others = _pool_unheld_stores( sched )
+    if others and (not current or sched['next'][others[0]] < sched['next'][current]):
+        return others[0]
+    return current
+
+
+# the slot takes the driver of this store (None - no store) - a store is in one slot at a time
+def _pool_hold( sched, slot, store ):
+    slotinfo = sched['slots'][slot]
+    if slotinfo['store'] == store:
+        return
+    if slotinfo['store']:
+        sched['held'].pop( slotinfo['store'], None )
+    if store:
+        logger.info('slot:%d:moving from store:%s:to store:%s:at wine:%d', slot, slotinfo['store'], store, sched['next'][store])
+        sched['held'][store] = slot
+    slotinfo['store'] = store
+
+
+# give a free slot its next task - the slot is stopped when there is nothing left for it
+def _pool_task( sched, slot ):
+    store = _pool_pick_store( sched, slot )
+    _pool_hold( sched, slot, store )
+    if not store:
+        sched['slots'][slot]['tasks'].put( None )
+        return
+
+    wineidx = sched['next'][store]
+    sched['next'][store] = wineidx + 1
+    sched['slots'][slot]['tasks'].put( (store, wineidx, sched['wines'][wineidx]) )
+
+
+# save the wines every store has reported on (or was dropped before) - returns the wines saved
+def _pool_save_wines( sched, wineoutfile, journal, writer ):
+    found_wines = []
+    while sched['nextidx'] < len(sched['wines']) and all( store in sched['grid'][sched['nextidx']] or store in sched['failed'] for store in sched['stores'] ):
+        nextidx = sched['nextidx']
+        winelist = []
+        for store in sched['stores']:
+            winelist.extend( sched['grid'][nextidx].get( store, [] ) )
+        if pmsg: print('wineselenium.py:', sched['wines'][nextidx], ' count of wines found:', len(winelist))
+        logger.info( '%s:count of wines found:%d', sched['wines'][nextidx], len(winelist) )
+        if wineoutfile:
+            saved_cb = functools.partial( winejournal.journal_record_wine, journal, sched['wines'][nextidx], sched['grid'][nextidx] ) if journal else None
+            save_wines_to_file( wineoutfile, sched['wines'][nextidx], winelist, writer=writer, done=saved_cb )
+        found_wines.extend( winelist )
+        sched['grid'][nextidx] = None
+        sched['nextidx'] += 1
+    return found_wines
+
+
+# start the driver of each store in storelist at the same time (one thread per store) - each store
+# has startup_timeout seconds to get its driver ready before it is dropped from the run
+#   carry - (opt) the dict from an earlier call - its ready drivers and the drivers still starting are used
+#           instead of starting new ones
+#
+# returns the dict passed to stores_in_ready_order/quit_store_drivers
+def start_store_drivers( storelist, optiondict={}, startup_timeout=600, carry=None ):
+    stores = [store for store in glb_store_browsers if store in storelist]
+    for store in storelist:
+        if store not in glb_store_browsers:
+            logger.warning('store not in glb_store_browsers - skipped:%s', store)
+
+    drivers = {
+        'stores'  : stores,
+        'timeout' : startup_timeout,
+        'start'   : time.monotonic(),
+        'futures' : {},
+        'ready'   : {},
+        'failed'  : set(),
+        'errors'  : set(),
+        'latency' : carry['latency'] if carry else {},
+    }
+
+    # drivers we already have
+    starting = []
+    for store in stores:
+        if carry and store in carry['ready']:
+            drivers['ready'][store] = carry['ready'][store]
+        elif carry and store in carry['futures'] and store not in carry['failed']:
+            drivers['futures'][store] = carry['futures'][store]
+        else:
+            starting.append( store )
+
+    # one daemon thread per driver - a driver that never comes up (past startup_timeout the store is
+    # dropped) does not keep the program from exiting
+    for store in starting:
+        drivers['futures'][store] = concurrent.futures.Future()
+        threading.Thread( target=_start_store_driver_thread, args=(drivers, store, optiondict, drivers['futures'][store]),
+                          name='wineselenium-start-'+store, daemon=True ).start()
+
+    logger.info('stores:%s:starting drivers:%s:startup_timeout:%d', stores, starting, startup_timeout)
+    return drivers
+
+
+# generator of (store, driver) - the stores whose drivers are ready first (in store order) then
+# the others as their drivers come up - stores that fail or time out are dropped from the run
+def stores_in_ready_order( drivers ):
+    pending = {}
+    for store in drivers['stores']:
+        if store in drivers['ready'] or store in drivers['failed']:
+            continue
+        if drivers['futures'][store].done():
+            _store_driver_ready( drivers, store )
+        else:
+            pending[drivers['futures'][store]] = store
+
+    # ready now
+    for store in drivers['stores']:
+        if store in drivers['ready']:
+            yield store, drivers['ready'][store]
+
+    # as they come up
+    while pending:
+        remaining = drivers['timeout'] - (time.monotonic() - drivers['start'])
+        done, notdone = concurrent.futures.wait( pending, timeout=max(0, remaining), return_when=concurrent.futures.FIRST_COMPLETED )
+        if not done:
+            for store in pending.values():
+                _store_driver_timeout( drivers, store )
+            return
+
+        for store in [store for store in drivers['stores'] if drivers['futures'][store] in done]:
+            del pending[drivers['futures'][store]]
+            if _store_driver_ready( drivers, store ):
+                yield store, drivers['ready'][store]
+
+
+# close the drivers started by start_store_drivers - drivers still starting are closed when they come up
+def quit_store_drivers( drivers ):
+    for store in drivers['stores']:
+        if store in drivers['ready']:
+            try:
+                drivers['ready'].pop( store ).quit()
+            except Exception as e:
+                logger.warning('store:%s:driver quit failed:%s', store, str(e))
+        elif store not in drivers['failed']:
+            drivers['failed'].add( store )
+            drivers['futures'][store].add_done_callback( lambda future, store=store: _quit_late_driver( store, future ) )
+
+    # startup latency for the run
+    for store in drivers['stores']:
+        if store in drivers['latency']:
+            logger.info('store:%s:startup seconds:%.1f', store, drivers['latency'][store])
+
+
+# thread - create the driver for one store and time it
+def _start_store_driver( drivers, store, optiondict ):
+    start = time.monotonic()
+    try:
+        return glb_store_browsers[store]['create']( optiondict )
+    finally:
+        drivers['latency'][store] = time.monotonic() - start
+
+
+# daemon thread - create the driver for one store and hand it (or the error) to its future
+def _start_store_driver_thread( drivers, store, optiondict, future ):
+    future.set_running_or_notify_cancel()
+    try:
+        future.set_result( _start_store_driver( drivers, store, optiondict ) )
+    except Exception as e:
+        future.set_exception( e )
+
+
+# the driver of a store finished starting - returns True if it is ready to search
+def _store_driver_ready( drivers, store ):
+    try:
+        driver = drivers['futures'][store].result()
+    except Exception as e:
+        logger.error('store:%s:driver create error:%s', store, str(e))
+        driver = None
+
+    if driver is None:
+        drivers['failed'].add( store )
+        if pmsg: print('start_store_drivers:FAILED:removed store from search:', store)
+        logger.warning('removing store from this run:%s', store)
+        return False
+
+    drivers['ready'][store] = driver
+    if pmsg: print('start_store_drivers:', store, ':driver ready in seconds:', round(drivers['latency'].get(store, 0), 1))
+    logger.info('store:%s:driver ready:startup seconds:%.1f', store, drivers['latency'].get(store, 0))
+    return True
+
+
+# the driver of a store did not start within the timeout
+def _store_driver_timeout( drivers, store ):
+    drivers['failed'].add( store )
+    if pmsg: print('start_store_drivers:FAILED:startup timeout:removed store from search:', store)
+    logger.warning('store:%s:driver not ready in %d seconds - removing store from this run', store, drivers['timeout'])
+    drivers['futures'][store].add_done_callback( lambda future: _quit_late_driver( store, future ) )
+
+
+# close a driver that came up after its store was dropped (or was never used)
+def _quit_late_driver( store, future ):
+    try:
+        driver = future.result()
+        if driver is not None:
+            logger.info('store:%s:closing driver that was not used', store)
+            driver.quit()
+    except Exception as e:
+        logger.warning('store:%s:late driver error:%s', store, str(e))
+
+
+# check that a driver still answers - False when the browser is gone or hung
+def driver_healthy( driver ):
+    try:
+        driver.execute_script('return document.readyState')
+        return True
+    except Exception as e:
+        logger.warning('driver health check failed:%s', str(e))
+        return False
+
+
+# create a pool of store drivers that is kept across calls to get_wines_from_stores (pool=) - the
+# drivers start now so they are warm when the first search comes in - a driver is health checked
+# before it is used and recycled after max_searches searches or a search that errored
+def create_driver_pool( storelist, optiondict={}, max_searches=25 ):
+    set_browser_profiles( optiondict )
+
+    pool = {
+        'storelist'    : list(storelist),
+        'optiondict'   : optiondict,
+        'max_searches' : max_searches,
+        'breaker'      : winebreaker.create_breaker( optiondict.get('breaker_threshold', 3), optiondict.get('breaker_cooldown', 300) ),
+        'supervisor'   : create_store_supervisor( optiondict ),
+        'searches'     : {},
+        'recycled'     : 0,
+        'drivers'      : start_store_drivers( storelist, optiondict, optiondict.get('startup_timeout', 600) ),
+    }
+    logger.info('driver pool:stores:%s:max_searches:%d', pool['storelist'], max_searches)
+    return pool
+
+
+# the drivers to search with - the pool drivers that passed the health check, replacements
+# started for the ones that did not
+def checkout_pool_drivers( pool ):
+    drivers = pool['drivers']
+    for store in list(drivers['ready']):
+        if not driver_healthy( drivers['ready'][store] ):
+            _recycle_pool_driver( pool, store, 'health check failed' )
+
+    pool['drivers'] = start_store_drivers( pool['storelist'], pool['optiondict'], pool['optiondict'].get('startup_timeout', 600), carry=drivers )
+    return pool['drivers']
+
+
+# the search is done - count the searches on each driver, recycle the drivers that errored or are
+# over max_searches and start their replacements now so they are warm for the next search
+def checkin_pool_drivers( pool, drivers, searches=1 ):
+    for store in list(drivers['ready']):
+        pool['searches'][store] = pool['searches'].get( store, 0 ) + searches
+        if store in drivers['errors']:
+            _recycle_pool_driver( pool, store, 'search error' )
+        elif pool['searches'][store] >= pool['max_searches']:
+            _recycle_pool_driver( pool, store, 'max searches' )
+
+    pool['drivers'] = start_store_drivers( pool['storelist'], pool['optiondict'], pool['optiondict'].get('startup_timeout', 600), carry=drivers )
+
+
+# close all the drivers in the pool
+def close_driver_pool( pool ):
+    logger.info('driver pool:closing:recycled:%d', pool['recycled'])
+    quit_store_drivers( pool['drivers'] )
+
+
+# quit a pool driver so a new one is started in its place
+def _recycle_pool_driver( pool, store, reason ):
+    drivers = pool['drivers']
+    if pmsg: print('driver pool:', store, ':recycle driver:', reason, ':searches:', pool['searches'].get(store, 0))
+    logger.info('driver pool:%s:recycle driver:%s:searches:%d', store, reason, pool['searches'].get(store, 0))
+    try:
+        drivers['ready'].pop( store ).quit()
+    except Exception as e:
+        logger.warning('store:%s:driver quit failed:%s', store, str(e))
+    drivers['failed'].add( store )
+    pool['searches'][store] = 0
+    pool['recycled'] += 1
+
+
 # routine use by email parser to grab the results for one wine
-def get_wines_from_stores( srchstring_list, storelist, optiondict={}, debug=False ):
+#   pool - (opt) driver pool (see create_driver_pool) - its drivers are used and kept for the next call
+def get_wines_from_stores( srchstring_list, storelist, optiondict={}, debug=False, pool=None ):
     global verbose
 
+    if pool:
+        # the warm drivers in the pool - the pool settings, breaker and supervisor carry across calls
+        optiondict = pool['optiondict']
+        breaker = pool['breaker']
+        supervisor = pool['supervisor']
+        drivers = checkout_pool_drivers( pool )
+    else:
+        # each store browser in its own process
+        if optiondict.get('max_browsers'):
+            return get_wines_from_stores_pool( srchstring_list, storelist, optiondict, max_browsers=optiondict['max_browsers'], debug=debug )
+
+        # skip the stores that keep failing - restart the store that failed
+        breaker = winebreaker.create_breaker( optiondict.get('breaker_threshold', 3), optiondict.get('breaker_cooldown', 300) )
+        supervisor = create_store_supervisor( optiondict )
+
+        # browser profile for each store
+        set_browser_profiles( optiondict )
+        if 'dom_script' in optiondict:
+            winedom.glb_script = optiondict['dom_script']
+
+        # start all the store drivers at the same time
+        drivers = start_store_drivers( storelist, optiondict, optiondict.get('startup_timeout', 600) )
+
+    # a store waiting on a person is parked - the other stores keep searching
+    parking = create_store_parking( optiondict )
 
-    # create the bevmo selenium driver
-    if 'bevmo' in storelist:
-        bevmo_driver = create_bevmo_selenium_driver('Ladera Ranch', '2962', retrycount=3)
-        # if we did not get a valid driver - then we are not using this store.
-        if bevmo_driver == None:  storelist.remove('bevmo')
-    if 'pavillions' in storelist:
-        pavillions_driver = create_pavillions_selenium_driver('92688')
-    if 'wineclub' in storelist:
-        wineclub_driver = create_wineclub_selenium_driver('92688')
-        if wineclub_driver == None:  storelist.remove('wineclub')
-    if 'hitime' in storelist:
-        hitime_driver = create_hitime_selenium_driver('92688')
-    if 'totalwine' in storelist:
-        totalwine_driver = create_totalwine_selenium_driver('Laguna Hills', optiondict)
-        # if we did not get a valid driver - then we are not using this store.
-        if totalwine_driver == None:  storelist.remove('totalwine')
-    if 'wally' in storelist:
-        wally_driver = create_wally_selenium_driver('')
-        if wally_driver == None:  storelist.remove('wally')
-    if 'winex' in storelist:
-        winex_driver = create_winex_selenium_driver('')
-        if winex_driver == None:  storelist.remove('winex')
-    if 'napacab' in storelist:
-        napacab_driver = create_napacab_selenium_driver('92688')
-               
     # create the list of records for each search string
     found_wines = []
 
     # step through the list
     for srchstring in srchstring_list:
-        # find the wines for this search string
-        if 'bevmo' in storelist:
-            found_wines.extend( bevmo_search( srchstring, bevmo_driver ) )
-            # debugging
-            if verbose > 5: print('wineselenium.py:', srchstring, ' count of wines found:', len(found_wines))
-        if 'pavillions' in storelist:
-            found_wines.extend( pavillions_search( srchstring, pavillions_driver ) )
-            # debugging
-            if verbose > 5: print('wineselenium.py:', srchstring, ' count of wines found:', len(found_wines))
-        if 'wineclub' in storelist:
-            found_wines.extend( wineclub_search( srchstring, wineclub_driver ) )
-            # debugging
-            if verbose > 5: print('wineselenium.py:', srchstring, ' count of wines found:', len(found_wines))
-        if 'totalwine' in storelist:
-            found_wines.extend( totalwine_search( srchstring, totalwine_driver, optiondict ) )
-            # debugging
-            if verbose > 5: print('wineselenium.py:', srchstring, ' count of wines found:', len(found_wines))
-        if 'hitime' in storelist:
-            found_wines.extend( hitime_search( srchstring, hitime_driver ) )
-            # debugging
-            if verbose > 5: print('wineselenium.py:', srchstring, ' count of wines found:', len(found_wines))
-        if 'wally' in storelist:
-            found_wines.extend( wally_search( srchstring, wally_driver ) )
-            # debugging
-            if verbose > 5: print('wineselenium.py:', srchstring, ' count of wines found:', len(found_wines))
-        if 'winex' in storelist:
-            found_wines.extend( winex_search( srchstring, winex_driver ) )
-            # debugging
-            if verbose > 5: print('wineselenium.py:', srchstring, ' count of wines found:', len(found_wines))
-        if 'napacab' in storelist:
-            found_wines.extend( napacab_search( srchstring, napacab_driver ) )
-            # debugging
-            if verbose > 5: print('wineselenium.py:', srchstring, ' count of wines found:', len(found_wines))
+        # find the wines for this search string - stores searched as their drivers are ready
+        store_wines = {}
+        for store, driver in stores_in_ready_order( drivers ):
+            if store not in storelist:
+                continue
+            for searched, winelist in parked_store_search( parking, breaker, supervisor, drivers['ready'], store, srchstring, optiondict, errors=drivers['errors'] ):
+                if searched == srchstring:
+                    store_wines[store] = winelist
+                else:
+                    # a wine queued while the store was parked
+                    found_wines.extend( winelist )
+                # debugging
+                if verbose > 5: print('wineselenium.py:', searched, ':', store, ' count of wines found:', len(winelist))
+
+        # save in store order
+        for store in drivers['stores']:
+            found_wines.extend( store_wines.get( store, [] ) )
 
         # debugging
         if verbose > 5: print('wineselenium.py:', srchstring, ' count of wines found:', len(found_wines))
 
-
-
-    # close the browser we open when we are all done.
-    if 'bevmo' in storelist:
-        bevmo_driver.quit()
-    if 'pavillions' in storelist:
-        pavillions_driver.quit()
-    if 'wineclub' in storelist:
-        wineclub_driver.quit()
-    if 'hitime' in storelist:
-        hitime_driver.quit()
-    if 'totalwine' in storelist:
-        totalwine_driver.quit()
-    if 'wally' in storelist:
-        wally_driver.quit()
-    if 'winex' in storelist:
-        winex_driver.quit()
-    if 'napacab' in storelist:
-        napacab_driver.quit()
+    # the stores still parked - wait on them for the wines they queued
+    for store, searched, winelist in drain_parked_stores( parking, breaker, supervisor, drivers['ready'], optiondict, errors=drivers['errors'] ):
+        found_wines.extend( winelist )
+
+    # how long we were held up by the throttle, the stores we skipped/restarted/parked, the page load times, the waits and the round trips
+    winethrottle.log_throttle_stats( winethrottle.get_throttle() )
+    winebreaker.log_breaker_stats( breaker )
+    winesupervisor.log_supervisor_report( supervisor )
+    winepark.log_parking_report( parking )
+    log_page_load_stats( optiondict.get('page_load_file') )
+    winewait.log_wait_stats()
+    winedom.log_round_trip_stats()
+
+    # close the browser we open when we are all done - pool drivers are kept for the next call
+    if pool:
+        checkin_pool_drivers( pool, drivers, len(srchstring_list) )
+    else:
+        quit_store_drivers( drivers )
 
     # return the results you pulled
     return found_wines
     
 
+# register this engine and its browser stores with the store registry (see winestores)
+def register_stores():
+    winestores.register_engine( 'selenium', 'browser', get_wines_from_stores )
+    for store, store_browser in glb_store_browsers.items():
+        winestores.register_store( 'selenium', store, store_browser['create'], store_browser['search'] )
+
+register_stores()
+
+
 # ---------------------------------------------------------------------------
 if __name__ == '__main__':
 
@@ -3724,6 +4688,25 @@ if __name__ == '__main__':
     if optiondict['browser'] in ('ff', 'firefox'):
         browser = 'firefox'
 
+    # browser profile for each store
+    set_browser_profiles( optiondict )
+
+    # searches are not paced when throttle is turned off
+    winethrottle.get_throttle()['enabled'] = optiondict['throttle']
+
+    # one script call to pull the wines off the page
+    winedom.glb_script = optiondict['dom_script']
+
+    # the pages saved when a store fails
+    set_artifact_limits( optiondict )
+
+    # skip the stores that keep failing - restart the store that failed
+    breaker = winebreaker.create_breaker( optiondict['breaker_threshold'], optiondict['breaker_cooldown'] )
+    supervisor = create_store_supervisor( optiondict )
+
+    # park a store waiting on a person (totalwine robot check) - the other stores keep searching
+    parking = create_store_parking( optiondict )
+
     # from the command line
     wineoutfile = optiondict['wineoutfile']
     winexlatfile = optiondict['winexlatfile']
@@ -3748,18 +4731,8 @@ if __name__ == '__main__':
         if pmsg: print('---------------STARTUP(v', optiondictconfig['AppVersion']['value'], ')-(', datetime.datetime.now().strftime('%Y%m%d:%T'), ')---------------------------')
     logger.info('STARTUP(v%s)%s', optiondictconfig['AppVersion']['value'], '-'*40)
 
-    # define the store list - all the stores we COULD process
-    storelist = [
-        'bevmo',
-        'hitime',
-        'pavillions',
-#        'totalwine',  #commented out because we call this all by itself
-        'wineclub',
-        'wally',
-        'winex',
-#        'napacab',  #  moved this back to winerequest to get the performance back
-        'ralphs',
-    ]
+    # define the store list - all the stores we COULD process (see winestores)
+    storelist = winestores.store_list( 'wineselenium', 'selenium' )
 
     ##### STORELIST ######
 
@@ -3833,9 +4806,16 @@ if __name__ == '__main__':
         logger.info('test:srchstring_list:%s', srchstring_list)
 
     # if not user defined - generate the list if we don't have one predefined
+    journal = None
     if srchstring_list == None:
         srchstring_list = get_winelist_from_file( wineinputfile )
-        remove_already_processed_wines( wineoutfile, srchstring_list )
+        if optiondict['journal']:
+            # the wine/stores already done today - the run picks up where it left off
+            journal = winejournal.open_journal( winejournal.journal_file( wineoutfile, rundate ), rundate )
+            srchstring_list = winejournal.journal_wines_left( journal, srchstring_list, storelist )
+            if pmsg: print('wineselenium.py:journal:remaining_wines_to_search:', srchstring_list)
+        else:
+            remove_already_processed_wines( wineoutfile, srchstring_list )
         if not srchstring_list:
             if pmsg: print('main:no wines to search for - ending program')
             logger.info('no wines to search for - ending program')
@@ -3845,55 +4825,25 @@ if __name__ == '__main__':
     ### WINE_XLAT ####
 
     # load in xlat file in to a module level variable
-    read_wine_xlat_file( winexlatfile, debug=verbose )
-
-    # create each of the store drivers we need to use
-    if 'totalwine' in storelist:
-        totalwine_driver = create_totalwine_selenium_driver('Laguna Hills', optiondict)
-        # if we did not get a valid driver - then we are not using this store.
-        if totalwine_driver == None:  
-            storelist.remove('totalwine')
-            logger.warning('removing store from this run:totalwine')
-            if pmsg: print('main:FAILED:removed store from search:totalwine')
-    if 'bevmo' in storelist:
-        bevmo_driver = create_bevmo_selenium_driver('Ladera Ranch', '2962', retrycount=3)
-        # if we did not get a valid driver - then we are not using this store.
-        if bevmo_driver == None:  
-            storelist.remove('bevmo')
-            logger.warning('removing store from this run:bevmo')
-            if pmsg: print('main:FAILED:removed store from search:bevmo')
-    if 'pavillions' in storelist:
-        pavillions_driver = create_pavillions_selenium_driver('92692')
-    if 'wineclub' in storelist:
-        wineclub_driver = create_wineclub_selenium_driver('92688')
-        # if we did not get a valid driver - then we are not using this store.
-        if wineclub_driver == None:  
-            storelist.remove('wineclub')
-            logger.warning('removing store from this run:wineclub')
-            if pmsg: print('main:FAILED:removed store from search:wineclub')
-    if 'hitime' in storelist:
-        hitime_driver = create_hitime_selenium_driver('92688')
-    if 'wally' in storelist:
-        wally_driver = create_wally_selenium_driver('')
-        if wally_driver == None:
-            storelist.remove('wally')
-            logger.warning('removing store from this run:wally')
-            if pmsg: print('main:FAILED:removed store from search:wally')
-    if 'winex' in storelist:
-        winex_driver = create_winex_selenium_driver('')
-        if winex_driver == None:  storelist.remove('winex')
-    if 'napacab' in storelist:
-        napacab_driver = create_napacab_selenium_driver('92688')
-    if 'ralphs' in storelist:
-        ralphs_driver = create_ralphs_selenium_driver('92677', 'La Paz & Marguerite S/C', "SelectStore-70300076")
-        # if we did not get a valid driver - then we are not using this store.
-        if ralphs_driver == None:  
-            storelist.remove('ralphs')
-            logger.warning('removing store from this run:ralphs')
-            if pmsg: print('main:FAILED:removed store from search:ralphs')
-        
-               
-               
+    read_wine_xlat_file( winexlatfile, debug=verbose, fuzzy=optiondict['xlat_fuzzy'], sidecar=optiondict['xlat_sidecar'] )
+
+    # the wines found are written to wineoutfile by one writer for the run - flushed when we exit
+    writer = winewriter.create_writer( wineoutfile, optiondict['flush_rows'], optiondict['flush_seconds'] )
+    atexit.register( winewriter.close_writer, writer )
+
+    # each store browser in its own process - results saved to wineoutfile as each wine completes
+    if optiondict['max_browsers'] > 0:
+        get_wines_from_stores_pool( srchstring_list, storelist, optiondict, wineoutfile, optiondict['max_browsers'], journal=journal, writer=writer, debug=verbose )
+        winewriter.close_writer( writer )
+        winexlat.log_xlat_stats( store_wine_lookup )
+        if journal:
+            winejournal.close_journal( journal )
+        sys.exit()
+
+    # start all the store drivers at the same time - searches start as the drivers are ready
+    drivers = start_store_drivers( storelist, optiondict, optiondict['startup_timeout'] )
+
+
     # dump out what we have done here
     if verbose > 0:
         if pmsg: print('------------------------------------------')
@@ -3911,74 +4861,61 @@ if __name__ == '__main__':
         
     # step through the list
     for srchstring in srchstring_list:
-        # create the list of records for each search string
+        # find the wines for this search string - stores searched as their drivers are ready
+        store_wines = {}
+        for store, driver in stores_in_ready_order( drivers ):
+            # this store finished this wine before the restart
+            if journal and winejournal.journal_done( journal, srchstring, store ):
+                logger.info('%s:%s:skipped - already in journal', srchstring, store)
+                continue
+            for searched, winelist in parked_store_search( parking, breaker, supervisor, drivers['ready'], store, srchstring, optiondict ):
+                # debugging
+                if verbose > 5: print('wineselenium.py:', searched, ':', store, ' count of wines found:', len(winelist))
+
+                # with a journal each store is saved as it finishes - a restart only redoes the stores not saved
+                if journal:
+                    save_wines_to_file(wineoutfile, searched, winelist, writer=writer,
+                                       done=functools.partial( winejournal.journal_record, journal, searched, store, len(winelist) ))
+                elif searched != srchstring:
+                    # a wine queued while the store was parked
+                    save_wines_to_file(wineoutfile, searched, winelist, writer=writer)
+
+                if searched == srchstring:
+                    store_wines[store] = winelist
+
+        # create the list of records for each search string - in store order
         found_wines = []
-        # find the wines for this search string
-        # find the wines for this search string
-        if 'bevmo' in storelist:
-            found_wines.extend( bevmo_search( srchstring, bevmo_driver ) )
-            # debugging
-            if verbose > 5: print('wineselenium.py:', srchstring, ' count of wines found:', len(found_wines))
-        if 'pavillions' in storelist:
-            found_wines.extend( pavillions_search( srchstring, pavillions_driver ) )
-            # debugging
-            if verbose > 5: print('wineselenium.py:', srchstring, ' count of wines found:', len(found_wines))
-        if 'wineclub' in storelist:
-            found_wines.extend( wineclub_search( srchstring, wineclub_driver ) )
-            # debugging
-            if verbose > 5: print('wineselenium.py:', srchstring, ' count of wines found:', len(found_wines))
-        if 'totalwine' in storelist:
-            found_wines.extend( totalwine_search( srchstring, totalwine_driver, optiondict ) )
-            # debugging
-            if verbose > 5: print('wineselenium.py:', srchstring, ' count of wines found:', len(found_wines))
-        if 'hitime' in storelist:
-            found_wines.extend( hitime_search( srchstring, hitime_driver ) )
-            # debugging
-            if verbose > 5: print('wineselenium.py:', srchstring, ' count of wines found:', len(found_wines))
-        if 'wally' in storelist:
-            found_wines.extend( wally_search( srchstring, wally_driver ) )
-            # debugging
-            if verbose > 5: print('wineselenium.py:', srchstring, ' count of wines found:', len(found_wines))
-        if 'winex' in storelist:
-            found_wines.extend( winex_search( srchstring, winex_driver ) )
-            # debugging
-            if verbose > 5: print('wineselenium.py:', srchstring, ' count of wines found:', len(found_wines))
-        if 'napacab' in storelist:
-            found_wines.extend( napacab_search( srchstring, napacab_driver ) )
-            # debugging
-            if verbose > 5: print('wineselenium.py:', srchstring, ' count of wines found:', len(found_wines))
-        # find the wines for this search string
-        if 'ralphs' in storelist:
-            found_wines.extend( ralphs_search( srchstring, ralphs_driver ) )
-            # debugging
-            if verbose > 5: print('wineselenium.py:', srchstring, ' count of wines found:', len(found_wines))
+        for store in drivers['stores']:
+            found_wines.extend( store_wines.get( store, [] ) )
 
         # debugging
         if pmsg: print('wineselenium.py:', srchstring, ' count of wines found:', len(found_wines))
         logger.info( '%s:count of wines found:%d', srchstring, len(found_wines) )
 
         # call the print routine
-        save_wines_to_file(wineoutfile, srchstring, found_wines)
+        if not journal:
+            save_wines_to_file(wineoutfile, srchstring, found_wines, writer=writer)
+
+    # the stores still parked - wait on them and save the wines they queued
+    for store, searched, winelist in drain_parked_stores( parking, breaker, supervisor, drivers['ready'], optiondict ):
+        done = functools.partial( winejournal.journal_record, journal, searched, store, len(winelist) ) if journal else None
+        save_wines_to_file(wineoutfile, searched, winelist, writer=writer, done=done)
 
 
+    # how long we were held up by the throttle, the stores we skipped/restarted/parked, the page load times, the waits and the round trips
+    winethrottle.log_throttle_stats( winethrottle.get_throttle() )
+    winebreaker.log_breaker_stats( breaker )
+    winesupervisor.log_supervisor_report( supervisor )
+    winepark.log_parking_report( parking )
+    log_page_load_stats( optiondict.get('page_load_file') )
+    winewait.log_wait_stats()
+    winedom.log_round_trip_stats()
+
     # close the browser we open when we are all done.
-    if 'bevmo' in storelist:
-        bevmo_driver.quit()
-    if 'pavillions' in storelist:
-        pavillions_driver.quit()
-    if 'wineclub' in storelist:
-        wineclub_driver.quit()
-    if 'hitime' in storelist:
-        hitime_driver.quit()
-    if 'totalwine' in storelist:
-        totalwine_driver.quit()
-    if 'wally' in storelist:
-        wally_driver.quit()
-    if 'winex' in storelist:
-        winex_driver.quit()
-    if 'napacab' in storelist:
-        napacab_driver.quit()
-    if 'ralphs' in storelist:
-        ralphs_driver.quit()
+    quit_store_drivers( drivers )
+    winewriter.close_writer( writer )
+    winexlat.log_xlat_stats( store_wine_lookup )
+    if journal:
+        winejournal.close_journal( journal )
 
 # eof
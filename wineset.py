@@ -1,7 +1,7 @@
 '''
 @author:   Ken Venner
 @contact:  ken@venerllc.com
-@version:  1.13
+@version:  1.14
 
 Read in a file of wine names and create consistent wine descriptions 
 from these names.
@@ -11,6 +11,7 @@ from these names.
 
 import kvutil
 import kvcsv
+import winevintage
 
 import re
 import sys
@@ -24,7 +25,7 @@ ppFlag = False
 # application variables
 optiondictconfig = {
     'AppVersion' : {
-        'value' : '1.13',
+        'value' : '1.14',
         'description' : 'defines the version number for the app',
     },
     'debug' : {
@@ -95,17 +96,6 @@ optiondictconfig = {
 
 ### GLOBAL VARIABLES / LOOKUPS  ########################################
 
-# regex search for vintage in wine name
-vintageLookup = (
-    re.compile('\d\d\d\d\s+\d\d(\d\d)'),   # two years together - get this one over early
-    re.compile('^\d\d(\d\d)'),  # four position start of line
-    re.compile('\s\d\d(\d\d)$'),  # four position end of line
-    re.compile('\s\d\d(\d\d)\s'),  # four position middle of line
-    re.compile('XX\d\d(\d\d)\s'),  # four position middle of line
-    re.compile('\s\d\d(\d\d)\/'),  # four position split
-    re.compile('\s\'?(\d\d)\'?$|\s\'?(\d\d)\'?\s'),  #  two position date with optional apostrophe front or back
-)
-
 # regex search for case in wine name
 reCase = re.compile(r'12\s*X\s*750\s*ML|\bcase\b|12\/750\s*ML',re.IGNORECASE)
 
@@ -968,35 +958,14 @@ def findGrapeByStr( rec, fldWineDescr, debug=False ):
 #########################################################################################
 # find the vintage tied to the rec
 #
-#     Global Variable Used:  vintageLookup
+#     the rules live in winevintage (shared with winerequest)
 #
-#     returns:  vintage
+#     returns:  vintage (2 digit)
 #
 def findVintage( rec, fldWine, debug=False ):
-    # loop through the vintage lookup records
-    for reVintage in vintageLookup:
-        # search for match
-        m = reVintage.search(rec[fldWine])
-        # if there is a match
-        if m:
-            # extract the vlaue from the first regex group with a value
-            if m.group(1):
-                vintage = m.group(1)
-                if debug:  print('fv:vintage-match:', reVintage,':group1')
-            elif m.group(2):
-                vintage = m.group(2)
-                if debug:  print('fv:vintage-match:', reVintage,':group2')
-            elif m.group(3):
-                vintage = m.group(3)
-                if debug:  print('fv:vintage-match:', reVintage,':group3')
-            else:
-                vintage = m.group(4)
-                if debug:  print('fv:vintage-match:', reVintage,':group4')
-            # return what we vound
-            return vintage
-
-    # did not find it
-    return None
+    vintage = winevintage.find_vintage_yy( rec[fldWine] )
+    if debug:  print('fv:vintage-match:', vintage)
+    return vintage
         
 #########################################################################################
 # Create the winery/grape-wine-liquour conversion table based on the
@@ -0,0 +1,230 @@
+'''
+@author:   Ken Venner
+@contact:  ken@venerllc.com
+@version:  1.01
+
+Library that holds the store registry, the store lists of each app, and the scheduler that
+searches the stores of more than one engine in one job
+
+Each engine registers itself (register_engine) and its stores (register_store) when it is
+imported:
+
+    request  - winerequest (store_definitions and nhliquor) - resource http
+    selenium - wineselenium (glb_store_browsers)            - resource browser
+
+A store entry has the factory that sets up what the store searches with (the http session
+or the browser driver), the search function, and the resource class the store uses.
+
+run_search_job takes the stores to search by engine, runs each engine's batch search in its
+own thread, and returns the wines in engine order - so the http stores and the browser stores
+are searched at the same time and the job takes as long as the slowest engine instead of
+the sum of them.  An engine run holds a slot of its resource class for the run
+(glb_resource_slots) so two jobs do not start more browsers than the box can take.
+'''
+
+import concurrent.futures
+import threading
+import time
+
+# logging
+import logging
+
+logger = logging.getLogger(__name__)
+
+# version number
+AppVersion = '1.01'
+
+# the stores each app searches - by engine
+glb_store_lists = {
+    'wineselenium' : {
+        'selenium' : [
+            'bevmo',
+            'hitime',
+            'pavillions',
+#            'totalwine',  #commented out because we call this all by itself
+            'wineclub',
+            'wally',
+            'winex',
+#            'napacab',  #  moved this back to winerequest to get the performance back
+            'ralphs',
+        ],
+    },
+    'winerequest' : {
+        'request' : [
+            'binnys',
+            'hiddenvine',
+#            'winex',  # done in wineselenium
+            'napacab',
+#            'webwine',  #05/15/2020 - not working - commented out - run with findwine.pl it works there
+            'lawineco',
+            'wineconn',
+            'johnpete',
+#            'wine2020', #05/15/2020 - not working - commented out - port to wineselenium.py
+#            'acwine',   #05/15/2020 - too much work to make work - ignoring this wine site.
+            'klwine',
+            'nhliquor',
+            'rolf',
+#            'winezap',
+#           'winehouse', # needs to be implemented
+#           'winecom', # needs to be implemented
+#           'bestwine', # needs to be implemented
+        ],
+    },
+    'wine_email' : {
+        'selenium' : [
+            'bevmo',
+            'hitime',
+            'pavillions',
+#            'totalwine',
+            'wineclub',
+            'wally',
+            'winex',
+            'ralphs',
+        ],
+        'request' : [
+            'hiddenvine',
+            'napacab',
+            'lawineco',
+            'wineconn',
+            'johnpete',
+            'klwine',
+            'nhliquor',
+            'rolf',
+        ],
+    },
+    'wineutil' : {
+        'selenium' : [
+#            'bevmo',
+            'hitime',
+            'pavillions',
+            'totalwine',
+            'wineclub',
+            'wally',
+        ],
+        'request' : [
+            'winex',
+            'napacab',
+            'webwine',
+            'wineconn',
+            'johnpete',
+            'klwine',
+            'nhliquor',
+        ],
+    },
+}
+
+# engine runs of a resource class allowed at the same time (a class not listed is not limited)
+glb_resource_slots = {
+    'browser' : 1,
+}
+
+# the registry - engine to dict of resource/run, engine to dict of store to entry
+glb_engines = {}
+glb_stores = {}
+glb_slots = {}
+glb_registry_lock = threading.Lock()
+
+
+# register an engine
+#   resource - resource class the engine's stores use (http, browser)
+#   run - function(srchstring_list, storelist, **engine_args) that searches the stores for the wines
+def register_engine( engine, resource, run ):
+    with glb_registry_lock:
+        glb_engines[engine] = { 'resource' : resource, 'run' : run }
+        glb_stores.setdefault( engine, {} )
+
+
+# register a store of an engine
+#   factory - function that sets up what the store searches with (session/driver)
+#   search - function that searches the store for one wine
+#   resource - (opt) resource class - defaults to the engine's
+def register_store( engine, store, factory, search, resource=None ):
+    with glb_registry_lock:
+        glb_stores.setdefault( engine, {} )[store] = {
+            'engine'   : engine,
+            'resource' : resource if resource else glb_engines.get( engine, {} ).get( 'resource' ),
+            'factory'  : factory,
+            'search'   : search,
+        }
+
+
+# the registry entry of this store for this engine - None if not registered
+def store_entry( engine, store ):
+    with glb_registry_lock:
+        return glb_stores.get( engine, {} ).get( store )
+
+
+# the list of stores this app searches with this engine (a copy - the caller can change it)
+def store_list( app, engine ):
+    return list( glb_store_lists[app].get( engine, [] ) )
+
+
+# the stores in storelist registered for this engine (in storelist order) - the others are logged and dropped
+def engine_stores( engine, storelist ):
+    stores = []
+    for store in storelist:
+        if store_entry( engine, store ):
+            stores.append( store )
+        else:
+            logger.warning('store not registered for engine:%s:%s - skipped', engine, store)
+    return stores
+
+
+# search the wines on the stores of each engine in one job - each engine in its own thread
+#   job - dict of engine to list of stores (the order of the engines is the order of the results)
+#   engine_args - (opt) dict of engine to dict of keyword args passed to the engine run
+#
+# returns the list of wines found
+def run_search_job( srchstring_list, job, engine_args=None ):
+    engine_args = engine_args if engine_args else {}
+    engines = [engine for engine in job if job[engine]]
+    for engine in engines:
+        if engine not in glb_engines:
+            raise ValueError('engine not registered:%s' % engine)
+
+    start = time.monotonic()
+    seconds = {}
+    results = {}
+    with concurrent.futures.ThreadPoolExecutor( max_workers=max(1, len(engines)), thread_name_prefix='winestores' ) as executor:
+        futures = { engine : executor.submit( _run_engine, engine, srchstring_list, engine_stores( engine, job[engine] ), engine_args.get( engine, {} ), seconds ) for engine in engines }
+        for engine in engines:
+            try:
+                results[engine] = futures[engine].result()
+            except Exception as e:
+                logger.error('engine:%s:search job error:%s', engine, str(e))
+                results[engine] = []
+
+    wall = time.monotonic() - start
+    logger.info('search job:wines:%d:engines:%s:wall seconds:%.1f:engine seconds:%.1f:%s', len(srchstring_list), engines, wall,
+                sum( seconds.values() ), ':'.join( '%s:%.1f' % (engine, seconds.get( engine, 0.0 )) for engine in engines ))
+
+    found_wines = []
+    for engine in engines:
+        found_wines.extend( results[engine] )
+    return found_wines
+
+
+# thread - run one engine of a job (holding a slot of its resource class) and time it
+def _run_engine( engine, srchstring_list, storelist, args, seconds ):
+    slot = _resource_slot( glb_engines[engine]['resource'] )
+    start = time.monotonic()
+    try:
+        if slot:
+            with slot:
+                return glb_engines[engine]['run']( srchstring_list, storelist, **args )
+        return glb_engines[engine]['run']( srchstring_list, storelist, **args )
+    finally:
+        seconds[engine] = time.monotonic() - start
+        logger.info('engine:%s:stores:%s:seconds:%.1f', engine, storelist, seconds[engine])
+
+
+# the semaphore that limits the runs of a resource class - None when not limited
+def _resource_slot( resource ):
+    if resource not in glb_resource_slots:
+        return None
+    with glb_registry_lock:
+        if resource not in glb_slots:
+            glb_slots[resource] = threading.BoundedSemaphore( glb_resource_slots[resource] )
+        return glb_slots[resource]
+
+# eof
@@ -0,0 +1,123 @@
+'''
+@author:   Ken Venner
+@contact:  ken@venerllc.com
+@version:  1.01
+
+Library used by wineselenium to recover a store that fails part way through a run
+
+When a store search raises (a page that never came up, a browser that died, a store
+routine that gave up) only that store is restarted: its driver is torn down and created
+again and the wine it was working on is searched again - after a backoff that doubles with
+each retry.  The other stores keep their browsers and carry on.
+
+    retries      - times one wine is retried on a store before we give up on it
+    backoff      - seconds before the first retry (doubles each retry up to backoff_max)
+    max_restarts - driver restarts allowed per store for the run (0 - no limit)
+
+log_supervisor_report shows by store the failures, the restarts, the wines recovered, and
+the wines we gave up on (with the last error) at the end of the run.
+'''
+
+import threading
+import time
+
+# logging
+import logging
+
+logger = logging.getLogger(__name__)
+
+# version number
+AppVersion = '1.01'
+
+
+# create the supervisor for a run
+#
+# returns the dict passed to supervised_call/log_supervisor_report
+def create_supervisor( retries=2, backoff=15, backoff_max=120, max_restarts=10 ):
+    return {
+        'retries'      : retries,
+        'backoff'      : backoff,
+        'backoff_max'  : backoff_max,
+        'max_restarts' : max_restarts,
+        'stores'       : {},
+        'lock'         : threading.Lock(),
+    }
+
+
+# seconds to wait before retry number tries (1, 2, ...)
+def backoff_seconds( supervisor, tries ):
+    return min( supervisor['backoff'] * 2 ** (tries - 1), supervisor['backoff_max'] )
+
+
+# call attempt() for this store - when it raises call restart() (tear down and recreate the
+# store's driver) and call attempt() again, up to retries times with backoff between them
+#   label - what the store is working on (the wine) - logging and the report
+#   passthru - (opt) tuple of exceptions raised to the caller as is (no retry, not counted)
+#
+# returns what attempt() returned - raises the last error when we give up
+def supervised_call( supervisor, store, label, attempt, restart, passthru=() ):
+    tries = 0
+    while True:
+        try:
+            # a restart that fails is counted as a failed attempt
+            if tries:
+                _record( supervisor, store, 'restarts', label )
+                restart()
+            result = attempt()
+        except passthru:
+            raise
+        except Exception as e:
+            error = e
+            _record( supervisor, store, 'failures', label, e )
+            logger.warning('supervisor:%s:%s:attempt %d failed:%s', store, label, tries + 1, str(e))
+        else:
+            if tries:
+                _record( supervisor, store, 'recovered', label )
+                logger.info('supervisor:%s:%s:recovered after restarts:%d', store, label, tries)
+            return result
+
+        # out of retries for this wine or out of restarts for this store
+        if tries >= supervisor['retries'] or not _restart_allowed( supervisor, store ):
+            _record( supervisor, store, 'given_up', label, error )
+            logger.error('supervisor:%s:%s:giving up after attempts:%d', store, label, tries + 1)
+            raise error
+
+        tries += 1
+        delay = backoff_seconds( supervisor, tries )
+        logger.info('supervisor:%s:%s:restarting store driver in seconds:%d', store, label, delay)
+        time.sleep( delay )
+
+
+# log (and return) the failure report by store
+def log_supervisor_report( supervisor ):
+    with supervisor['lock']:
+        report = { store : dict(counts, given_up_labels=list(counts['given_up_labels'])) for store, counts in sorted(supervisor['stores'].items()) }
+
+    for store, counts in report.items():
+        logger.info('supervisor:%s:failures:%d:restarts:%d:recovered:%d:given up:%d', store, counts['failures'], counts['restarts'], counts['recovered'], counts['given_up'])
+        if counts['given_up']:
+            logger.warning('supervisor:%s:wines given up:%s:last error:%s', store, counts['given_up_labels'], counts['last_error'])
+    if not report:
+        logger.info('supervisor:no store failures')
+    return report
+
+
+# is there a driver restart left for this store
+def _restart_allowed( supervisor, store ):
+    if not supervisor['max_restarts']:
+        return True
+    with supervisor['lock']:
+        return supervisor['stores'].get( store, {} ).get( 'restarts', 0 ) < supervisor['max_restarts']
+
+
+# count an event against the store
+def _record( supervisor, store, event, label, error=None ):
+    with supervisor['lock']:
+        counts = supervisor['stores'].setdefault( store, {'failures' : 0, 'restarts' : 0, 'recovered' : 0, 'given_up' : 0, 'given_up_labels' : [], 'last_error' : None} )
+        counts[event] += 1
+        if event == 'given_up':
+            counts['given_up_labels'].append( label )
+        if error is not None:
+            counts['last_error'] = str(error)
+
+# eof
@@ -0,0 +1,269 @@
+'''
+@author:   Ken Venner
+@contact:  ken@venerllc.com
+@version:  1.02
+
+Library used by winerequest and wineselenium to pace the requests we make to the wine stores
+
+Every request/page navigation to a store first asks the throttle for a slot.  Each host
+has a token bucket (rate requests per second with a burst), a minimum spacing between
+requests, a random jitter added to that spacing, and a cap on the number of requests
+that can be in flight at the same time.  Limits are defined per store (glb_store_limits)
+so stores that watch for robots (totalwine) see a slow steady stream of requests
+while the others run at full speed - and the stores do not hold each other up.
+
+Buckets are by host, so stores that share a host share its bucket.  A host listed in
+glb_host_limits uses those limits whatever store sends to it, otherwise the bucket takes
+the strictest limits of the stores that use it (and logs when their limits differ).
+
+One throttle is shared by everything in the process (get_throttle) so winerequest and
+wineselenium running together in one program pace against the same buckets.
+'''
+
+import contextlib
+import random
+import threading
+import time
+import urllib.parse
+
+# logging
+import logging
+
+logger = logging.getLogger(__name__)
+
+# version number
+AppVersion = '1.02'
+
+
+# the limits used for a store that is not in glb_store_limits
+#   rate - requests per second (long run average)
+#   burst - requests that can go out back to back after an idle period
+#   min_interval - min seconds between the start of two requests
+#   jitter - max random seconds added to min_interval
+#   max_concurrent - max requests in flight at the same time
+glb_default_limits = {
+    'rate'           : 1.0,
+    'burst'          : 2,
+    'min_interval'   : 0.5,
+    'jitter'         : 0.25,
+    'max_concurrent' : 2,
+}
+
+# store specific limits - only the values that differ from glb_default_limits
+glb_store_limits = {
+    'totalwine' : {
+        'rate'           : 0.2,
+        'burst'          : 1,
+        'min_interval'   : 5.0,
+        'jitter'         : 2.0,
+        'max_concurrent' : 1,
+    },
+    'bevmo' : {
+        'rate'           : 0.5,
+        'min_interval'   : 1.0,
+        'max_concurrent' : 1,
+    },
+    'nhliquor' : {
+        'rate'           : 2.0,
+        'burst'          : 4,
+        'min_interval'   : 0.25,
+        'max_concurrent' : 4,
+    },
+}
+
+# host specific limits - only the values that differ from glb_default_limits - these win over
+# the limits of the stores that send requests to the host
+glb_host_limits = {
+}
+
+# the throttle shared by the process - see get_throttle
+glb_throttle = None
+glb_throttle_lock = threading.Lock()
+
+
+# create a throttle
+#   store_limits - (opt) dict of store to limits - merged over glb_store_limits
+#   default_limits - (opt) limits merged over glb_default_limits for stores with no limits of their own
+#   host_limits - (opt) dict of host to limits - merged over glb_host_limits
+#   enabled - when False requests are never held up (the request counts are still kept)
+#
+# returns the dict that is passed to throttle_wait/throttled
+def create_throttle( store_limits=None, default_limits=None, host_limits=None, enabled=True ):
+    defaults = dict(glb_default_limits)
+    if default_limits:
+        defaults.update( default_limits )
+
+    limits = {}
+    for store in set(glb_store_limits) | set(store_limits if store_limits else {}):
+        limits[store] = dict(defaults)
+        limits[store].update( glb_store_limits.get(store, {}) )
+        if store_limits and store in store_limits:
+            limits[store].update( store_limits[store] )
+
+    hosts = {}
+    for host in set(glb_host_limits) | set(host_limits if host_limits else {}):
+        hosts[host] = dict(defaults)
+        hosts[host].update( glb_host_limits.get(host, {}) )
+        if host_limits and host in host_limits:
+            hosts[host].update( host_limits[host] )
+
+    return {
+        'enabled'  : enabled,
+        'defaults' : defaults,
+        'limits'   : limits,
+        'hosts'    : hosts,
+        'buckets'  : {},
+        'lock'     : threading.Lock(),
+    }
+
+
+# the throttle shared by the process - created on first use
+def get_throttle():
+    global glb_throttle
+    with glb_throttle_lock:
+        if glb_throttle is None:
+            glb_throttle = create_throttle()
+        return glb_throttle
+
+
+# the limits that apply to a store
+def throttle_limits( throttle, store ):
+    return throttle['limits'].get( store, throttle['defaults'] )
+
+
+# wait until the store/host can take another request - the caller must call throttle_done
+# when the request completes (or use throttled)
+#   url - (opt) the url requested - requests are paced by its host, otherwise by store
+#
+# returns the seconds we waited
+def throttle_wait( throttle, store, url=None ):
+    bucket = _throttle_bucket( throttle, store, url )
+
+    if not throttle['enabled']:
+        with throttle['lock']:
+            bucket['requests'] += 1
+        return 0
+
+    # cap on requests in flight
+    start = time.monotonic()
+    with bucket['cond']:
+        while bucket['inflight'] >= bucket['limits']['max_concurrent']:
+            bucket['cond'].wait()
+        bucket['inflight'] += 1
+
+    # reserve the next slot - later callers queue up behind it
+    with throttle['lock']:
+        limits = bucket['limits']
+        now = time.monotonic()
+        bucket['tokens'] = min( limits['burst'], bucket['tokens'] + (now - bucket['updated']) * limits['rate'] )
+        bucket['updated'] = now
+
+        slot = now
+        if bucket['tokens'] < 1:
+            slot = now + (1 - bucket['tokens']) / limits['rate']
+        slot = max( slot, bucket['last'] + limits['min_interval'] + random.uniform(0, limits['jitter']) )
+        bucket['tokens'] -= 1
+        bucket['last'] = slot
+
+        bucket['requests'] += 1
+
+    # wait for our slot
+    if slot > now:
+        time.sleep( slot - now )
+
+    waited = time.monotonic() - start
+    with throttle['lock']:
+        bucket['waited'] += waited
+        if waited >= 0.001:
+            bucket['waits'] += 1
+
+    logger.debug('throttle:%s:%s:waited:%.3f', store, bucket['key'], waited)
+    return waited
+
+
+# the request to the store/host is complete
+def throttle_done( throttle, store, url=None ):
+    if throttle['enabled']:
+        bucket = _throttle_bucket( throttle, store, url )
+        with bucket['cond']:
+            bucket['inflight'] -= 1
+            bucket['cond'].notify()
+
+
+# wrap a request to a store with throttle_wait/throttle_done - when throttle is None
+# the request is not paced
+@contextlib.contextmanager
+def throttled( throttle, store, url=None ):
+    if throttle is None:
+        yield 0
+        return
+
+    waited = throttle_wait( throttle, store, url )
+    try:
+        yield waited
+    finally:
+        throttle_done( throttle, store, url )
+
+
+# log the throttle counts for the run
+def log_throttle_stats( throttle ):
+    stats = {}
+    with throttle['lock']:
+        for key, bucket in sorted(throttle['buckets'].items()):
+            stats[key] = { 'requests' : bucket['requests'], 'waits' : bucket['waits'], 'waited' : bucket['waited'] }
+            logger.info('throttle:%s:requests:%d:waits:%d:waited:%.1f', key, bucket['requests'], bucket['waits'], bucket['waited'])
+    return stats
+
+
+# the strictest of two sets of limits
+def strictest_limits( limits, other ):
+    return {
+        'rate'           : min( limits['rate'], other['rate'] ),
+        'burst'          : min( limits['burst'], other['burst'] ),
+        'min_interval'   : max( limits['min_interval'], other['min_interval'] ),
+        'jitter'         : max( limits['jitter'], other['jitter'] ),
+        'max_concurrent' : min( limits['max_concurrent'], other['max_concurrent'] ),
+    }
+
+
+# get the bucket for the store/host - create it on first use
+#
+# a host in the host limits always uses those limits, otherwise the bucket is tightened to
+# the strictest limits of the stores that send to it
+def _throttle_bucket( throttle, store, url=None ):
+    key = urllib.parse.urlsplit( url ).hostname if url else None
+    if not key:
+        key = store
+
+    with throttle['lock']:
+        if key not in throttle['buckets']:
+            limits = throttle['hosts'].get( key ) or throttle_limits( throttle, store )
+            throttle['buckets'][key] = {
+                'key'      : key,
+                'limits'   : dict(limits),
+                'stores'   : { store },
+                'tokens'   : limits['burst'],
+                'updated'  : time.monotonic(),
+                'last'     : 0.0,
+                'inflight' : 0,
+                'cond'     : threading.Condition( threading.Lock() ),
+                'requests' : 0,
+                'waits'    : 0,
+                'waited'   : 0.0,
+            }
+        bucket = throttle['buckets'][key]
+
+        if store not in bucket['stores']:
+            bucket['stores'].add( store )
+            limits = throttle_limits( throttle, store )
+            if key in throttle['hosts']:
+                if limits != throttle['hosts'][key]:
+                    logger.warning('throttle:%s:store:%s:limits differ from the host limits - using host limits:%s', key, store, throttle['hosts'][key])
+            elif limits != bucket['limits']:
+                bucket['limits'] = strictest_limits( bucket['limits'], limits )
+                bucket['tokens'] = min( bucket['tokens'], bucket['limits']['burst'] )
+                logger.warning('throttle:%s:stores:%s:limits differ - using the strictest:%s', key, sorted(bucket['stores']), bucket['limits'])
+
+        return bucket
+
+# eof
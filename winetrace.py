@@ -0,0 +1,117 @@
+'''
+@author:   Ken Venner
+@contact:  ken@venerllc.com
+@version:  1.01
+
+Library used by the parsers to decide when to write their per-line trace to the log
+
+The parsers can write a debug line for every line of a page they look at - with the
+log level at DEBUG (the kvlogger default) formatting and writing those lines costs more
+than the parse.  The per-line trace is now opt in:
+
+    trace_stores - stores whose pages are always traced
+    trace_sample - trace 1 page in N of the other stores (0 - never)
+
+A parser calls start_page(label) when it starts on a page and then checks tracing()
+(a thread local flag) before each per-line debug call.  Tracing also needs the logger
+to be enabled for DEBUG.
+
+install_log_timer times the root log handlers so log_trace_summary can report how much
+of the run was spent writing the log.
+'''
+
+import logging
+import threading
+import time
+
+# logging
+logger = logging.getLogger(__name__)
+
+# version number
+AppVersion = '1.01'
+
+# trace settings and counts for the process
+glb_trace = {
+    'stores'      : set(),
+    'sample'      : 0,
+    'pages'       : 0,
+    'traced'      : 0,
+    'log_writes'  : 0,
+    'log_seconds' : 0.0,
+    'lock'        : threading.Lock(),
+}
+
+# per thread - is the page this thread is parsing being traced
+glb_trace_page = threading.local()
+
+
+# set which pages are traced
+#   stores - list of store/parser labels (not case sensitive) whose pages are always traced
+#   sample - trace 1 page in sample for all other stores (0 - none)
+def configure_trace( stores=None, sample=0 ):
+    with glb_trace['lock']:
+        glb_trace['stores'] = set( store.lower() for store in stores ) if stores else set()
+        glb_trace['sample'] = sample if sample else 0
+
+
+# a parser is starting on a page for this store/label - returns True if the page is traced
+def start_page( label ):
+    with glb_trace['lock']:
+        glb_trace['pages'] += 1
+        traced = bool( label and label.lower() in glb_trace['stores'] )
+        if not traced and glb_trace['sample']:
+            traced = glb_trace['pages'] % glb_trace['sample'] == 0
+        traced = traced and logging.getLogger('').isEnabledFor( logging.DEBUG )
+        if traced:
+            glb_trace['traced'] += 1
+
+    glb_trace_page.traced = traced
+    return traced
+
+
+# is the page being parsed by this thread traced
+def tracing():
+    return getattr( glb_trace_page, 'traced', False )
+
+
+# time the handlers on the root logger - call after the logging config is loaded
+def install_log_timer():
+    for handler in logging.getLogger('').handlers:
+        if getattr( handler, 'trace_timed', False ):
+            continue
+
+        def timed_handle( record, handle=handler.handle ):
+            start = time.perf_counter()
+            try:
+                return handle( record )
+            finally:
+                seconds = time.perf_counter() - start
+                with glb_trace['lock']:
+                    glb_trace['log_writes'] += 1
+                    glb_trace['log_seconds'] += seconds
+
+        handler.handle = timed_handle
+        handler.trace_timed = True
+
+
+# log (and return) the trace counts and the time spent in the log handlers
+#   elapsed - (opt) run seconds - the log time is also shown as a percentage of it
+def log_trace_summary( elapsed=None ):
+    with glb_trace['lock']:
+        summary = {
+            'pages'       : glb_trace['pages'],
+            'traced'      : glb_trace['traced'],
+            'log_writes'  : glb_trace['log_writes'],
+            'log_seconds' : glb_trace['log_seconds'],
+        }
+
+    if elapsed:
+        summary['log_pct'] = summary['log_seconds'] / elapsed * 100
+        logger.info('trace:pages:%d:traced:%d:log writes:%d:log seconds:%.2f:%.1f%% of %.1f seconds',
+                    summary['pages'], summary['traced'], summary['log_writes'], summary['log_seconds'], summary['log_pct'], elapsed)
+    else:
+        logger.info('trace:pages:%d:traced:%d:log writes:%d:log seconds:%.2f',
+                    summary['pages'], summary['traced'], summary['log_writes'], summary['log_seconds'])
+    return summary
+
+# eof
@@ -1,7 +1,7 @@
 '''
 @author:   Ken Venner
 @contact:  ken@venerllc.com
-@version:  1.06
+@version:  1.08
 
 Tools used to process wine lookups via email
 '''
@@ -9,6 +9,7 @@ Tools used to process wine lookups via email
 
 import wineselenium
 import winerequest
+import winestores
 import kvcsv
 import kvutil
 
@@ -21,7 +22,7 @@ from operator import itemgetter
 # application variables
 optiondictconfig = {
     'AppVersion' : {
-        'value' : '1.05',
+        'value' : '1.08',
         'description' : 'defines the version number for the app',
     },
     'debug' : {
@@ -119,7 +120,8 @@ def rank_records( list2rank, srchstring, namefld='wine_name', rankfld='search_hi
 #    f) sort this list by rank order
 #    g) generate HTML string
 #
-def html_body_from_email_subject(subject_srchstring, winesel_storelist, winereq_storelist, debug=False):
+#   driver_pool - (opt) wineselenium driver pool kept by the caller across emails (see wineselenium.create_driver_pool)
+def html_body_from_email_subject(subject_srchstring, winesel_storelist, winereq_storelist, debug=False, driver_pool=None):
 
     # set up - we are defining what we are putting in the email
     if debug:
@@ -162,14 +164,10 @@ table, td, th {
     logger.info('winesel_storelist:%s', winesel_storelist)
     logger.info('winereq_storelist:%s', winereq_storelist)
 
-    # create array to hold the search results
-    found_wines = []
-    # get information from Selenium wineries
-    logger.info('calling wineselenium')
-    found_wines.extend( wineselenium.get_wines_from_stores( [srchstring], winesel_storelist, debug=debug ) )
-    # get information from the request wineries
-    logger.info('calling winerequest')
-    found_wines.extend( winerequest.get_wines_from_stores( [srchstring], winereq_storelist, debug=debug ) )
+    # get information from the Selenium wineries and the request wineries at the same time (see winestores)
+    logger.info('calling wineselenium and winerequest')
+    found_wines = winestores.run_search_job( [srchstring], { 'selenium' : winesel_storelist, 'request' : winereq_storelist },
+                                             { 'selenium' : { 'debug' : debug, 'pool' : driver_pool }, 'request' : { 'debug' : debug } } )
 
     # debugging
     if debug:
@@ -228,26 +226,9 @@ if __name__ == '__main__':
     AppVersion = optiondict['AppVersion']
     subject_srchstring = optiondict['subject_srchstring']
 
-    # (wine) selenium stores
-    winesel_storelist = [
-#        'bevmo',
-        'hitime',
-        'pavillions',
-        'totalwine',
-        'wineclub',
-        'wally',
-    ]
-
-    # (winerequest) request stores
-    winereq_storelist = [
-        'winex',
-        'napacab',
-        'webwine',
-        'wineconn',
-        'johnpete',
-        'klwine',
-        'nhliquor',
-    ]
+    # (wine) selenium stores and (winerequest) request stores (see winestores)
+    winesel_storelist = winestores.store_list( 'wineutil', 'selenium' )
+    winereq_storelist = winestores.store_list( 'wineutil', 'request' )
 
     # extract out the HTML table for the wines found
     htmlbody = html_body_from_email_subject(subject_srchstring, winesel_storelist, winereq_storelist, debug=debug)
@@ -0,0 +1,85 @@
+'''
+@author:   Ken Venner
+@contact:  ken@venerllc.com
+@version:  1.02
+
+Library that pulls the vintage out of a wine name - used by winerequest (wine_year on the
+scraped records) and wineset (findVintage) so both apply the same rules
+
+The rules (in priority order - the first rule that matches anywhere in the name wins):
+
+    1) two years together ("2015 2016") - the second one
+    2) a year at the start of the name
+    3) a year at the end of the name
+    4) a year between white space
+    5) a year after XX
+    6) a year followed by a / ("2016/750ml")
+    7) two digits with an optional apostrophe at the end of the name or between white space
+
+A year is four digits starting 19 or 20 - so a bottle size ("Opus One 2015 1500ml") is not
+taken for the vintage.
+
+The rules are combined into one pattern (each rule is a look ahead over the whole name tried
+in order) and the results are memoized by wine name - the same names come back from the
+stores day after day
+'''
+
+import functools
+import re
+
+# logging
+import logging
+
+logger = logging.getLogger(__name__)
+
+# version number
+AppVersion = '1.02'
+
+# number of wine names we remember the vintage of
+glb_vintage_cache_size = 65536
+
+# a four position year - 19xx or 20xx
+glb_re_year = r'(?:19|20)\d\d'
+
+# the vintage rules - one look ahead per rule, the rule's group captures the vintage as written
+glb_re_vintage = re.compile( '|'.join( '(?=.*?(?:%s))' % rule.replace('YYYY', glb_re_year) for rule in (
+    r'YYYY\s+(YYYY)',                    # two years together - get this one over early
+    r'^(YYYY)',                          # four position start of line
+    r'\s(YYYY)$',                        # four position end of line
+    r'\s(YYYY)\s',                       # four position middle of line
+    r'XX(YYYY)\s',                       # four position after XX
+    r'\s(YYYY)\/',                       # four position split
+    r"\s'?(\d\d)'?$|\s'?(\d\d)'?\s",    # two position date with optional apostrophe front or back
+) ), re.DOTALL )
+
+
+# find the vintage in a wine name
+#
+# returns the vintage as written in the name (4 digit or 2 digit) or None
+@functools.lru_cache( maxsize=glb_vintage_cache_size )
+def find_vintage( winename ):
+    m = glb_re_vintage.match( winename )
+    if not m:
+        return None
+
+    # the group of the rule that matched is the only one set
+    for vintage in m.groups():
+        if vintage:
+            return vintage
+
+    return None
+
+
+# find the 2 digit vintage in a wine name (the form used by wineset) - or None
+def find_vintage_yy( winename ):
+    vintage = find_vintage( winename )
+    return vintage[-2:] if vintage else None
+
+
+# log (and return) the memo counts
+def log_vintage_cache_stats():
+    info = find_vintage.cache_info()
+    logger.info('vintage cache:hits:%d:misses:%d:names:%d', info.hits, info.misses, info.currsize)
+    return info
+
+# eof
@@ -0,0 +1,203 @@
+'''
+@author:   Ken Venner
+@contact:  ken@venerllc.com
+@version:  1.01
+
+Library used by wineselenium to wait on the store web pages
+
+Instead of sleeping a fixed number of seconds (the worst case) and then looking at the
+page, a wait polls a condition on the page (elements present, elements visible, an
+element gone stale, the network gone idle) and returns as soon as the condition is met.
+The seconds passed in by the caller are the budget - the most we wait - and each store
+has a max budget (glb_store_budgets) no wait can go over.
+
+Every wait is recorded so log_wait_stats can show by store the budget we would have
+slept, the seconds we actually waited, and the idle time removed.
+'''
+
+from selenium.common.exceptions import StaleElementReferenceException
+
+import threading
+import time
+
+# logging
+import logging
+
+logger = logging.getLogger(__name__)
+
+# version number
+AppVersion = '1.01'
+
+# seconds between checks of the condition
+glb_poll = 0.25
+
+# max seconds any one wait can take - for a store not in glb_store_budgets
+glb_default_budget = 20
+
+# store specific max seconds for one wait
+glb_store_budgets = {
+    'totalwine'  : 30,
+    'bevmo'      : 20,
+    'hitime'     : 25,
+    'pavillions' : 15,
+    'napacab'    : 20,
+    'ralphs'     : 15,
+}
+
+# seconds without a new resource load before the page is idle (network_idle)
+glb_idle_quiet = 0.5
+
+# wait counts by store - see log_wait_stats
+glb_wait_stats = {}
+glb_wait_lock = threading.Lock()
+
+
+# the budget of a wait - the seconds asked for capped by the store max budget
+def wait_budget( store, budget=None ):
+    maxbudget = glb_store_budgets.get( store, glb_default_budget )
+    if budget is None:
+        return maxbudget
+    return min( budget, maxbudget )
+
+
+# poll condition(driver) until it returns a true value or the budget runs out
+#   store - store the wait is charged to (and the max budget)
+#   budget - seconds the caller used to sleep (the most we wait)
+#   label - what we are waiting on (logging)
+#
+# returns the last value returned by condition (false when we ran out of budget)
+def wait_until( driver, store, condition, budget=None, label='', poll=None ):
+    budget = wait_budget( store, budget )
+    poll = poll if poll else glb_poll
+
+    start = time.monotonic()
+    while True:
+        try:
+            result = condition( driver )
+        except Exception as e:
+            # the page is changing under us - check again
+            logger.debug('wait:%s:%s:condition error:%s', store, label, str(e))
+            result = None
+
+        waited = time.monotonic() - start
+        if result or waited >= budget:
+            break
+        time.sleep( min( poll, budget - waited ) )
+
+    _record_wait( store, budget, waited, bool(result) )
+    if result:
+        logger.debug('wait:%s:%s:ready in seconds:%.2f:budget:%.1f', store, label, waited, budget)
+    else:
+        logger.info('wait:%s:%s:not ready in budget:%.1f', store, label, budget)
+    return result
+
+
+# wait for the page to stop loading (see network_idle) - replaces the pause after a click/submit
+def settle( driver, store, budget=None, label='settle' ):
+    return wait_until( driver, store, network_idle(), budget, label )
+
+
+# find the elements on the page - byType as used by find_elements_looped
+def find_elements( driver, byType, name ):
+    if byType in ('by_class_name', 'byClassName', 'class_name', 'className'):
+        return driver.find_elements_by_class_name( name )
+    elif byType in ('by_name', 'byName', 'name'):
+        return driver.find_elements_by_name( name )
+    elif byType in ('by_xpath', 'byXpath', 'xpath'):
+        return driver.find_elements_by_xpath( name )
+    elif byType in ('by_id', 'byID', 'id'):
+        return driver.find_elements_by_id( name )
+    raise ValueError('unknown byType:%s' % byType)
+
+
+# condition - the list of elements when there is at least one on the page
+def elements_present( byType, name ):
+    def condition( driver ):
+        return find_elements( driver, byType, name )
+    return condition
+
+
+# condition - the list of displayed elements when there is at least one
+def elements_visible( byType, name ):
+    def condition( driver ):
+        return [elem for elem in find_elements( driver, byType, name ) if elem.is_displayed()]
+    return condition
+
+
+# condition - the elements that have text (containing text when given) when there is at least one
+def text_present( byType, name, text=None ):
+    def condition( driver ):
+        return [elem for elem in find_elements( driver, byType, name ) if elem.text and (text is None or text in elem.text)]
+    return condition
+
+
+# condition - the element when it is displayed
+def element_visible( elem ):
+    def condition( driver ):
+        return elem if elem.is_displayed() else None
+    return condition
+
+
+# condition - True when the element is no longer on the page (the page was replaced)
+def element_stale( elem ):
+    def condition( driver ):
+        try:
+            elem.is_enabled()
+            return False
+        except StaleElementReferenceException:
+            return True
+    return condition
+
+
+# condition - True when the document is loaded and no new resource was loaded for quiet seconds
+def network_idle( quiet=None ):
+    quiet = quiet if quiet else glb_idle_quiet
+    state = { 'count' : -1, 'changed' : time.monotonic() }
+
+    def condition( driver ):
+        (ready, count) = driver.execute_script(
+            "return [document.readyState, window.performance ? window.performance.getEntriesByType('resource').length : 0];")
+        now = time.monotonic()
+        if ready != 'complete' or count != state['count']:
+            state['count'] = count
+            state['changed'] = now
+            return False
+        return now - state['changed'] >= quiet
+    return condition
+
+
+# condition - true when any of the conditions is (returns the first true value)
+def any_of( *conditions ):
+    def condition( driver ):
+        for cond in conditions:
+            result = cond( driver )
+            if result:
+                return result
+        return None
+    return condition
+
+
+# log (and return) by store the waits, the seconds budgeted, the seconds waited, and the idle seconds removed
+def log_wait_stats():
+    stats = {}
+    with glb_wait_lock:
+        for store, counts in sorted(glb_wait_stats.items()):
+            stats[store] = dict(counts, removed=counts['budget'] - counts['waited'])
+
+    for store, counts in stats.items():
+        logger.info('wait:%s:waits:%d:timeouts:%d:budget seconds:%.1f:waited seconds:%.1f:idle seconds removed:%.1f',
+                    store, counts['waits'], counts['timeouts'], counts['budget'], counts['waited'], counts['removed'])
+    return stats
+
+
+# add a wait to the store counts
+def _record_wait( store, budget, waited, ready ):
+    with glb_wait_lock:
+        counts = glb_wait_stats.setdefault( store, {'waits' : 0, 'timeouts' : 0, 'budget' : 0.0, 'waited' : 0.0} )
+        counts['waits'] += 1
+        counts['budget'] += budget
+        counts['waited'] += waited
+        if not ready:
+            counts['timeouts'] += 1
+
+# eof
@@ -0,0 +1,142 @@
+'''
+@author:   Ken Venner
+@contact:  ken@venerllc.com
+@version:  1.01
+
+Library used by wineselenium and winerequest to write the wines found to the output file
+
+The writer is created once for the run: the output file is opened once (append) and one
+writer thread owns it.  Any thread puts rows on the writer's queue (writer_put) - a put is
+written as a block so the rows of two searches never interleave - and the thread writes
+them with csv quoting and flushes the file when flush_rows rows are waiting, when
+flush_seconds have gone by, at a checkpoint (writer_checkpoint) and at close.
+
+A put can carry a done function that is called once its rows are flushed to the file -
+used to add the search to the run journal (see winejournal) only after its wines are on
+disk.
+'''
+
+import csv
+import os
+import queue
+import threading
+import time
+
+# logging
+import logging
+
+logger = logging.getLogger(__name__)
+
+# version number
+AppVersion = '1.01'
+
+
+# create the writer for this output file and start its thread
+#   flush_rows - rows written before the file is flushed
+#   flush_seconds - max seconds a row waits before the file is flushed
+#
+# returns the dict passed to writer_put/writer_checkpoint/close_writer
+def create_writer( filename, flush_rows=200, flush_seconds=5.0 ):
+    writer = {
+        'file'          : filename,
+        'flush_rows'    : flush_rows,
+        'flush_seconds' : flush_seconds,
+        'queue'         : queue.Queue(),
+        'rows'          : 0,
+        'puts'          : 0,
+        'flushes'       : 0,
+        'closed'        : False,
+        'fp'            : open( filename, 'a', newline='' ),
+    }
+    writer['thread'] = threading.Thread( target=_writer_thread, args=(writer,), name='winewriter', daemon=True )
+    writer['thread'].start()
+    logger.info('writer:%s:flush_rows:%d:flush_seconds:%.1f', filename, flush_rows, flush_seconds)
+    return writer
+
+
+# queue rows (list of lists of fields) to be written as one block
+#   done - (opt) function called (on the writer thread) once these rows are flushed to the file
+def writer_put( writer, rows, done=None ):
+    if writer['closed']:
+        raise ValueError('writer is closed:%s' % writer['file'])
+    writer['queue'].put( (list(rows), done, None) )
+
+
+# flush everything queued so far to the file - waits for it when wait is set
+def writer_checkpoint( writer, wait=True ):
+    event = threading.Event()
+    writer['queue'].put( ([], None, event) )
+    if wait:
+        event.wait()
+
+
+# flush and close the file and stop the writer thread
+def close_writer( writer ):
+    if writer['closed']:
+        return
+    writer['closed'] = True
+    writer['queue'].put( None )
+    writer['thread'].join()
+    logger.info('writer:%s:closed:puts:%d:rows:%d:flushes:%d', writer['file'], writer['puts'], writer['rows'], writer['flushes'])
+
+
+# writer thread - the only code that touches the file (opened by create_writer so an error shows up there)
+def _writer_thread( writer ):
+    with writer['fp'] as fp:
+        csvout = csv.writer( fp, lineterminator=os.linesep )
+        waiting = 0
+        callbacks = []
+        oldest = None
+
+        def flush():
+            nonlocal waiting, callbacks, oldest
+            fp.flush()
+            if waiting or callbacks:
+                writer['flushes'] += 1
+            for done in callbacks:
+                try:
+                    done()
+                except Exception as e:
+                    logger.error('writer:%s:done function error:%s', writer['file'], str(e))
+            waiting = 0
+            callbacks = []
+            oldest = None
+
+        while True:
+            # wake up in time to flush rows that have waited flush_seconds
+            timeout = None
+            if oldest is not None:
+                timeout = max( 0, writer['flush_seconds'] - (time.monotonic() - oldest) )
+            try:
+                item = writer['queue'].get( timeout=timeout )
+            except queue.Empty:
+                flush()
+                continue
+
+            # close
+            if item is None:
+                flush()
+                return
+
+            (rows, done, event) = item
+            if rows:
+                try:
+                    csvout.writerows( rows )
+                except Exception as e:
+                    logger.error('writer:%s:rows not written:%d:error:%s', writer['file'], len(rows), str(e))
+                    rows = []
+                    done = None
+                writer['puts'] += 1
+                writer['rows'] += len(rows)
+                waiting += len(rows)
+            if done:
+                callbacks.append( done )
+            if oldest is None and (waiting or callbacks):
+                oldest = time.monotonic()
+
+            if event or waiting >= writer['flush_rows'] or (oldest is not None and time.monotonic() - oldest >= writer['flush_seconds']):
+                flush()
+            if event:
+                event.set()
+
+# eof
@@ -0,0 +1,225 @@
+'''
+@author:   Ken Venner
+@contact:  ken@venerllc.com
+@version:  1.01
+
+Library used by wineselenium to translate the wine names the stores return into the
+names we track (wine_xlat.csv - store,store wine name,translated wine name)
+
+The translation file is read once into an index:
+
+    exact - (store, wine name) as in the file
+    norm  - (store, normalized wine name) - lower case, commas and runs of white space
+            made a single space - so "Groth Cabernet, 2016" finds "groth  cabernet 2016"
+
+and an optional fuzzy fallback (difflib close match within the store at fuzzy cutoff -
+0 turns it off) for names that are still not found.
+
+The index is saved next to the csv in a sidecar file (wine_xlat.csv.idx) with the
+size/mtime and sha1 of the csv it was built from - the next run loads the sidecar
+instead of parsing the csv when the csv has not changed.
+
+Each lookup is counted (exact/normalized/fuzzy hits and misses) and the misses are kept
+by store so log_xlat_stats can show the store wine names that never translate.
+'''
+
+import csv
+import difflib
+import hashlib
+import os
+import pickle
+import re
+import threading
+
+# logging
+import logging
+
+logger = logging.getLogger(__name__)
+
+# version number
+AppVersion = '1.01'
+
+# sidecar file name and layout version (bump when the index layout changes)
+glb_sidecar_ext = '.idx'
+glb_sidecar_version = 1
+
+# number of missed names by store shown by log_xlat_stats
+glb_miss_show = 10
+
+glb_re_white = re.compile( r'\s+' )
+
+
+# the key a wine name is looked up by - case, commas and white space do not matter
+def normalize_name( wine ):
+    return glb_re_white.sub( ' ', wine.replace( ',', ' ' ) ).strip().lower()
+
+
+# load the index of the translation file - from the sidecar when the file has not changed
+#   fuzzy - difflib cutoff (0.0 - 1.0) for the close match fallback (0 - no fallback)
+#   sidecar - save/load the index in filename + glb_sidecar_ext
+#
+# returns the index dict passed to xlat_lookup/log_xlat_stats
+def load_xlat_index( filename, fuzzy=0, sidecar=True ):
+    stat = os.stat( filename )
+    sidecar_file = filename + glb_sidecar_ext
+    tables = None
+    digest = None
+
+    # the sidecar is good if it was built from a file with this size/mtime - or this content
+    if sidecar:
+        saved = _read_sidecar( sidecar_file )
+        if saved and saved['size'] == stat.st_size and saved['mtime'] == stat.st_mtime_ns:
+            tables = saved['tables']
+            logger.info('xlat:%s:index loaded from sidecar', filename)
+        elif saved and saved['size'] == stat.st_size:
+            digest = _file_digest( filename )
+            if saved['sha1'] == digest:
+                tables = saved['tables']
+                logger.info('xlat:%s:index loaded from sidecar - file touched not changed', filename)
+                _write_sidecar( sidecar_file, stat, digest, tables )
+
+    # build it from the file
+    if tables is None:
+        tables = _build_tables( filename )
+        if sidecar:
+            _write_sidecar( sidecar_file, stat, digest if digest else _file_digest( filename ), tables )
+
+    index = {
+        'file'    : filename,
+        'fuzzy'   : fuzzy,
+        'exact'   : tables['exact'],
+        'norm'    : tables['norm'],
+        'names'   : tables['names'],
+        'matched' : {},
+        'counts'  : {'exact' : 0, 'normalized' : 0, 'fuzzy' : 0, 'miss' : 0},
+        'misses'  : {},
+        'lock'    : threading.Lock(),
+    }
+    logger.info('xlat:%s:stores:%d:names:%d:normalized names:%d:fuzzy:%s', filename, len(index['names']), len(index['exact']), len(index['norm']), fuzzy)
+    return index
+
+
+# the translated name of this store wine name - None when there is no translation
+def xlat_lookup( index, store, wine ):
+    # index not loaded - nothing translates
+    if not index:
+        return None
+
+    xlat = index['exact'].get( (store, wine) )
+    if xlat is not None:
+        _count( index, 'exact' )
+        return xlat
+
+    norm = normalize_name( wine )
+    xlat = index['norm'].get( (store, norm) )
+    if xlat is not None:
+        _count( index, 'normalized' )
+        return xlat
+
+    # close match among the names of this store - remembered for the next time we see it
+    if index['fuzzy'] and store in index['names']:
+        with index['lock']:
+            matched = index['matched'].get( (store, norm), () )
+        if matched == ():
+            found = difflib.get_close_matches( norm, index['names'][store], n=1, cutoff=index['fuzzy'] )
+            matched = found[0] if found else None
+            with index['lock']:
+                index['matched'][(store, norm)] = matched
+            if matched:
+                logger.debug('xlat:%s:fuzzy match:%s:to:%s', store, wine, matched)
+        if matched:
+            _count( index, 'fuzzy' )
+            return index['norm'][(store, matched)]
+
+    with index['lock']:
+        index['counts']['miss'] += 1
+        misses = index['misses'].setdefault( store, {} )
+        misses[wine] = misses.get( wine, 0 ) + 1
+    return None
+
+
+# log (and return) the lookup counts and by store the names that did not translate
+def log_xlat_stats( index ):
+    if not index:
+        return {}
+
+    with index['lock']:
+        stats = dict( index['counts'] )
+        misses = { store : dict(names) for store, names in index['misses'].items() }
+
+    logger.info('xlat:lookups:exact:%d:normalized:%d:fuzzy:%d:miss:%d', stats['exact'], stats['normalized'], stats['fuzzy'], stats['miss'])
+    for store, names in sorted(misses.items()):
+        top = sorted( names.items(), key=lambda item: -item[1] )[:glb_miss_show]
+        logger.info('xlat:%s:names not translated:%d:%s', store, len(names), top)
+
+    stats['misses'] = misses
+    return stats
+
+
+# count a hit
+def _count( index, kind ):
+    with index['lock']:
+        index['counts'][kind] += 1
+
+
+# parse the translation file - store,store wine name,translated name (a later line for the same
+# store/name replaces the earlier one)
+def _build_tables( filename ):
+    tables = {'exact' : {}, 'norm' : {}, 'names' : {}}
+    with open( filename, 'r', newline='' ) as fp:
+        for row in csv.reader( fp ):
+            if len(row) < 3 or not row[0]:
+                continue
+            (store, wine, xlat) = (row[0], row[1], row[2].strip())
+            if (store, wine) in tables['exact'] and tables['exact'][(store, wine)] != xlat:
+                logger.debug('%s:%s:mapping changed from:%s:to:%s', store, wine, tables['exact'][(store, wine)], xlat)
+            tables['exact'][(store, wine)] = xlat
+            norm = normalize_name( wine )
+            if (store, norm) not in tables['norm']:
+                tables['names'].setdefault( store, [] ).append( norm )
+            tables['norm'][(store, norm)] = xlat
+    return tables
+
+
+# sha1 of the file content
+def _file_digest( filename ):
+    sha1 = hashlib.sha1()
+    with open( filename, 'rb' ) as fp:
+        for block in iter( lambda: fp.read( 1 << 20 ), b'' ):
+            sha1.update( block )
+    return sha1.hexdigest()
+
+
+# the saved index - None when there is none or it can not be used
+def _read_sidecar( sidecar_file ):
+    try:
+        with open( sidecar_file, 'rb' ) as fp:
+            saved = pickle.load( fp )
+        if saved.get( 'version' ) == glb_sidecar_version:
+            return saved
+        logger.info('xlat:%s:sidecar version changed - rebuilding', sidecar_file)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning('xlat:%s:sidecar not readable - rebuilding:%s', sidecar_file, str(e))
+    return None
+
+
+# save the index - written to a temp file and moved in place so a reader never sees half a file
+def _write_sidecar( sidecar_file, stat, digest, tables ):
+    saved = {
+        'version' : glb_sidecar_version,
+        'size'    : stat.st_size,
+        'mtime'   : stat.st_mtime_ns,
+        'sha1'    : digest,
+        'tables'  : tables,
+    }
+    tmpfile = sidecar_file + '.tmp'
+    try:
+        with open( tmpfile, 'wb' ) as fp:
+            pickle.dump( saved, fp, protocol=pickle.HIGHEST_PROTOCOL )
+        os.replace( tmpfile, sidecar_file )
+    except Exception as e:
+        logger.warning('xlat:%s:sidecar not saved:%s', sidecar_file, str(e))
+
+# eof